@@ -0,0 +1,77 @@
+# batch_translate.py
+"""离线批量翻译入口
+
+用法：
+    python batch_translate.py submit book1.txt book2.docx --lang 中文 --style 日式轻小说
+    python batch_translate.py resume      # 程序中断后继续轮询并收取结果
+    python batch_translate.py status      # 查看当前任务状态
+"""
+import argparse
+import logging
+import sys
+
+from config.config_manager import read_api_keys
+from config.settings import BATCH_CONFIG
+from translation.batch_job import BatchTranslationJob, create_batch_client
+from translation.translation_engine import TranslationEngine
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="离线批量翻译（服务商批量任务接口）")
+    parser.add_argument("--base-url", help="批量接口地址（默认读取 BATCH_CONFIG / API_CONFIG）")
+    parser.add_argument("--state-file", default=BATCH_CONFIG["STATE_FILE"], help="任务状态文件")
+    parser.add_argument("--interval", type=float, default=BATCH_CONFIG["POLL_INTERVAL"], help="轮询间隔（秒）")
+    parser.add_argument("--no-fallback", action="store_true", help="批量结果缺失时不回退到在线翻译")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="分块并提交批量任务，然后等待结果")
+    submit.add_argument("files", nargs="+", help="待翻译的.txt/.docx文件")
+    submit.add_argument("--lang", default="中文", help="目标语言（中文/英文/日语/韩语）")
+    submit.add_argument("--style", default="标准", help="翻译风格（标准/日式轻小说/正式/通用）")
+    submit.add_argument("--model", default="DeepSeek-V3", help="模型（DeepSeek-V3/DeepSeek-R1/自动）")
+    submit.add_argument("--temp", type=float, default=1.3, help="温度值（0-2）")
+    submit.add_argument("--output", help="输出目录（默认与源文件相同）")
+    submit.add_argument("--word", action="store_true", help="输出为Word文档（默认TXT）")
+    submit.add_argument("--no-wait", action="store_true", help="提交后立即退出，稍后用resume收取结果")
+
+    commands.add_parser("resume", help="继续轮询未完成的任务并收取结果")
+    commands.add_parser("status", help="查看当前任务状态")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger = logging.getLogger("BatchMain")
+
+    api_keys = read_api_keys()
+    engine = TranslationEngine(api_keys)
+    job = BatchTranslationJob(engine, create_batch_client(api_keys[0][0], args.base_url), args.state_file)
+
+    if args.command == "status":
+        print(job.summary() or "没有批量任务")
+        return 0
+
+    if args.command == "submit":
+        if job.has_pending():
+            logger.error("已有未完成的批量任务 %s，请先执行 resume", job.state["batch_id"])
+            return 1
+        job.submit(args.files, args.lang, args.style, args.temp, args.model, args.output, args.word)
+        if args.no_wait:
+            logger.info("任务已提交，稍后执行 python batch_translate.py resume 收取结果")
+            return 0
+    elif not job.has_pending():
+        logger.error("没有需要继续的批量任务")
+        return 1
+
+    status = job.poll(args.interval)
+    if status != "completed":
+        logger.warning("批量任务结束状态: %s", status)
+    for path in job.collect(fallback_online=not args.no_fallback):
+        logger.info("译文已保存: %s", path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
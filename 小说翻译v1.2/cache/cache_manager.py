@@ -4,26 +4,44 @@
 功能：实现智能会话级缓存管理，支持缓存生命周期管理、自动清理和跨会话隔离
 核心机制：
 - 使用线程安全的锁机制保证并发安全
-- 支持JSON文件持久化存储缓存数据
-- 基于文件哈希实现会话级缓存隔离
+- 通过可替换的存储后端持久化缓存数据（默认SQLite WAL，可选旧版JSON文件）
+- 旧版JSON缓存在SQLite后端首次启动时自动导入
+- 后台加载：打开存储后端与导入旧版JSON在后台线程进行，界面无需等待；
+  加载完成前的查询只在需要读取存储时等待（SQLite打开即可按键查询，仅未命中的键等待导入完成；
+  JSON后端需读完整个文件才算打开）
+- 异步查询：aget 供事件循环中的翻译引擎使用，存储读取与加载等待在线程中执行，不阻塞事件循环
+- 延迟写回：set只写入内存中的待写回表，由后台线程按时间间隔或条目数批量写入存储后端，
+  save_cache(force=True) 与进程退出时同步写回
+- 容量控制：按条目数、总字节数与TTL定期淘汰（LRU或LFU），正在翻译的文件的条目固定不淘汰；
+  命中记录随写回批量更新到存储后端
+- 基于文件哈希实现会话级缓存隔离，缓存键→文件哈希的反向索引随条目持久化，重启后仍可按文件清理；
+  长期未再翻译的文件可按天数批量清理
 - 提供缓存命中检测、自动清理和会话关联管理
 """
 
 import os
-import json
+import asyncio
+import atexit
 import threading
+import time
 import hashlib
-from config.settings import PATH_CONFIG  # 新增配置导入
+from config.settings import PATH_CONFIG, CACHE_CONFIG  # 新增配置导入
+from cache.storage import create_cache_storage, import_json_cache, SQLiteCacheStorage
 
 
 class TranslationCache:
     """翻译缓存管理系统
 
     属性：
-    - cache: 存储所有缓存数据的字典，结构为 {md5_key: translation_result}
-    - session_map: 会话映射表，记录文件哈希与缓存键的关联关系
+    - storage: 缓存存储后端，结构为 {md5_key: translation_result}
+    - session_map: 会话映射表 {file_hash: {cache_key, ...}}，仅旧版JSON后端使用（SQLite后端持久化在file_hash列）
     - cache_file: 持久化缓存文件的路径（从配置读取默认值）
+    - backend: 存储后端名称（sqlite/json）
     - lock: 线程锁，确保多线程操作安全
+    - flush_interval / flush_batch: 后台写回的时间间隔与条目数阈值
+    - opened / loaded: 存储后端已打开、旧版缓存已导入完成的事件
+    - pinned: 固定不淘汰的文件哈希集合（正在翻译的文件）
+    - eviction_stats: 淘汰检查次数与过期/超容量淘汰的条目数
 
     功能：
     - 自动加载/保存持久化缓存
@@ -32,43 +50,203 @@ class TranslationCache:
     - 会话级缓存管理
     """
 
-    def __init__(self, cache_file=PATH_CONFIG["CACHE_FILE"]):  # 修改默认值来源
+    def __init__(self, cache_file=PATH_CONFIG["CACHE_FILE"], backend=CACHE_CONFIG["BACKEND"]):  # 修改默认值来源
         """初始化缓存系统
         :param cache_file: 缓存文件路径，默认使用配置文件中 PATH_CONFIG["CACHE_FILE"]
+        :param backend: 存储后端名称，默认使用 CACHE_CONFIG["BACKEND"]
         """
-        self.cache = {}  # 缓存数据存储字典
-        self.session_map = {}  # 会话映射关系 {file_hash: [cache_key1, ...]}
+        self.storage = None  # 缓存存储后端
+        self.session_map = {}  # 会话映射关系 {file_hash: {cache_key1, ...}}
         self.cache_file = cache_file
+        self.backend = backend
         self.lock = threading.Lock()  # 线程安全锁
-        self.load_cache()  # 初始化时加载持久化缓存
+        self.flush_interval = CACHE_CONFIG["FLUSH_INTERVAL"]
+        self.flush_batch = CACHE_CONFIG["FLUSH_BATCH"]
+        self._pending = {}  # 待写回条目 {cache_key: (translation, file_hash)}
+        self._flushing = {}  # 正在写回的条目，写回完成前仍可被查询
+        self._flush_lock = threading.Lock()  # 串行化写回，避免两批写入交错
+        self._flush_event = threading.Event()
+        self._closed = False
+        self._touched = set()  # 自上次写回以来命中的缓存键
+        self._seen_sessions = set()  # 自上次写回以来出现的文件哈希
+        self.pinned = set()
+        self.eviction_stats = {"runs": 0, "expired": 0, "capacity": 0}
+        self._last_evict = time.monotonic()
+        self.opened = threading.Event()
+        self.loaded = threading.Event()
+        self._event_waiters = {}  # 事件循环中等待opened/loaded的共享任务 {事件: asyncio.Future}
+        if CACHE_CONFIG["BACKGROUND_LOAD"]:
+            threading.Thread(target=self.load_cache, name="CacheLoader", daemon=True).start()
+        else:
+            self.load_cache()  # 初始化时打开存储后端
+        self._flusher = threading.Thread(target=self._flush_loop, name="CacheFlusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
 
     def load_cache(self):
-        """从磁盘加载持久化缓存数据
-        异常处理：捕获文件不存在或格式错误等异常，打印错误信息但不会中断程序
+        """打开存储后端；SQLite后端首次启动时导入旧版JSON缓存
+        存储后端打开后立即置位opened，此后命中的查询不再等待；导入完成后置位loaded
+        （JSON后端在构造时读入整个文件，读完后才置位opened）
+        加载期间不持有self.lock，写入缓存与查询待写回表不受影响
+        异常处理：捕获文件格式错误等异常，打印错误信息但不会中断程序（此时使用空的内存缓存）
         """
         try:
-            # 使用线程锁保证加载操作的原子性
-            with self.lock:
-                if os.path.exists(self.cache_file):
-                    with open(self.cache_file, "r", encoding="utf-8") as f:
-                        self.cache = json.load(f)
-                        print(f"成功加载缓存文件，共 {len(self.cache)} 条缓存记录")
+            self.storage = create_cache_storage(self.backend, self.cache_file)
+            self.opened.set()
+            legacy_file = CACHE_CONFIG["LEGACY_JSON_FILE"]
+            if self.storage.name == SQLiteCacheStorage.name and os.path.exists(legacy_file):
+                import_json_cache(legacy_file, self.storage)
+            print(f"成功打开缓存（{self.storage.name}），共 {self.storage.count()} 条缓存记录")
         except Exception as e:
             print(f"[ERROR] 加载缓存失败: {str(e)}")
+            if self.storage is None:
+                self.storage = SQLiteCacheStorage(":memory:")
+        finally:
+            self.opened.set()
+            self.loaded.set()
 
     def save_cache(self, force=False):
         """将缓存数据持久化到文件
-        :param force: 保留参数，用于未来扩展强制保存逻辑
+        :param force: True时在当前线程同步写回全部待写回条目并落盘（任务结束时调用）；
+                      False时只唤醒后台写回线程，不阻塞调用方
+        """
+        if not force:
+            self._flush_event.set()
+            return
+        try:
+            count = self._flush()
+            self.opened.wait()
+            self.evict()
+            self.storage.flush()
+            print(f"缓存已持久化，本次写回 {count} 条，当前缓存数量：{self.storage.count()}")
+        except Exception as e:
+            print(f"[ERROR] 保存缓存失败: {str(e)}")
+
+    def _flush(self):
+        """将待写回条目与命中记录批量写入存储后端
+        写入失败时条目放回待写回表（已有更新的键不覆盖），等待下次写回
+        :return: 本次写回的条目数
         """
-        # 使用线程锁保证写入操作的原子性
+        with self._flush_lock:
+            return self._flush_locked()
+
+    def _flush_locked(self):
+        """写回的实际过程，调用方需持有 _flush_lock"""
         with self.lock:
+            if not self._pending and not self._touched and not self._seen_sessions:
+                return 0
+        self.opened.wait()
+        with self.lock:
+            self._flushing, self._pending = self._pending, {}
+            touched, self._touched = self._touched, set()
+            seen_sessions, self._seen_sessions = self._seen_sessions, set()
+        batch = self._flushing
+        try:
+            if batch:
+                self.storage.put_many(
+                    (key, translation, file_hash) for key, (translation, file_hash) in batch.items()
+                )
+            if touched:
+                self.storage.touch_many(touched)
+            if seen_sessions:
+                self.storage.touch_sessions(seen_sessions)
+        except Exception:
+            with self.lock:
+                self._pending = {**batch, **self._pending}
+            raise
+        finally:
+            with self.lock:
+                self._flushing = {}
+        return len(batch)
+
+    def _flush_loop(self):
+        """后台写回线程：每隔 flush_interval 秒或待写回条目达到 flush_batch 时写回，
+        每隔 EVICT_INTERVAL 秒执行一次淘汰检查"""
+        while not self._closed:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
             try:
-                with open(self.cache_file, "w", encoding="utf-8") as f:
-                    # 美化输出格式，禁用ASCII转义，2空格缩进
-                    json.dump(self.cache, f, ensure_ascii=False, indent=2)
-                    print(f"缓存已持久化，当前缓存数量：{len(self.cache)}")
+                self._flush()
+                if time.monotonic() - self._last_evict >= CACHE_CONFIG["EVICT_INTERVAL"]:
+                    self.evict()
             except Exception as e:
-                print(f"[ERROR] 保存缓存失败: {str(e)}")
+                print(f"[ERROR] 后台写回缓存失败: {str(e)}")
+
+    def evict(self):
+        """按 CACHE_CONFIG 的容量上限与TTL淘汰条目，固定会话的条目不淘汰
+        :return: {"expired": 过期淘汰数, "capacity": 超容量淘汰数}
+        """
+        self._last_evict = time.monotonic()
+        self.opened.wait()
+        with self.lock:
+            pinned = set(self.pinned)
+        ttl_days = CACHE_CONFIG["TTL_DAYS"]
+        with self._flush_lock:  # 与写回、关闭互斥，避免关闭存储后端时淘汰仍在进行
+            if self._closed:
+                return {"expired": 0, "capacity": 0}
+            result = self.storage.evict(CACHE_CONFIG["MAX_ENTRIES"], CACHE_CONFIG["MAX_BYTES"],
+                                        ttl_days * 86400 if ttl_days else None, pinned,
+                                        CACHE_CONFIG["EVICTION_POLICY"])
+        with self.lock:
+            self.eviction_stats["runs"] += 1
+            self.eviction_stats["expired"] += result["expired"]
+            self.eviction_stats["capacity"] += result["capacity"]
+        if result["expired"] or result["capacity"]:
+            print(f"缓存淘汰：过期 {result['expired']} 条，超出容量 {result['capacity']} 条")
+        return result
+
+    def pin_session(self, file_hash):
+        """固定文件的缓存条目，翻译期间不被淘汰（同时记为该文件最近一次出现）"""
+        with self.lock:
+            self.pinned.add(file_hash)
+            self._seen_sessions.add(file_hash)
+
+    def unpin_session(self, file_hash):
+        """取消固定文件的缓存条目"""
+        with self.lock:
+            self.pinned.discard(file_hash)
+
+    def gc_sessions(self, days=CACHE_CONFIG["SESSION_GC_DAYS"]):
+        """清理超过指定天数未再出现的文件的全部缓存（固定的会话除外）
+        :param days: 天数
+        :return: {"sessions": 清理的文件数, "entries": 删除的条目数}
+        """
+        self._flush()
+        self.loaded.wait()
+        with self.lock:
+            pinned = set(self.pinned)
+        result = self.storage.gc_sessions(days * 86400, pinned)
+        print(f"已清理 {result['sessions']} 个超过 {days} 天未翻译的文件，共 {result['entries']} 条缓存")
+        return result
+
+    def stats(self):
+        """导出缓存占用与淘汰统计
+        :return: {"entries", "bytes", "pending", "pinned", "runs", "expired", "capacity"}
+        """
+        self.opened.wait()
+        entries, size = self.storage.usage()
+        with self.lock:
+            return {"entries": entries, "bytes": size, "pending": len(self._pending),
+                    "pinned": len(self.pinned), **self.eviction_stats}
+
+    def close(self):
+        """同步写回剩余条目并关闭存储后端（进程退出时自动调用）
+        先等待后台写回线程退出，再在 _flush_lock 内写回并关闭，保证关闭时没有写回或淘汰在使用存储后端
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_event.set()
+        if self._flusher is not threading.current_thread():
+            self._flusher.join()
+        try:
+            self.opened.wait()
+            with self._flush_lock:
+                self._flush_locked()
+                self.storage.flush()
+                self.storage.close()
+        except Exception as e:
+            print(f"[ERROR] 关闭缓存失败: {str(e)}")
 
     def get_key(self, text, lang, style, file_hash=None):
         """生成唯一缓存键
@@ -92,86 +270,145 @@ class TranslationCache:
         """获取缓存内容
         功能流程：
         1. 计算缓存键
-        2. 查询缓存字典
+        2. 依次查询待写回表与存储后端（按主键索引）
         3. 触发缓存命中回调（用于GUI日志）
 
         :param log_callback: 日志回调函数，接收缓存命中消息
         :return: 存在则返回缓存值，否则返回None
         """
         key = self.get_key(text, lang, style, file_hash)
-        translation = self.cache.get(key)
+        translation = self._get_pending(key)
+        if translation is None:
+            self.opened.wait()
+            translation = self.storage.get(key)
+            if translation is None and not self.loaded.is_set():
+                # 未命中的键可能尚未从旧版缓存导入，等待导入完成后再查一次
+                self.loaded.wait()
+                translation = self.storage.get(key)
+            self._touch(key, translation)
         # 触发GUI日志回调
         if translation and log_callback:
             log_callback("💾 缓存命中，跳过翻译")
         return translation
 
+    async def aget(self, text, lang, style, file_hash=None, log_callback=None):
+        """在事件循环中获取缓存内容（与get相同的查询顺序与返回值）
+        待写回表在事件循环中直接查询；存储后端读取在线程中执行，
+        加载完成前的等待由同一事件循环内的全部查询共享一个等待线程
+        """
+        key = self.get_key(text, lang, style, file_hash)
+        translation = self._get_pending(key)
+        if translation is None:
+            await self._wait_event(self.opened)
+            translation = await asyncio.to_thread(self.storage.get, key)
+            if translation is None and not self.loaded.is_set():
+                await self._wait_event(self.loaded)
+                translation = await asyncio.to_thread(self.storage.get, key)
+            if translation is None:
+                # 读取期间相同分块可能刚翻译完成并写入待写回表
+                translation = self._get_pending(key)
+            else:
+                self._touch(key, translation)
+        if translation and log_callback:
+            log_callback("💾 缓存命中，跳过翻译")
+        return translation
+
+    def _get_pending(self, key):
+        """查询待写回表与正在写回的条目，不存在时返回None"""
+        with self.lock:
+            entry = self._pending.get(key) or self._flushing.get(key)
+        return entry[0] if entry else None
+
+    def _touch(self, key, translation):
+        """记录存储后端命中的键，随下次写回更新访问时间与命中次数"""
+        if translation is not None:
+            with self.lock:
+                self._touched.add(key)
+
+    async def _wait_event(self, event):
+        """在事件循环中等待加载事件，阻塞等待只在一个线程中执行"""
+        if event.is_set():
+            return
+        waiter = self._event_waiters.get(event)
+        if waiter is None or waiter.done() or waiter.get_loop() is not asyncio.get_running_loop():
+            waiter = self._event_waiters[event] = asyncio.ensure_future(asyncio.to_thread(event.wait))
+        # shield：单个查询被取消时不影响其他查询的等待
+        await asyncio.shield(waiter)
+
     def set(self, text, lang, style, translation, file_hash=None):
         """设置缓存内容
         功能流程：
         1. 计算缓存键
-        2. 更新缓存字典
+        2. 写入待写回表（由后台线程批量写入存储后端）
         3. 记录会话关联（如果提供文件哈希）
-        4. 触发持久化保存
 
         :param file_hash: 文件哈希值，用于会话关联（可选）
         """
         key = self.get_key(text, lang, style, file_hash)
-        # 使用线程锁保证写入安全
         with self.lock:
-            self.cache[key] = translation
+            self._pending[key] = (translation, file_hash)
+            pending_count = len(self._pending)
+        if pending_count >= self.flush_batch:
+            self._flush_event.set()
         # 记录会话关联关系
         if file_hash is not None:
             self.record_session(file_hash, key)
-        self.save_cache()  # 异步保存
 
     def record_session(self, file_hash, cache_key):
         """记录缓存与会话的关联关系
-        结构：session_map[file_hash] = [cache_key1, cache_key2...]
+        SQLite后端的关联随条目写入file_hash列；旧版JSON后端记录在 session_map[file_hash]（集合，O(1)去重）
         """
         with self.lock:
-            if file_hash not in self.session_map:
-                self.session_map[file_hash] = []
-            # 避免重复记录
-            if cache_key not in self.session_map[file_hash]:
-                self.session_map[file_hash].append(cache_key)
+            self._seen_sessions.add(file_hash)
+            if self.backend != SQLiteCacheStorage.name:
+                self.session_map.setdefault(file_hash, set()).add(cache_key)
 
     def purge_session_cache(self, file_hash):
         """清理指定会话的全部缓存
         操作流程：
-        1. 从session_map获取该会话所有缓存键
-        2. 批量删除cache中的对应条目
+        1. 删除待写回表中属于该会话的条目
+        2. 按文件哈希批量删除存储后端中的条目（旧版JSON后端按session_map中的缓存键删除）
         3. 删除session_map中的会话记录
-        4. 触发持久化保存
+        与后台写回互斥执行，避免正在写回的条目在删除后又被写入
+        :return: 删除的条目数
         """
-        with self.lock:
-            if file_hash in self.session_map:
-                # 批量删除缓存条目
-                for key in self.session_map[file_hash]:
-                    self.cache.pop(key, None)
-                # 删除会话记录
-                del self.session_map[file_hash]
-                self.save_cache()
+        self.loaded.wait()
+        with self._flush_lock:
+            with self.lock:
+                pending = [key for key, (_, owner) in self._pending.items() if owner == file_hash]
+                for key in pending:
+                    del self._pending[key]
+                keys = self.session_map.pop(file_hash, set())
+                self._seen_sessions.discard(file_hash)
+            removed = self.storage.delete_session(file_hash)
+            if keys:
+                self.storage.delete_many(keys)
+                removed = len(keys)
+        print(f"已清理会话缓存，共 {removed + len(pending)} 条")
+        return removed + len(pending)
 
     def clear_all_cache(self):
         """
         清空全部缓存数据
         功能描述：
-        1. 清空内存中的缓存数据（`self.cache` 和 `self.session_map`）
-        2. 清空持久化缓存文件，并将其保存为空的 JSON 文件
+        1. 清空会话映射 `self.session_map`、待写回条目与命中记录
+        2. 清空存储后端中的全部缓存条目
         3. 提供清空成功的确认信息或错误消息并抛出异常
 
         流程步骤：
         - 使用线程锁 `self.lock` 保证操作的原子性
-        - 调用 `clear()` 方法清空 `self.cache` 和 `self.session_map`
-        - 打开缓存文件 `self.cache_file`，清空内容并保存 `{}`（空字典）为 JSON 格式
+        - 调用 `clear()` 方法清空 `self.session_map`
+        - 调用存储后端的 `clear()` 删除全部缓存条目
         - 如操作成功，打印成功信息；如操作失败，捕获异常并打印错误消息，同时抛出异常
         """
-        with self.lock:
-            self.cache.clear()
+        self.loaded.wait()
+        with self._flush_lock, self.lock:
             self.session_map.clear()
+            self._pending.clear()
+            self._touched.clear()
+            self._seen_sessions.clear()
             try:
-                with open(self.cache_file, "w", encoding="utf-8") as f:
-                    json.dump({}, f, indent=2)
+                self.storage.clear()
                 print("成功清空所有缓存数据")
             except Exception as e:
                 print(f"[ERROR] 清空缓存失败: {str(e)}")
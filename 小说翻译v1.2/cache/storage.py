@@ -0,0 +1,370 @@
+# cache/storage.py
+"""
+缓存存储后端模块
+功能：为翻译缓存提供可替换的持久化存储，TranslationCache 只通过统一接口读写
+核心机制：
+- SQLiteCacheStorage：WAL模式的SQLite数据库，按缓存键主键与文件哈希索引查询，
+  单条写入为O(1)的upsert，事务提交保证崩溃时不会损坏已有数据；
+  记录条目大小、最近访问时间与命中次数，支持按TTL与条目数/字节数上限淘汰（LRU或LFU）；
+  file_hash列即持久化的缓存键→文件反向索引，sessions表记录每个文件最近一次出现的时间，
+  支持按文件批量清理与清理长期未出现的文件；
+  按键查询使用每个线程独立的只读连接，不与写回、导入争用写连接的锁
+- JsonCacheStorage：旧版整文件JSON存储，每次写入重写整个文件，保留用于兼容（不支持淘汰与会话索引）；
+  构造时即读入整个文件，打开完成前无法查询
+- import_json_cache：将旧版JSON缓存一次性导入到新的存储后端
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("CacheStorage")
+
+
+class SQLiteCacheStorage:
+    """SQLite（WAL）缓存存储
+
+    表结构：
+    - entries(key 主键, translation, file_hash 索引, updated, size 字节数, accessed 最近访问 索引, hits 命中次数)
+    - sessions(file_hash 主键, last_seen 最近出现时间)
+
+    连接：
+    - 写连接在写回、导入、后台加载线程间共享，由锁串行化访问
+    - get 使用每个线程独立的读连接（WAL模式下读不阻塞写），内存数据库无法共享，仍使用写连接
+    """
+
+    name = "sqlite"
+    # 后续版本新增的列及其定义、回填语句（打开旧数据库时自动补齐）
+    _MIGRATIONS = (
+        ("size", "INTEGER NOT NULL DEFAULT 0", "UPDATE entries SET size = length(CAST(translation AS BLOB))"),
+        ("accessed", "REAL NOT NULL DEFAULT 0", "UPDATE entries SET accessed = updated"),
+        ("hits", "INTEGER NOT NULL DEFAULT 0", None),
+    )
+    # 淘汰顺序：LRU按最近访问时间，LFU按命中次数（相同时按最近访问时间）
+    _EVICTION_ORDER = {"lru": "accessed", "lfu": "hits, accessed"}
+
+    def __init__(self, db_file):
+        """
+        :param db_file: 数据库文件路径（不存在时自动创建）
+        """
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._local = threading.local()  # 每个线程的读连接
+        self._readers = []  # 已打开的读连接，关闭时一并关闭
+        self._readers_lock = threading.Lock()  # 只保护读连接列表，创建读连接时不等待写连接的锁
+        self._closed = False
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " translation TEXT NOT NULL,"
+            " file_hash TEXT,"
+            " updated REAL NOT NULL)"
+        )
+        self._migrate()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_file_hash ON entries(file_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+        if not self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sessions'").fetchone():
+            self._conn.execute("CREATE TABLE sessions (file_hash TEXT PRIMARY KEY, last_seen REAL NOT NULL)")
+            # 由已有条目回填会话表
+            self._conn.execute("INSERT INTO sessions SELECT file_hash, MAX(accessed) FROM entries "
+                               "WHERE file_hash IS NOT NULL GROUP BY file_hash")
+        self._conn.commit()
+
+    def _migrate(self):
+        """为旧数据库补齐新增的列"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        for column, definition, backfill in self._MIGRATIONS:
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE entries ADD COLUMN {column} {definition}")
+                if backfill:
+                    self._conn.execute(backfill)
+
+    def _reader(self):
+        """当前线程的读连接（首次使用时创建）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            with self._readers_lock:
+                if self._closed:
+                    conn.close()
+                    raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+                self._readers.append(conn)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """按缓存键查询译文，不存在时返回None"""
+        sql = "SELECT translation FROM entries WHERE key = ?"
+        if self.db_file == ":memory:":
+            with self._lock:
+                row = self._conn.execute(sql, (key,)).fetchone()
+        else:
+            row = self._reader().execute(sql, (key,)).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, entries, overwrite=True):
+        """批量写入，在一个事务内提交
+        :param entries: [(缓存键, 译文, 文件哈希或None), ...]
+        :param overwrite: 已存在的键是否覆盖译文（导入旧版缓存时不覆盖较新的条目）
+        """
+        now = time.time()
+        insert = ("INSERT {} INTO entries (key, translation, file_hash, updated, size, accessed) "
+                  "VALUES (?, ?, ?, ?, ?, ?)")
+        if overwrite:
+            sql = (insert.format("") + " ON CONFLICT(key) DO UPDATE SET translation = excluded.translation, "
+                   "file_hash = COALESCE(excluded.file_hash, entries.file_hash), updated = excluded.updated, "
+                   "size = excluded.size, accessed = excluded.accessed")
+        else:
+            sql = insert.format("OR IGNORE")
+        rows = [(key, translation, file_hash, now, len(translation.encode("utf-8")), now)
+                for key, translation, file_hash in entries]
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+            self._touch_sessions({row[2] for row in rows if row[2] is not None}, now)
+
+    def touch_many(self, keys):
+        """记录一批缓存键被命中（更新最近访问时间与命中次数，用于LRU/LFU淘汰）"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE entries SET accessed = ?, hits = hits + 1 WHERE key = ?",
+                                   [(now, key) for key in keys])
+
+    def delete_many(self, keys):
+        """批量删除缓存键"""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def _touch_sessions(self, file_hashes, now):
+        """更新文件的最近出现时间（调用方持有锁并处于事务中）"""
+        self._conn.executemany(
+            "INSERT INTO sessions (file_hash, last_seen) VALUES (?, ?) "
+            "ON CONFLICT(file_hash) DO UPDATE SET last_seen = excluded.last_seen",
+            [(file_hash, now) for file_hash in file_hashes]
+        )
+
+    def touch_sessions(self, file_hashes):
+        """记录一批文件再次出现（开始翻译或写入缓存）"""
+        with self._lock, self._conn:
+            self._touch_sessions(file_hashes, time.time())
+
+    def delete_session(self, file_hash):
+        """按文件哈希批量删除缓存条目与会话记录（走file_hash索引）
+        :return: 删除的条目数
+        """
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM entries WHERE file_hash = ?", (file_hash,)).rowcount
+            self._conn.execute("DELETE FROM sessions WHERE file_hash = ?", (file_hash,))
+        return removed
+
+    def gc_sessions(self, max_age, pinned_hashes=()):
+        """清理超过 max_age 秒未出现的文件的全部缓存条目
+        :param max_age: 文件最近出现距今的秒数上限
+        :param pinned_hashes: 不清理的文件哈希集合
+        :return: {"sessions": 清理的文件数, "entries": 删除的条目数}
+        """
+        with self._lock, self._conn:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT file_hash FROM sessions WHERE last_seen < ?", (time.time() - max_age,)
+            ) if row[0] not in pinned_hashes]
+            removed = 0
+            for file_hash in stale:
+                removed += self._conn.execute("DELETE FROM entries WHERE file_hash = ?", (file_hash,)).rowcount
+            self._conn.executemany("DELETE FROM sessions WHERE file_hash = ?", [(h,) for h in stale])
+        return {"sessions": len(stale), "entries": removed}
+
+    def keys_for_session(self, file_hash):
+        """查询某个文件关联的全部缓存键（走file_hash索引）"""
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM entries WHERE file_hash = ?", (file_hash,)).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self):
+        """缓存条目数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def usage(self):
+        """缓存占用
+        :return: (条目数, 译文总字节数)
+        """
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return count, size
+
+    def evict(self, max_entries=None, max_bytes=None, ttl=None, pinned_hashes=(), policy="lru"):
+        """淘汰过期条目与超出容量的条目，属于固定会话（文件哈希）的条目不淘汰
+        :param max_entries: 条目数上限，None或0表示不限
+        :param max_bytes: 译文总字节数上限，None或0表示不限
+        :param ttl: 条目自最近访问起的存活秒数，None或0表示不过期
+        :param pinned_hashes: 固定不淘汰的文件哈希集合
+        :param policy: lru（最近最少访问）或 lfu（命中次数最少）
+        :return: {"expired": 过期淘汰数, "capacity": 超容量淘汰数}
+        """
+        pinned = list(pinned_hashes)
+        unpinned = f"(file_hash IS NULL OR file_hash NOT IN ({','.join('?' * len(pinned))}))" if pinned else "1"
+        result = {"expired": 0, "capacity": 0}
+        with self._lock, self._conn:
+            if ttl:
+                result["expired"] = self._conn.execute(
+                    f"DELETE FROM entries WHERE accessed < ? AND {unpinned}", [time.time() - ttl] + pinned
+                ).rowcount
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            excess_entries = count - max_entries if max_entries else 0
+            excess_bytes = size - max_bytes if max_bytes else 0
+            if excess_entries <= 0 and excess_bytes <= 0:
+                return result
+            victims = []
+            rows = self._conn.execute(
+                f"SELECT key, size FROM entries WHERE {unpinned} ORDER BY {self._EVICTION_ORDER[policy]}", pinned
+            )
+            for key, entry_size in rows:
+                if excess_entries <= 0 and excess_bytes <= 0:
+                    break
+                victims.append((key,))
+                excess_entries -= 1
+                excess_bytes -= entry_size
+            rows.close()
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+            result["capacity"] = len(victims)
+        return result
+
+    def clear(self):
+        """删除全部缓存条目与会话记录"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM sessions")
+
+    def flush(self):
+        """写入已在put_many中逐批提交，这里只做WAL检查点，让主数据库文件包含最新数据"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        with self._lock, self._readers_lock:
+            self._closed = True
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            self._conn.close()
+
+
+class JsonCacheStorage:
+    """旧版整文件JSON缓存存储（{缓存键: 译文}），每次写入重写整个文件
+    构造时读入整个文件，后台加载时需读完整个文件才能查询（SQLite后端打开即可查询）
+    """
+
+    name = "json"
+
+    def __init__(self, cache_file):
+        """
+        :param cache_file: JSON缓存文件路径
+        """
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._data = {}
+        if os.path.exists(cache_file):
+            with open(cache_file, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def put_many(self, entries, overwrite=True):
+        with self._lock:
+            for key, translation, _ in entries:
+                if overwrite or key not in self._data:
+                    self._data[key] = translation
+        self.flush()
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+        self.flush()
+
+    def keys_for_session(self, file_hash):
+        """JSON格式不保存文件哈希，无法按文件查询"""
+        return []
+
+    def touch_many(self, keys):
+        """JSON格式不记录访问信息"""
+
+    def touch_sessions(self, file_hashes):
+        """JSON格式不保存文件哈希"""
+
+    def delete_session(self, file_hash):
+        """JSON格式不保存文件哈希，需由调用方按缓存键删除"""
+        return 0
+
+    def gc_sessions(self, max_age, pinned_hashes=()):
+        """JSON格式不保存文件哈希，不支持按文件清理"""
+        return {"sessions": 0, "entries": 0}
+
+    def count(self):
+        return len(self._data)
+
+    def usage(self):
+        with self._lock:
+            return len(self._data), sum(len(value.encode("utf-8")) for value in self._data.values())
+
+    def evict(self, max_entries=None, max_bytes=None, ttl=None, pinned_hashes=(), policy="lru"):
+        """JSON格式不记录访问信息与文件哈希，不支持淘汰"""
+        return {"expired": 0, "capacity": 0}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        self.flush()
+
+    def items(self):
+        """导出全部 (缓存键, 译文)，供导入到其他后端"""
+        with self._lock:
+            return list(self._data.items())
+
+    def flush(self):
+        """重写整个JSON文件（先写临时文件再替换，避免中途退出导致文件损坏）"""
+        with self._lock:
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.cache_file)
+
+    def close(self):
+        pass
+
+
+def create_cache_storage(backend, cache_file):
+    """按名称创建缓存存储后端
+    :param backend: sqlite 或 json
+    :param cache_file: 存储文件路径
+    :return: 存储后端实例
+    :raises ValueError: 未知的后端名称
+    """
+    if backend == SQLiteCacheStorage.name:
+        return SQLiteCacheStorage(cache_file)
+    if backend == JsonCacheStorage.name:
+        return JsonCacheStorage(cache_file)
+    raise ValueError(f"未知的缓存后端: {backend}")
+
+
+def import_json_cache(json_file, storage, batch_size=5000):
+    """将旧版JSON缓存导入到存储后端（旧版格式不含文件哈希，导入的条目不关联会话；已存在的键不覆盖）
+    导入完成后将JSON文件重命名为 *.imported，避免重复导入
+    :param json_file: 旧版JSON缓存文件路径
+    :param storage: 目标存储后端
+    :param batch_size: 每个事务写入的条目数
+    :return: 导入的条目数
+    """
+    items = JsonCacheStorage(json_file).items()
+    for start in range(0, len(items), batch_size):
+        storage.put_many(((key, translation, None) for key, translation in items[start:start + batch_size]),
+                         overwrite=False)
+    os.replace(json_file, f"{json_file}.imported")
+    logger.info("[CacheStorage] 已导入旧版JSON缓存 | %s | 条目数: %d", json_file, len(items))
+    return len(items)
@@ -0,0 +1,63 @@
+# cache_tool.py
+"""翻译缓存维护入口
+
+用法：
+    python cache_tool.py stats                          # 查看缓存后端、条目数与占用
+    python cache_tool.py import translation_cache.json  # 将旧版JSON缓存导入到SQLite缓存
+    python cache_tool.py evict                          # 按CACHE_CONFIG的容量上限与TTL立即淘汰
+    python cache_tool.py gc --days 90                   # 清理超过90天未再翻译的文件的全部缓存
+"""
+import argparse
+import os
+import sys
+
+from config.settings import PATH_CONFIG, CACHE_CONFIG
+from cache.storage import create_cache_storage, import_json_cache
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="翻译缓存维护")
+    parser.add_argument("--cache-file", default=PATH_CONFIG["CACHE_FILE"], help="缓存文件")
+    parser.add_argument("--backend", default=CACHE_CONFIG["BACKEND"], help="存储后端（sqlite/json）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="查看缓存条目数与占用")
+    commands.add_parser("evict", help="按容量上限与TTL淘汰条目")
+    gc_parser = commands.add_parser("gc", help="清理长期未再翻译的文件的全部缓存")
+    gc_parser.add_argument("--days", type=float, default=CACHE_CONFIG["SESSION_GC_DAYS"],
+                           help="超过该天数未出现的文件将被清理")
+    import_parser = commands.add_parser("import", help="导入旧版JSON缓存（导入后原文件重命名为 *.imported）")
+    import_parser.add_argument("json_file", nargs="?", default=CACHE_CONFIG["LEGACY_JSON_FILE"],
+                               help="旧版JSON缓存文件")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    storage = create_cache_storage(args.backend, args.cache_file)
+    try:
+        if args.command == "import":
+            if not os.path.exists(args.json_file):
+                print(f"文件不存在: {args.json_file}")
+                return 1
+            count = import_json_cache(args.json_file, storage)
+            print(f"已导入 {count} 条缓存记录")
+        elif args.command == "evict":
+            ttl_days = CACHE_CONFIG["TTL_DAYS"]
+            result = storage.evict(CACHE_CONFIG["MAX_ENTRIES"], CACHE_CONFIG["MAX_BYTES"],
+                                   ttl_days * 86400 if ttl_days else None, policy=CACHE_CONFIG["EVICTION_POLICY"])
+            print(f"过期淘汰 {result['expired']} 条 | 超出容量淘汰 {result['capacity']} 条")
+        elif args.command == "gc":
+            result = storage.gc_sessions(args.days * 86400)
+            print(f"已清理 {result['sessions']} 个文件，共 {result['entries']} 条缓存")
+        entries, size = storage.usage()
+        print(f"缓存后端: {storage.name} | 文件: {args.cache_file} | 条目数: {entries} | "
+              f"占用: {size / 1024 / 1024:.1f} MB")
+    finally:
+        storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
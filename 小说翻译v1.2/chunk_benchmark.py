@@ -0,0 +1,55 @@
+# chunk_benchmark.py
+"""分块基准测试：对比旧版按字节分块与按Token预算分块的请求数
+
+用法：
+    python chunk_benchmark.py book1.txt book2.docx --lang zh
+"""
+import argparse
+import sys
+
+from config.settings import FILE_HANDLER_CONFIG
+from file_processor.file_handler import dynamic_split, extract_text_from_docx, extract_text_from_txt
+from file_processor.token_counter import ByteLengthCounter, get_token_counter
+
+# 旧版默认值：6000字节，ja/zh乘以1.5的缓冲系数
+LEGACY_MAX_BYTES = 6000
+
+
+def read_text(file_path):
+    """读取源文件全文（与交互翻译的读取方式一致）"""
+    if file_path.endswith('.docx'):
+        return extract_text_from_docx(file_path)
+    return ''.join(extract_text_from_txt(file_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比新旧分块方式的每本书请求数")
+    parser.add_argument("files", nargs="+", help="待测试的.txt/.docx文件")
+    parser.add_argument("--lang", default="zh", help="目标语言代码（zh/en/ja/ko）")
+    parser.add_argument("--max-tokens", type=int, default=FILE_HANDLER_CONFIG["CHUNKING"]["DEFAULT_MAX_TOKENS"],
+                        help="新版分块的Token预算")
+    args = parser.parse_args(argv)
+
+    factor = FILE_HANDLER_CONFIG["CHUNKING"]["ASIAN_BUFFER_FACTOR"] if args.lang in ['ja', 'zh'] else 1.0
+    legacy_counter = ByteLengthCounter(factor)
+    counter = get_token_counter()
+    print(f"计数方式: {counter.name} | 旧版: {LEGACY_MAX_BYTES}字节×{factor} | 新版: {args.max_tokens} Token")
+
+    total_before = total_after = 0
+    for file_path in args.files:
+        text = read_text(file_path)
+        before = dynamic_split(text, args.lang, LEGACY_MAX_BYTES, counter=legacy_counter)
+        after = dynamic_split(text, args.lang, args.max_tokens, counter=counter)
+        tokens = counter.count(text)
+        total_before += len(before)
+        total_after += len(after)
+        print(f"{file_path}: {len(text)} 字 / 约 {tokens} Token | 请求数 {len(before)} → {len(after)}"
+              f" | 平均每块 {tokens / max(len(before), 1):.0f} → {tokens / max(len(after), 1):.0f} Token")
+
+    if len(args.files) > 1:
+        print(f"合计请求数: {total_before} → {total_after}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
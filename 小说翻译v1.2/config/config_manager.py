@@ -3,7 +3,7 @@
 配置管理模块
 功能：负责API密钥的读取、验证和配置管理
 核心机制：
-- 提供安全的API密钥文件读取流程
+- 提供安全的API密钥文件读取流程，支持每行一个密钥的多密钥配置
 - 实现配置验证与错误处理机制
 - 集成GUI错误提示与日志记录
 - 支持异常情况下的友好用户反馈
@@ -21,18 +21,17 @@ from config.settings import PATH_CONFIG
 logger = logging.getLogger("ConfigManager")
 
 
-def read_api_key(file_path=None):
-    """从外部文件安全读取API密钥
+def read_api_keys(file_path=None):
+    """从外部文件安全读取API密钥列表
 
-    功能流程：
-    1. 检查文件是否存在
-    2. 验证文件内容非空
-    3. 返回去除首尾空格的密钥
+    文件格式：
+    - 每行一个密钥，空行与以#开头的注释行会被忽略
+    - 密钥后可用空白分隔附加整数权重（如 "sk-xxx 2"），缺省为1
 
     :param file_path: API密钥文件路径，默认为api_key.txt
-    :return: 字符串形式的API密钥
+    :return: 列表，元素为 (密钥, 权重) 元组
     :raises FileNotFoundError: 文件不存在时抛出
-    :raises ValueError: 文件内容为空时抛出
+    :raises ValueError: 文件中没有有效密钥或权重格式错误时抛出
     """
     # 使用配置文件中的默认路径
     if file_path is None:
@@ -42,13 +41,7 @@ def read_api_key(file_path=None):
     try:
         # 使用with语句确保文件正确关闭
         with open(file_path, 'r', encoding='utf-8') as f:
-            api_key = f.read().strip()
-            # 验证密钥非空
-            if not api_key:
-                logger.error("API密钥文件内容为空")
-                raise ValueError("API密钥文件内容为空")
-            logger.debug("成功读取到有效API密钥")
-            return api_key
+            lines = f.read().splitlines()
     except FileNotFoundError:
         # 文件不存在时的关键错误处理
         logger.critical(f"密钥文件不存在: {file_path}")
@@ -62,22 +55,57 @@ def read_api_key(file_path=None):
         logger.error("读取API密钥时发生未预期错误", exc_info=True)
         raise
 
+    keys = []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip().lstrip('\ufeff')
+        if not line or line.startswith('#'):
+            continue
+        parts = line.split()
+        weight = 1
+        if len(parts) > 1:
+            try:
+                weight = int(parts[1])
+            except ValueError:
+                logger.error(f"第{line_no}行的密钥权重无效: {parts[1]}")
+                raise ValueError(f"第{line_no}行的密钥权重必须为整数")
+        keys.append((parts[0], weight))
+
+    # 验证密钥非空
+    if not keys:
+        logger.error("API密钥文件内容为空")
+        raise ValueError("API密钥文件内容为空")
+    logger.debug(f"成功读取到{len(keys)}个API密钥")
+    return keys
+
+
+def read_api_key(file_path=None):
+    """从外部文件安全读取API密钥
+
+    兼容单密钥用法：文件包含多个密钥时返回第一个
+
+    :param file_path: API密钥文件路径，默认为api_key.txt
+    :return: 字符串形式的API密钥
+    :raises FileNotFoundError: 文件不存在时抛出
+    :raises ValueError: 文件内容为空时抛出
+    """
+    return read_api_keys(file_path)[0][0]
+
 
 def validate_config():
     """配置验证入口函数
 
     执行流程：
-    1. 调用read_api_key获取密钥
-    2. 成功返回密钥字符串
+    1. 调用read_api_keys获取密钥列表
+    2. 成功返回密钥列表
     3. 失败时弹出GUI错误提示并退出程序
 
-    :return: 验证成功的API密钥字符串
+    :return: 验证成功的密钥列表，元素为 (密钥, 权重) 元组
     """
     logger.info("启动配置验证流程")
     try:
-        key = read_api_key()
-        logger.info("配置验证成功，密钥有效")
-        return key
+        keys = read_api_keys()
+        logger.info(f"配置验证成功，共{len(keys)}个密钥")
+        return keys
     except FileNotFoundError as e:
         # 文件不存在时的用户提示
         error_msg = f"密钥文件不存在：{str(e)}"
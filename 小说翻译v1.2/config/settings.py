@@ -4,18 +4,154 @@ from docx.shared import Pt
 
 # 路径配置
 PATH_CONFIG = {
-    "CACHE_FILE": "translation_cache.json",  # 缓存文件
+    "CACHE_FILE": "translation_cache.db",   # 缓存文件（SQLite后端为.db，JSON后端为.json）
     "API_KEY_FILE": "api_key.txt",          # API密钥文件
     "LOG_DIR": "logs",                      # 日志目录
     "ICON_DIR": "icons"                     # 图标目录
 }
 
+# 翻译缓存配置
+CACHE_CONFIG = {
+    "BACKEND": "sqlite",                 # sqlite（WAL模式，单条写入）或 json（旧版整文件重写）
+    "LEGACY_JSON_FILE": "translation_cache.json",  # 旧版JSON缓存，SQLite后端启动时若存在则自动导入一次
+    "FLUSH_INTERVAL": 2.0,               # 后台写回间隔（秒），异常退出最多丢失该时间窗口内的新缓存
+    "FLUSH_BATCH": 200,                  # 待写回条目达到该数量时立即写回
+    "BACKGROUND_LOAD": True,             # 在后台线程打开缓存（含旧版JSON导入），界面启动不等待加载
+    "MAX_ENTRIES": 200000,               # 缓存条目数上限，None表示不限（仅SQLite后端）
+    "MAX_BYTES": 1024 * 1024 * 1024,     # 译文总字节数上限，None表示不限（仅SQLite后端）
+    "TTL_DAYS": 180,                     # 超过该天数未被访问的条目过期淘汰，None表示不过期
+    "EVICTION_POLICY": "lru",            # 超出容量时的淘汰策略：lru（最近最少访问）或 lfu（命中次数最少）
+    "EVICT_INTERVAL": 300,               # 后台淘汰检查间隔（秒），任务结束时也会检查一次
+    "SESSION_GC_DAYS": 90                # cache_tool.py gc 默认清理超过该天数未再翻译的文件的缓存
+}
+
 # API配置
 API_CONFIG = {
     "BASE_URL": "https://api.deepseek.com",
     "TIMEOUT": 180,
-    "MAX_RETRY": 3,                      # 最大重试次数
-    "RETRY_WAIT_BASE": 0.5                # 重试等待时间基数
+    "MAX_RETRY": 3,                      # 单个分块最大重试次数
+    "RETRY_WAIT_BASE": 0.5,               # 重试等待时间基数（秒，指数退避）
+    "RETRY_WAIT_MAX": 30,                 # 单次重试等待上限（秒）
+    "RETRY_BUDGET": 50,                   # 单个翻译任务内所有分块共享的重试次数上限
+    "MAX_CONCURRENCY": 4                  # 同时在途的翻译请求数（1 即顺序翻译）
+}
+
+# 自适应并发配置（AIMD：延迟正常时加性增长，429/5xx/超时时乘性下调）
+CONCURRENCY_CONFIG = {
+    "ADAPTIVE": True,                    # 关闭后固定使用 API_CONFIG["MAX_CONCURRENCY"]
+    "MIN_LIMIT": 1,                      # 并发下限
+    "MAX_LIMIT": 16,                     # 并发上限
+    "INCREASE_STEP": 1,                  # 每轮加性增长步长
+    "DECREASE_FACTOR": 0.5,              # 拥塞时乘性下调系数
+    "LATENCY_TOLERANCE": 1.5,            # 延迟不超过基线该倍数时视为正常
+    "BASELINE_WINDOW": 50,               # 基线延迟统计窗口（样本数）
+    "DECREASE_COOLDOWN": 5.0,            # 两次下调之间的最短间隔（秒）
+    "HISTORY_SIZE": 200                  # 保留的调整记录条数
+}
+
+# 速率限制配置（令牌桶，进程内所有引擎共享）
+RATE_LIMIT_CONFIG = {
+    "ENABLED": True,
+    "REQUESTS_PER_MINUTE": 600,          # 每分钟请求数上限（RPM）
+    "TOKENS_PER_MINUTE": 2000000,        # 每分钟Token数上限（TPM），多密钥时按每个密钥分别计算
+    "COMPLETION_RATIO": 1.0              # 预估输出Token数 = 输入Token数 × 该系数
+}
+
+# 输出预算配置（按输入Token数与语言对学习到的输出/输入比例计算每个请求的max_tokens）
+OUTPUT_BUDGET_CONFIG = {
+    "ENABLED": True,
+    "FILE": "output_ratio.json",         # 学习到的比例持久化文件
+    "DEFAULT_RATIO": 1.5,                # 语言对尚无样本时的输出/输入比例
+    "SAFETY_FACTOR": 1.5,                # max_tokens = 输入Token数 × 比例 × 该系数
+    "MIN_TOKENS": 512,                   # max_tokens下限（短分块、打包编号等的余量）
+    "MAX_TOKENS": 8192,                  # max_tokens上限（模型允许的最大输出）
+    "ALPHA": 0.2,                        # 指数滑动平均系数，越大越偏向近期样本
+    "MIN_SAMPLE_TOKENS": 100,            # 输入少于该Token数的请求不参与学习（短文本的比例波动大）
+    "SAVE_EVERY": 20,                    # 每更新该次数保存一次比例文件（任务结束时也会保存）
+    "MAX_CONTINUATIONS": 3,              # 译文因输出上限被截断时最多续写的次数，仍被截断则重新分块
+    "FIXED_MODELS": ["deepseek-reasoner"]  # 输出含思维链的模型，固定使用MAX_TOKENS且不参与学习
+}
+
+# 多密钥负载均衡配置（api_key.txt 每行一个密钥，可在密钥后附加权重，如 "sk-xxx 2"）
+KEY_POOL_CONFIG = {
+    "STRATEGY": "least_loaded",          # least_loaded（最少在途）或 weighted_round_robin（加权轮询）
+    "RATE_LIMIT_COOLDOWN": 30            # 密钥触发429且未返回Retry-After时的冷却时间（秒）
+}
+
+# 模型路由配置（模型选择为"自动"时按分块特征选择模型）
+ROUTER_CONFIG = {
+    "AUTO_MODEL": "自动",                # 界面中表示自动路由的模型选项
+    "FAST_MODEL": "DeepSeek-V3",         # 普通分块使用的快速模型
+    "REASONING_MODEL": "DeepSeek-R1",    # 高难度分块使用的推理模型
+    "SHORT_CHUNK": 300,                  # 少于该字数且只命中一个难度特征的分块仍使用快速模型
+    "DIALOGUE_RATIO": 0.6,               # 对话行占比达到该值视为密集对话
+    "POETRY_LINE_LENGTH": 20,            # 不超过该字数且无句末标点的行视为诗歌式短行
+    "POETRY_MIN_LINES": 4,               # 至少有该行数时才判断诗歌
+    "POETRY_RATIO": 0.6,                 # 诗歌式短行占比达到该值视为诗歌
+    "RUBY_DENSITY": 5,                   # 每千字注音数达到该值视为注音密集
+    "LATENCY_LIMIT": 90,                 # 推理模型近期延迟中位数超过该秒数时，仅多特征分块使用推理模型
+    "MIN_SAMPLES": 5,                    # 延迟样本少于该数量时不参考延迟
+    "WINDOW": 100                        # 延迟统计窗口大小
+}
+
+# 离线批量任务配置（batch_translate.py，适用于不要求实时性的整本翻译）
+BATCH_CONFIG = {
+    "BASE_URL": None,                    # 批量接口地址，None表示沿用API_CONFIG["BASE_URL"]
+    "ENDPOINT": "/v1/chat/completions",  # 批量请求对应的接口
+    "COMPLETION_WINDOW": "24h",          # 服务商完成批量任务的时间窗口
+    "POLL_INTERVAL": 60,                 # 轮询间隔（秒）
+    "STATE_FILE": "batch_job.json",      # 任务状态文件，程序重启后据此继续轮询
+    "FALLBACK_ONLINE": True              # 批量结果缺失的分块是否回退到在线翻译
+}
+
+# 多段打包配置（打包模式：按较小的上限切分为段，每段单独缓存，相邻的段以编号合并为一次请求）
+# 适合对话多、段落短的轻小说：段落边界由编号固定，修改原文后只需重新翻译变动的段
+# 大小按Token计（与 FILE_HANDLER_CONFIG["CHUNKING"]["DEFAULT_MAX_TOKENS"] 使用同一计数器）
+PACK_CONFIG = {
+    "ENABLED": False,
+    "SEGMENT_TOKENS": 400,               # 打包模式下的分段Token上限
+    "MAX_SEGMENTS": 8,                   # 单次打包的最大段数
+    "MAX_PACK_TOKENS": 3000              # 单次打包的最大总Token数
+}
+
+# 费用台账配置（价格单位：每百万Token，请按服务商当前价格调整）
+LEDGER_CONFIG = {
+    "FILE": "cost_ledger.jsonl",         # 台账文件，每个请求一行
+    "CURRENCY": "CNY",
+    "JOB_BUDGET": None,                  # 默认任务预算上限，None表示不限（界面中填写的预算优先）
+    "PRICES": {
+        "deepseek-chat": {"input_hit": 0.5, "input_miss": 2.0, "output": 8.0},
+        "deepseek-reasoner": {"input_hit": 1.0, "input_miss": 4.0, "output": 16.0}
+    }
+}
+
+# 对冲请求配置（长尾分块超过延迟分位数时发送重复请求，取先返回者）
+HEDGE_CONFIG = {
+    "ENABLED": False,
+    "PERCENTILE": 0.95,                  # 触发对冲的延迟分位数
+    "MIN_SAMPLES": 20,                   # 样本数不足时不对冲
+    "MIN_DELAY": 5.0,                    # 对冲等待时间下限（秒）
+    "MAX_HEDGE_RATIO": 0.1,              # 对冲请求数占主请求数的比例上限
+    "HEDGE_MODEL": "DeepSeek-V3",        # 对冲请求使用的模型，None表示沿用原模型
+    "WINDOW": 200                        # 延迟统计窗口（样本数）
+}
+
+# 流式输出配置
+STREAM_CONFIG = {
+    "ENABLED": True,                     # 使用 stream=True 增量接收译文
+    "CALLBACK_INTERVAL": 0.2,            # 部分结果回调的最小间隔（秒）
+    "CONNECT_TIMEOUT": 10,               # 建立连接超时（秒）
+    "FIRST_TOKEN_TIMEOUT": 60,           # 首Token超时（秒），推理模型的思考内容也算输出
+    "IDLE_TIMEOUT": 20                   # 两次输出之间的最长间隔（秒）
+}
+
+# HTTP传输层配置
+HTTP_CONFIG = {
+    "HTTP2": True,                       # 需要安装h2（pip install httpx[http2]），未安装时自动回退HTTP/1.1
+    "KEEPALIVE_EXPIRY": 60,              # 空闲长连接保留时间（秒）
+    "POOL_HEADROOM": 2,                  # 连接池在最大并发之外预留的连接数（对冲、预热）
+    "WARMUP": True,                      # 启动后在后台预热连接
+    "WARMUP_CONNECTIONS": 2              # 预热的连接数
 }
 
 # GUI配置
@@ -87,6 +223,15 @@ PROMPT_CONFIG = {
         "standard": "",
         "custom": ""
     },
+    "PACK_PROMPT": (
+        "以下文本由多个以【#编号】标记的段落组成，请逐段翻译，"
+        "每段译文前原样保留对应的【#编号】标记并单独占一行，不要合并、拆分或遗漏段落。\n"
+    ),
+    "CONTINUE_PROMPT": (
+        "上面的译文因长度限制被截断。请从中断处直接继续输出剩余译文，"
+        "不要重复已输出的内容，不要添加任何说明。"
+    ),
+    "GLOSSARY": {},                      # 术语表 {原文: 译文}，放入固定的system提示词中
     "LANG_SPECIFIC_PROMPT": {
         "ja": (
             "日语专项要求：\n"
@@ -111,11 +256,20 @@ PROMPT_CONFIG = {
     }
 }
 
+# Token计数配置（用于分块与限速）
+TOKENIZER_CONFIG = {
+    "COUNTER": "estimate",               # estimate（按字符类别估算）或 tokenizer（离线分词器，需安装tokenizers）
+    "TOKENIZER_FILE": "tokenizer/tokenizer.json",  # DeepSeek兼容的分词器文件
+    "CJK_RATIO": 0.6,                    # 估算系数：每个中日韩字符的Token数
+    "OTHER_RATIO": 0.3                   # 估算系数：每个其他字符的Token数
+}
+
 # 文件处理配置
 FILE_HANDLER_CONFIG = {
     "CHUNKING": {
-        "DEFAULT_MAX_TOKENS": 6000,       # 默认分块大小
-        "ASIAN_BUFFER_FACTOR": 1.5,       # 亚洲语言缓冲系数
+        "DEFAULT_MAX_TOKENS": 3000,       # 默认分块大小（Token数，按TOKENIZER_CONFIG计数）
+        "FALLBACK_MAX_TOKENS": 1000,      # 分块降级时子块的大小（Token数）
+        "ASIAN_BUFFER_FACTOR": 1.5,       # 亚洲语言缓冲系数（旧版按字节分块使用，仅用于基准对比）
         "LANG_CONFIG": {                  # 语言特定配置
             "zh": {"sentence_end": r"(?<=[。！？…!?])", "connectors": []},
             "en": {"sentence_end": r"(?<=[.!?…])", "connectors": ["However", "Moreover"]},
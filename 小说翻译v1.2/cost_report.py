@@ -0,0 +1,39 @@
+# cost_report.py
+"""费用台账查询入口
+
+用法：
+    python cost_report.py                 # 全部记录汇总
+    python cost_report.py --job 第3卷      # 源文件名包含"第3卷"的任务
+    python cost_report.py --run 1a2b3c4d5e6f
+    python cost_report.py --days 7        # 最近7天
+"""
+import argparse
+import sys
+import time
+
+from config.settings import LEDGER_CONFIG
+from translation.cost_ledger import CostLedger
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查询翻译费用台账")
+    parser.add_argument("--job", help="任务名（源文件名）关键字")
+    parser.add_argument("--run", help="运行ID")
+    parser.add_argument("--days", type=float, help="仅统计最近N天")
+    parser.add_argument("--file", default=LEDGER_CONFIG["FILE"], help="台账文件")
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.days * 86400 if args.days else None
+    totals = CostLedger(args.file).query(job=args.job, run_id=args.run, since=since)
+    currency = LEDGER_CONFIG["CURRENCY"]
+    print(f"请求数: {totals['requests']} | 运行次数: {len(totals['runs'])}")
+    print(f"输入Token: {totals['prompt_tokens']}（缓存命中 {totals['cache_hit_tokens']}）"
+          f" | 输出Token: {totals['completion_tokens']}")
+    print(f"费用合计: {totals['cost']:.4f} {currency}")
+    for model, cost in sorted(totals["models"].items()):
+        print(f"  {model}: {cost:.4f} {currency}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
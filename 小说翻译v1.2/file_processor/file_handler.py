@@ -22,6 +22,7 @@ from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 
 # 导入配置文件
 from config.settings import FILE_HANDLER_CONFIG
+from file_processor.token_counter import get_token_counter
 
 # 初始化模块级日志记录器
 logger = logging.getLogger("FileHandler")
@@ -51,22 +52,25 @@ def get_file_hash(file_path):
         raise
 
 
-def dynamic_split(text, target_lang, max_tokens=FILE_HANDLER_CONFIG["CHUNKING"]["DEFAULT_MAX_TOKENS"]):
+def dynamic_split(text, target_lang, max_tokens=FILE_HANDLER_CONFIG["CHUNKING"]["DEFAULT_MAX_TOKENS"], counter=None):
     """
     增强型动态分块算法
 
     核心特性：
     - 语言自适应的分句规则
     - 连接词感知的分块保护
-    - 亚洲语言缓冲系数调节
+    - 按真实Token预算分块（计数器可替换）
     - 上下文连贯性保持
 
     :param text: 原始文本内容（段落列表）
     :param target_lang: 目标语言代码（zh/en/ja/ko）
-    :param max_tokens: 单块最大字节数（默认从配置文件中读取）
+    :param max_tokens: 单块最大Token数（默认从配置文件中读取）
+    :param counter: Token计数器，默认使用 token_counter.get_token_counter()
     :return: 分块后的文本列表
     """
-    logger.info(f"[智能分块] 启动分块处理 | 目标语言: {target_lang} | 最大长度: {max_tokens}字节")
+    counter = counter or get_token_counter()
+    logger.info(f"[智能分块] 启动分块处理 | 目标语言: {target_lang} | 最大长度: {max_tokens} Token"
+                f" | 计数方式: {counter.name}")
 
     # 新增：统一输入为段落列表
     if isinstance(text, str):
@@ -83,8 +87,6 @@ def dynamic_split(text, target_lang, max_tokens=FILE_HANDLER_CONFIG["CHUNKING"][
     chunks = []
     current_chunk = []
     current_length = 0
-    # 从配置文件中获取亚洲语言缓冲系数
-    factor = FILE_HANDLER_CONFIG["CHUNKING"]["ASIAN_BUFFER_FACTOR"] if target_lang in ['ja', 'zh'] else 1.0
 
     # 段落级分块处理
     for para in paragraphs:
@@ -92,15 +94,15 @@ def dynamic_split(text, target_lang, max_tokens=FILE_HANDLER_CONFIG["CHUNKING"][
         if not para:
             continue
 
-        # 计算当前段落字节长度
-        para_length = len(para.encode('utf-8'))
+        # 计算当前段落Token数
+        para_length = counter.count(para)
 
         # 段落超过最大长度时强制分割
-        if para_length > max_tokens * factor:
+        if para_length > max_tokens:
             sub_paras = _split_oversized_para(para, target_lang, max_tokens, config)
             for sub in sub_paras:
-                sub_length = len(sub.encode('utf-8'))
-                if current_length + sub_length > max_tokens * factor:
+                sub_length = counter.count(sub)
+                if current_length + sub_length > max_tokens:
                     if current_chunk:
                         chunks.append(''.join(current_chunk))
                         current_chunk = []
@@ -108,7 +110,7 @@ def dynamic_split(text, target_lang, max_tokens=FILE_HANDLER_CONFIG["CHUNKING"][
                 current_chunk.append(sub)
                 current_length += sub_length
         else:
-            if current_length + para_length > max_tokens * factor:
+            if current_length + para_length > max_tokens:
                 if current_chunk:
                     chunks.append(''.join(current_chunk))
                     current_chunk = []
@@ -261,6 +263,55 @@ def extract_text_from_txt(txt_path):
         raise
 
 
+def split_file(file_path, target_lang, max_tokens=FILE_HANDLER_CONFIG["CHUNKING"]["DEFAULT_MAX_TOKENS"]):
+    """读取DOCX/TXT文件并分块（交互翻译与批量任务共用，保证分块与缓存键一致）
+
+    :param file_path: 源文件路径
+    :param target_lang: 目标语言代码（zh/en/ja/ko）
+    :param max_tokens: 单块最大Token数
+    :return: 分块后的文本列表
+    :raises ValueError: 文件内容为空或分块失败时抛出
+    """
+    # 文件解析优化点：避免二次读取文件导致的编码问题
+    if file_path.endswith('.docx'):
+        text = extract_text_from_docx(file_path)
+    else:
+        # 将段落列表合并为完整文本（保留原始换行符）
+        text = ''.join(extract_text_from_txt(file_path))
+
+    chunks = dynamic_split(text, target_lang, max_tokens=max_tokens)
+    if not chunks:
+        raise ValueError("文件内容为空或分块失败")
+    return chunks
+
+
+def group_for_packing(chunks, max_segments, max_pack_tokens, counter=None):
+    """将相邻的分块分组，供多段打包翻译使用
+    分块大小由切分时决定（打包模式下为 PACK_CONFIG["SEGMENT_TOKENS"]），
+    单独超过 max_pack_tokens 的分块自成一组
+
+    :param chunks: 分块列表
+    :param max_segments: 每组最大分块数
+    :param max_pack_tokens: 每组最大总Token数
+    :param counter: Token计数器，默认使用 token_counter.get_token_counter()
+    :return: 分组列表，元素为分块索引列表（长度为1表示单独请求）
+    """
+    counter = counter or get_token_counter()
+    groups = []
+    current, current_tokens = [], 0
+    for index, chunk in enumerate(chunks):
+        size = counter.count(chunk)
+        if current and (len(current) >= max_segments or current_tokens + size > max_pack_tokens):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += size
+    if current:
+        groups.append(current)
+    logger.debug(f"[打包分组] 分块数: {len(chunks)} → 请求数: {len(groups)}")
+    return groups
+
+
 def save_as_word(content, output_path):
     """
     生成符合排版规范的Word文档
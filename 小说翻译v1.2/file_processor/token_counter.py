@@ -0,0 +1,101 @@
+# file_processor/token_counter.py
+"""
+Token计数模块
+功能：为分块、限速等需要Token数的场景提供可替换的计数器
+核心机制：
+- 默认使用按字符类别校准的估算器（中日韩字符约0.6 Token，其他字符约0.3 Token）
+- 可选加载离线的DeepSeek兼容分词器文件（需安装tokenizers），得到精确Token数
+- 分词器不可用时自动回退到估算器
+- 保留旧版按UTF-8字节计量的计数器，用于基准对比
+"""
+
+import logging
+import os
+import re
+
+from config.settings import TOKENIZER_CONFIG
+
+logger = logging.getLogger("TokenCounter")
+
+# 中日韩字符（含假名、谚文）
+_CJK_PATTERN = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+
+class EstimateTokenCounter:
+    """按字符类别校准的Token估算器
+    参考DeepSeek官方换算：1个中文字符约0.6个Token，1个英文字符约0.3个Token
+    """
+
+    name = "estimate"
+
+    def __init__(self, cjk_ratio=TOKENIZER_CONFIG["CJK_RATIO"], other_ratio=TOKENIZER_CONFIG["OTHER_RATIO"]):
+        self.cjk_ratio = cjk_ratio
+        self.other_ratio = other_ratio
+
+    def count(self, text):
+        """估算文本的Token数（至少为1）"""
+        cjk_count = len(_CJK_PATTERN.findall(text))
+        other_count = len(text) - cjk_count
+        return max(1, int(cjk_count * self.cjk_ratio + other_count * self.other_ratio))
+
+
+class TokenizerCounter:
+    """基于离线分词器文件的精确计数器（tokenizer.json，需安装tokenizers）"""
+
+    name = "tokenizer"
+
+    def __init__(self, tokenizer_file):
+        from tokenizers import Tokenizer  # 可选依赖，仅在启用时导入
+        self.tokenizer = Tokenizer.from_file(tokenizer_file)
+
+    def count(self, text):
+        """统计文本的Token数（不含特殊Token）"""
+        return max(1, len(self.tokenizer.encode(text, add_special_tokens=False).ids))
+
+
+class ByteLengthCounter:
+    """旧版分块的计量方式：UTF-8字节数除以语言缓冲系数，仅用于基准对比"""
+
+    name = "bytes"
+
+    def __init__(self, factor=1.0):
+        self.factor = factor
+
+    def count(self, text):
+        return len(text.encode('utf-8')) / self.factor
+
+
+_counter = None
+
+
+def get_token_counter():
+    """获取进程内共享的Token计数器（按 TOKENIZER_CONFIG 选择，首次调用时创建）
+    :return: 具有 count(text) 方法的计数器
+    """
+    global _counter
+    if _counter is None:
+        _counter = _create_counter()
+    return _counter
+
+
+def _create_counter():
+    """按配置创建计数器，分词器不可用时回退到估算器"""
+    if TOKENIZER_CONFIG["COUNTER"] == "tokenizer":
+        tokenizer_file = TOKENIZER_CONFIG["TOKENIZER_FILE"]
+        if not os.path.exists(tokenizer_file):
+            logger.warning("[TokenCounter] 分词器文件不存在: %s，回退为估算计数", tokenizer_file)
+        else:
+            try:
+                counter = TokenizerCounter(tokenizer_file)
+                logger.info("[TokenCounter] 使用分词器精确计数 | %s", tokenizer_file)
+                return counter
+            except ImportError:
+                logger.warning("[TokenCounter] 未安装tokenizers，回退为估算计数（可执行 pip install tokenizers）")
+            except Exception as e:
+                logger.warning("[TokenCounter] 分词器加载失败，回退为估算计数 | %s", e)
+    return EstimateTokenCounter()
+
+
+def count_tokens(text):
+    """使用共享计数器统计文本的Token数"""
+    return get_token_counter().count(text)
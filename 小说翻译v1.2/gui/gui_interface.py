@@ -26,7 +26,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QObject, QThread
 from PyQt6.QtGui import QFont, QIcon, QColor, QPalette, QDoubleValidator
 
 from translation.translation_engine import cache
-from config.settings import GUI_CONFIG  # 新增：从配置文件中导入GUI和路径配置
+from config.settings import GUI_CONFIG, ROUTER_CONFIG  # 新增：从配置文件中导入GUI和路径配置
 from gui.gui_config import (  # 修改：从样式配置模块导入配置项
     LOG_TYPES, STYLES, LAYOUT, ICON_DIR
 )
@@ -41,11 +41,13 @@ class GuiSignals(QObject):
     - progress_signal(int): 进度更新信号（百分比）
     - error_signal(str): 错误通知信号（错误信息）
     - pause_signal(bool): 暂停状态信号（True/False）
+    - stream_signal(int, str): 流式译文预览信号（分块序号，累积译文）
     """
     log_signal = pyqtSignal(str, str)  # 参数：日志内容，日志类型（info/cache/error等）
     progress_signal = pyqtSignal(int)
     error_signal = pyqtSignal(str)
     pause_signal = pyqtSignal(bool)
+    stream_signal = pyqtSignal(int, str)
 
 class TranslationWorker(QObject):
     """翻译工作线程控制器
@@ -87,35 +89,40 @@ class TranslationWorker(QObject):
         finally:
             self.finished.emit()
 
-    def pause(self):
+    def pause(self, reason="用户触发暂停操作"):
         """暂停任务执行
         操作流程：
         1. 设置暂停标识
         2. 发射暂停信号
         3. 记录日志
+        :param reason: 暂停原因（用户操作或引擎自动暂停，如预计超出费用预算）
         """
         with self._pause_cond:
             self._is_paused = True
             self.paused.emit()
-            self.logger.info("[Worker] 用户触发暂停操作")
+            self.logger.info("[Worker] %s", reason)
             self.log.emit("⏸️ 翻译线程进入暂停状态", "info")
-            self.log.emit("=== 用户触发暂停操作 ===", "info")
+            self.log.emit(f"=== {reason} ===", "info")
 
     def resume(self):
         """恢复任务执行
         操作流程：
         1. 清除暂停标识
-        2. 唤醒等待线程
+        2. 唤醒全部等待线程（并发翻译时可能有多个分块线程在等待）
         3. 发射恢复信号
         """
         with self._pause_cond:
             self._is_paused = False
-            self._pause_cond.notify()
+            self._pause_cond.notify_all()
             self.resumed.emit()
             self.logger.info("[Worker] 用户触发继续操作")
             self.log.emit("▶️ 翻译线程恢复运行", "info")
             self.log.emit("=== 用户触发继续操作 ===", "info")
 
+    def is_paused(self):
+        """当前是否处于暂停状态（供翻译引擎在事件循环中无阻塞地检查）"""
+        return self._is_paused
+
     def wait_if_paused(self):
         """暂停状态检查与等待
         阻塞逻辑：当暂停标识为True时，线程进入等待状态
@@ -223,8 +230,9 @@ class TranslationGUI(QMainWindow):
         # 下拉选择组件
         self.lang_combo = self.create_combo(['中文', '英文', '日语', '韩语'])
         self.style_combo = self.create_combo(['标准', '日式轻小说', '正式', '通用'])  # 新增"通用"风格
-        self.model_combo = self.create_combo(['DeepSeek-V3', 'DeepSeek-R1'])
+        self.model_combo = self.create_combo(['DeepSeek-V3', 'DeepSeek-R1', ROUTER_CONFIG["AUTO_MODEL"]])
         self.temp_input = self.create_input("1.3", input_type="number")
+        self.budget_input = self.create_input(placeholder="留空表示不限")
 
         # 构建表单布局
         path_hbox = QHBoxLayout()
@@ -237,6 +245,7 @@ class TranslationGUI(QMainWindow):
         output_form.addRow(self.create_label("翻译风格:"), self.style_combo)
         output_form.addRow(self.create_label("模型选择:"), self.model_combo)
         output_form.addRow(self.create_label("温度值 (0-2):"), self.temp_input)
+        output_form.addRow(self.create_label("费用预算:"), self.budget_input)
         output_group.setLayout(output_form)
 
         left_panel.addWidget(file_group)
@@ -321,8 +330,19 @@ class TranslationGUI(QMainWindow):
         log_layout.addWidget(self.log_area)
         log_group.setLayout(log_layout)
 
+        # 流式译文预览面板
+        preview_group = self.create_group("实时预览", COLORS["accent"])
+        preview_layout = QVBoxLayout()
+        self.preview_area = QTextEdit()
+        self.preview_area.setReadOnly(True)
+        self.preview_area.setFont(QFont("Consolas", 10))
+        self.preview_area.setStyleSheet(log_style)
+        preview_layout.addWidget(self.preview_area)
+        preview_group.setLayout(preview_layout)
+
         right_panel.addWidget(control_group)
-        right_panel.addWidget(log_group)
+        right_panel.addWidget(log_group, 3)
+        right_panel.addWidget(preview_group, 2)
 
         # 组合主布局
         main_layout.addLayout(left_panel, 40)  # 左侧占比40%
@@ -338,6 +358,7 @@ class TranslationGUI(QMainWindow):
         self.signals.log_signal.connect(self.append_log)
         self.signals.progress_signal.connect(self.update_progress)
         self.signals.error_signal.connect(self.show_error)
+        self.signals.stream_signal.connect(self.update_preview)
         self.start_btn.clicked.connect(self.start_translation)
         self.pause_btn.clicked.connect(self.toggle_pause)
         self.clear_cache_btn.clicked.connect(self.clear_cache)
@@ -498,6 +519,16 @@ class TranslationGUI(QMainWindow):
         """
         self.progress_bar.setValue(value)
 
+    def update_preview(self, index, text):
+        """更新流式译文预览
+        功能：显示最近一次收到部分结果的分块译文
+
+        :param index: 分块序号（从0开始）
+        :param text: 截至目前的累积译文
+        """
+        self.preview_area.setPlainText(f"[第 {index + 1} 块]\n{text}")
+        self.preview_area.verticalScrollBar().setValue(self.preview_area.verticalScrollBar().maximum())
+
     def show_error(self, message):
         """显示错误信息
         功能：弹出一个错误提示框，显示错误消息
@@ -513,7 +544,7 @@ class TranslationGUI(QMainWindow):
         功能：控制翻译任务的暂停和恢复
         """
         if self.worker:
-            if self.worker._is_paused:
+            if self.worker.is_paused():
                 # 恢复翻译任务
                 self.worker.resume()
                 self.pause_btn.setText("暂停")
@@ -526,6 +557,12 @@ class TranslationGUI(QMainWindow):
                 self.pause_btn.setIcon(QIcon(str(ICON_DIR / "play.svg")))  # 使用新的图标路径配置
                 self.signals.log_signal.emit("⏸️ 翻译已暂停", "info")
 
+    def on_worker_paused(self):
+        """任务暂停时同步按钮状态（用户暂停或引擎因超出预算自动暂停）"""
+        self.pause_btn.setEnabled(True)
+        self.pause_btn.setText("继续")
+        self.pause_btn.setIcon(QIcon(str(ICON_DIR / "play.svg")))
+
     def start_translation(self):
         """触发翻译流程
         功能：启动翻译任务，初始化工作线程并连接信号槽
@@ -538,7 +575,8 @@ class TranslationGUI(QMainWindow):
             '-LANG-': self.lang_combo.currentText(),
             '-STYLE-': self.style_combo.currentText(),
             '-TEMP-': self.temp_input.text(),
-            '-MODEL-': self.model_combo.currentText()
+            '-MODEL-': self.model_combo.currentText(),
+            '-BUDGET-': self.budget_input.text()
         }
 
         # 初始化工作线程
@@ -556,7 +594,7 @@ class TranslationGUI(QMainWindow):
         self.thread.finished.connect(self.thread.deleteLater)  # 线程退出后清理线程对象
         self.worker.progress.connect(self.update_progress)  # 进度更新信号
         self.worker.error.connect(self.show_error)  # 错误信号
-        self.worker.paused.connect(lambda: self.pause_btn.setEnabled(True))  # 暂停状态信号
+        self.worker.paused.connect(self.on_worker_paused)  # 暂停状态信号（含超出预算时的自动暂停）
         self.worker.resumed.connect(lambda: self.pause_btn.setEnabled(True))  # 恢复状态信号
 
         # 更新按钮状态
@@ -3,6 +3,8 @@
 import sys
 import logging
 import os
+import time
+from concurrent.futures import as_completed
 from datetime import datetime
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import QApplication
@@ -15,12 +17,15 @@ from file_processor.file_handler import (
     get_file_hash,
     extract_text_from_docx,
     save_as_word,
-    dynamic_split, save_as_txt, extract_text_from_txt
+    split_file, group_for_packing, save_as_txt, extract_text_from_txt
 )
 from config.settings import (
     PATH_CONFIG,
+    API_CONFIG,
+    HTTP_CONFIG,
     GUI_CONFIG,
-    FILE_HANDLER_CONFIG
+    PACK_CONFIG,
+    LEDGER_CONFIG
 )
 
 
@@ -71,6 +76,9 @@ class Application:
         """初始化核心组件"""
         self.engine = TranslationEngine(self.api_key)
         self.engine.gui = self.gui
+        if HTTP_CONFIG["WARMUP"]:
+            # 用户选择文件期间在后台完成建连
+            self.engine.warm_up()
         self.logger.debug("[Main] 翻译引擎初始化完成")
 
     def _init_ui(self):
@@ -98,6 +106,13 @@ class Application:
         except ValueError:
             self.logger.error("无效的温度值输入")
             raise
+        if values.get('-BUDGET-'):
+            try:
+                if float(values['-BUDGET-']) <= 0:
+                    raise ValueError("费用预算必须大于0")
+            except ValueError:
+                self.logger.error("无效的费用预算输入")
+                raise
 
     def process_document(self, values, worker):
         """文档处理主流程"""
@@ -124,6 +139,7 @@ class Application:
 
             # 最终状态
             cache.save_cache(force=True)
+            self.engine.output_budget.save()
             self._update_ui_success(output_path)
 
         except Exception as e:
@@ -146,54 +162,223 @@ class Application:
 
     def _execute_translation(self, source_file, target_lang, style, values, file_hash, worker):
         """执行分块翻译"""
-        # 文件解析优化点：避免二次读取文件导致的编码问题
-        if source_file.endswith('.docx'):
-            text = extract_text_from_docx(source_file)
+        if PACK_CONFIG["ENABLED"]:
+            # 打包模式：按较小的上限切分为段（每段单独缓存），相邻的段打包为一次请求
+            chunks = split_file(source_file, target_lang, PACK_CONFIG["SEGMENT_TOKENS"])
+            groups = group_for_packing(chunks, PACK_CONFIG["MAX_SEGMENTS"], PACK_CONFIG["MAX_PACK_TOKENS"])
         else:
-            paragraphs = extract_text_from_txt(source_file)
-            # 将段落列表合并为完整文本（保留原始换行符）
-            text = ''.join(paragraphs)
-
-        chunks = dynamic_split(
-            text,
-            target_lang,
-            max_tokens=FILE_HANDLER_CONFIG["CHUNKING"]["DEFAULT_MAX_TOKENS"]
-        )
-
-        if not chunks:
-            raise ValueError("文件内容为空或分块失败")
+            chunks = split_file(source_file, target_lang)
+            groups = [[index] for index in range(len(chunks))]
 
-        self.gui.signals.log_signal.emit(f"已分块: {len(chunks)} 个文本块", "info")
-        translated_chunks = []
-        previous_chunk = ""
+        self.gui.signals.log_signal.emit(f"已分块: {len(chunks)} 个文本块（{len(groups)} 个请求）", "info")
+        translated_chunks = [None] * len(chunks)
         current_model = values['-MODEL-']
+        self.engine.worker = worker
+        budget = float(values['-BUDGET-']) if values.get('-BUDGET-') else LEDGER_CONFIG["JOB_BUDGET"]
+        self.engine.begin_job(os.path.basename(source_file), budget)
+        cache.pin_session(file_hash)
+        run_started = time.time()
+        self.logger.info("[Main] 启动并发翻译 | 分块数: %d | 并发数: %d",
+                         len(chunks), API_CONFIG["MAX_CONCURRENCY"])
+
+        # 上下文只依赖前一块的原文，因此所有分块可以在提交前确定上下文；
+        # 分块以协程形式提交到引擎的事件循环，由引擎的自适应并发控制器（AIMD）限制在途请求数
+        futures = {}
+        for group in groups:
+            index = group[0]
+            previous_chunk = chunks[index - 1] if index > 0 else ""
+            log_callback = lambda msg: self.gui.signals.log_signal.emit(msg, "retry")
+            if len(group) > 1:
+                future = self.engine.submit_translate_packed(
+                    [chunks[i] for i in group], values['-LANG-'], style, values['-TEMP-'],
+                    current_model, file_hash, previous_chunk, log_callback=log_callback
+                )
+            else:
+                future = self.engine.submit_translate(
+                    chunks[index],
+                    values['-LANG-'],
+                    style,
+                    values['-TEMP-'],
+                    current_model,
+                    file_hash,
+                    previous_chunk,
+                    log_callback=log_callback,
+                    stream_callback=lambda partial, i=index: self.gui.signals.stream_signal.emit(i, partial)
+                )
+            futures[future] = group
 
-        for i, chunk in enumerate(chunks, 1):
-            worker.wait_if_paused()
-            QApplication.processEvents()
-
-            translated, model_used = self.engine.safe_translate(
-                chunk,
-                values['-LANG-'],
-                style,
-                values['-TEMP-'],
-                current_model,
-                file_hash,
-                previous_chunk,
-                log_callback=lambda msg: self.gui.signals.log_signal.emit(msg, "retry")
-            )
+        try:
+            # 按完成顺序收集结果，按分块索引回填以保证输出顺序
+            done = 0
+            for future in as_completed(futures):
+                translated, model_used = future.result()
+                group = futures[future]
+                if len(group) > 1:
+                    for index, result in zip(group, translated):
+                        translated_chunks[index] = result
+                else:
+                    translated_chunks[group[0]] = translated
+                done += len(group)
+
+                # 更新进度
+                progress = int((done / len(chunks)) * 100)
+                self.gui.signals.progress_signal.emit(progress)
+                self.gui.signals.log_signal.emit(
+                    f"进度: {progress}% | 已翻译 {done}/{len(chunks)} 块", "info"
+                )
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            cache.unpin_session(file_hash)
+            # 写入尚未落盘的台账记录（任务中断时同样保留已产生的费用）
+            self.engine.ledger.flush()
 
-            translated_chunks.append(translated)
-            previous_chunk = chunk
+        self._log_run_summary(run_started)
+        return translated_chunks
 
-            # 更新进度
-            progress = int((i / len(chunks)) * 100)
-            self.gui.signals.progress_signal.emit(progress)
-            self.gui.signals.log_signal.emit(
-                f"进度: {progress}% | 已翻译 {i}/{len(chunks)} 块", "info"
-            )
+    def _log_run_summary(self, run_started):
+        """输出本次任务的运行统计
+        :param run_started: 任务开始时间戳
+        """
+        self._log_concurrency_summary(run_started)
+        self._log_hedge_summary()
+        self._log_stall_summary()
+        self._log_connection_summary()
+        self._log_key_summary()
+        self._log_routing_summary()
+        self._log_pack_summary()
+        self._log_hit_summary()
+        self._log_cache_summary()
+        self._log_prompt_cache_summary()
+        self._log_output_budget_summary()
+        self._log_cost_summary()
+
+    def _log_concurrency_summary(self, run_started):
+        """输出本次任务中自适应并发的调整情况，便于在真实负载下调参
+        :param run_started: 任务开始时间戳，仅统计此后的调整记录
+        """
+        snapshot = self.engine.concurrency.snapshot()
+        changes = [change for change in snapshot["changes"] if change[0] >= run_started]
+        for _, old_limit, new_limit, reason in changes:
+            self.logger.info("[Main] 并发调整记录 %d → %d | %s", old_limit, new_limit, reason)
+        self.gui.signals.log_signal.emit(
+            f"当前并发上限: {snapshot['limit']} | 本次共调整 {len(changes)} 次", "info"
+        )
 
-        return translated_chunks
+    def _log_hedge_summary(self):
+        """输出本次任务的对冲请求统计（重复开销）"""
+        stats = self.engine.hedge_policy.summary()
+        if not stats["hedges"]:
+            return
+        message = (f"对冲请求 {stats['hedges']} 次（占比 {stats['hedge_ratio']:.1%}），"
+                   f"对冲胜出 {stats['hedge_wins']} 次，落败请求Token {stats['duplicate_tokens']}"
+                   f"（另有已取消请求的预估输入Token {stats['estimated_duplicate_tokens']}）")
+        self.logger.info("[Main] %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_stall_summary(self):
+        """输出本次任务的流式计时汇总，用于调优停滞阈值"""
+        stats = self.engine.stall_monitor.summary()
+        if not stats["requests"] and not any(stats["stalls"].values()):
+            return
+        message = (
+            f"首Token p95 {stats['first_token']['p95']:.1f}s（阈值 {stats['first_token_timeout']}s）| "
+            f"最大间隔 p95 {stats['max_gap']['p95']:.1f}s（阈值 {stats['idle_timeout']}s）| "
+            f"停滞中止 {sum(stats['stalls'].values())} 次"
+        )
+        self.logger.info("[Main] 流式计时汇总 | %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_connection_summary(self):
+        """输出本次任务的连接复用统计"""
+        stats = self.engine.connection_stats.summary()
+        message = (f"HTTP请求 {stats['requests']} 次 | 新建连接 {stats['new_connections']} 个 | "
+                   f"复用连接 {stats['reused']} 次")
+        self.logger.info("[Main] 连接复用统计 | %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_key_summary(self):
+        """输出本次任务各API密钥的请求分布（仅多密钥时）"""
+        slots = self.engine.key_pool.summary()
+        if len(slots) < 2:
+            return
+        status_names = {"active": "正常", "cooling": "冷却中", "disabled": "已失效"}
+        for slot in slots:
+            message = (f"密钥 {slot['name']}（权重 {slot['weight']}）| 请求 {slot['requests']} 次 | "
+                       f"失败 {slot['failures']} 次 | {status_names[slot['status']]}")
+            self.logger.info("[Main] %s", message)
+            self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_routing_summary(self):
+        """输出本次任务的模型路由决策与各模型的耗时、Token用量"""
+        stats = self.engine.router.summary()
+        for model_name, entry in stats["models"].items():
+            message = f"模型 {model_name}"
+            if stats["decisions"]:
+                message += f" | 路由 {entry['routed']} 块（{entry['chars']} 字）"
+            if "requests" in entry:
+                message += (f" | 请求 {entry['requests']} 次 | 平均耗时 {entry['avg_latency']:.1f}s | "
+                            f"Token {entry['tokens']}")
+            self.logger.info("[Main] %s", message)
+            self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_pack_summary(self):
+        """输出本次任务的多段打包统计"""
+        stats = self.engine.pack_stats
+        if not stats["packs"]:
+            return
+        message = (f"打包请求 {stats['packs']} 次，共 {stats['segments']} 段 | "
+                   f"校验失败回退 {stats['fallbacks']} 次")
+        self.logger.info("[Main] %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_hit_summary(self):
+        """输出本次任务的缓存命中与请求合并统计"""
+        stats = self.engine.hit_stats
+        message = f"缓存命中 {stats['cache']} 次 | 相同分块合并请求 {stats['coalesced']} 次"
+        self.logger.info("[Main] %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_cache_summary(self):
+        """输出翻译缓存的占用与累计淘汰情况"""
+        stats = cache.stats()
+        message = (f"翻译缓存 {stats['entries']} 条 / {stats['bytes'] / 1024 / 1024:.1f} MB | "
+                   f"累计淘汰: 过期 {stats['expired']} 条，超出容量 {stats['capacity']} 条")
+        self.logger.info("[Main] %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_prompt_cache_summary(self):
+        """输出本次任务的服务端前缀缓存命中情况"""
+        stats = self.engine.prompt_cache_stats
+        total = stats["hit"] + stats["miss"]
+        if not total:
+            return
+        message = (f"前缀缓存命中 {stats['hit']} / {total} 输入Token（{stats['hit'] / total:.1%}）")
+        self.logger.info("[Main] %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_output_budget_summary(self):
+        """输出本次任务的输出上限（max_tokens）与各语言对学习到的输出/输入比例"""
+        stats = self.engine.output_budget.summary()
+        if not stats["requests"]:
+            return
+        ratios = "，".join(f"{pair} {ratio:.2f}" for pair, ratio in stats["ratios"].items())
+        message = (f"平均输出上限 {stats['avg_max_tokens']:.0f} Token | "
+                   f"截断 {stats['truncated']} 次（续写 {stats['continuations']} 次）| "
+                   f"输出/输入比例: {ratios}")
+        self.logger.info("[Main] %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
+
+    def _log_cost_summary(self):
+        """输出本次任务的Token用量与预估费用"""
+        stats = self.engine.ledger.run_summary()
+        estimated = f"（含已取消请求预估 {stats['estimated_cost']:.4f}）" if stats["estimated_cost"] else ""
+        message = (f"本次费用约 {stats['cost']:.4f} {stats['currency']}{estimated} | 输入Token {stats['prompt']}"
+                   f"（缓存命中 {stats['cache_hit']}）| 输出Token {stats['completion']} | 运行ID {stats['run_id']}")
+        self.logger.info("[Main] %s", message)
+        self.gui.signals.log_signal.emit(message, "info")
 
     def _save_result(self, values, translated_paragraphs, output_path):
         """保存翻译结果（段落列表）"""
@@ -0,0 +1,186 @@
+# tests/conftest.py
+"""
+测试公共设施
+- 测试在临时目录中运行，缓存、费用台账等文件不会写入项目目录
+- FakeAPI：基于httpx.MockTransport的OpenAI兼容接口，记录收到的请求并按需返回译文
+- FakeWorker：与GUI的TranslationWorker接口一致的暂停/继续控制，不依赖Qt
+- Recorder：记录emit调用的信号替身
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# 必须在导入项目模块之前切换目录（translation_engine 导入时即创建缓存文件）
+os.chdir(tempfile.mkdtemp(prefix="novel_translate_tests_"))
+
+import httpx  # noqa: E402
+
+from config.settings import STREAM_CONFIG  # noqa: E402
+
+USAGE = {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150,
+         "prompt_cache_hit_tokens": 64, "prompt_cache_miss_tokens": 36}
+
+
+def source_text(body):
+    """取出请求中待翻译的文本（_build_prompt 构造的user消息末尾部分）"""
+    return body["messages"][-1]["content"].split("需要翻译的文本：\n")[-1]
+
+
+class FakeAPI:
+    """模拟的OpenAI兼容接口
+
+    属性：
+    - requests: 收到的请求体列表
+    - delay: 每个请求的响应延迟（秒），可为函数 delay(body)
+    - reply: 译文生成函数 reply(body) -> str、(str, finish_reason) 或 httpx.Response（模拟错误响应）
+    - usage: 响应中的Token用量
+    - stream_gaps: 流式响应中每个增量块之前的等待时间（秒），用于模拟首Token慢与中途停顿
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.delay = 0.0
+        self.reply = lambda body: "译文：" + source_text(body)
+        self.usage = dict(USAGE)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.stream_gaps = []
+
+    async def handle(self, request):
+        if request.method == "GET":
+            return httpx.Response(200, json={"object": "list", "data": []})
+        body = json.loads(request.content)
+        self.requests.append(body)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.delay(body) if callable(self.delay) else self.delay
+            if delay:
+                await asyncio.sleep(delay)
+            reply = self.reply(body)
+        finally:
+            self.in_flight -= 1
+        if isinstance(reply, httpx.Response):
+            return reply
+        content, finish_reason = reply if isinstance(reply, tuple) else (reply, "stop")
+        if body.get("stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                                  content=self._sse(body, content, finish_reason))
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": finish_reason}],
+            "usage": self.usage,
+        })
+
+    async def _sse(self, body, content, finish_reason):
+        """按4个字符一块输出流式响应，末尾附带finish_reason与usage块"""
+        def event(choices, usage=None):
+            chunk = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0,
+                     "model": body["model"], "choices": choices, "usage": usage}
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+
+        for index, start in enumerate(range(0, len(content), 4)):
+            if index < len(self.stream_gaps):
+                await asyncio.sleep(self.stream_gaps[index])
+            yield event([{"index": 0, "delta": {"content": content[start:start + 4]}, "finish_reason": None}])
+        yield event([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        yield event([], self.usage)
+        yield b"data: [DONE]\n\n"
+
+    @property
+    def transport(self):
+        return httpx.MockTransport(self.handle)
+
+
+class Recorder:
+    """记录emit调用参数的信号替身"""
+
+    def __init__(self):
+        self.calls = []
+
+    def emit(self, *args):
+        self.calls.append(args)
+
+
+class FakeWorker:
+    """与TranslationWorker接口一致的暂停控制（pause/resume/is_paused/wait_if_paused/log）"""
+
+    def __init__(self):
+        self._is_paused = False
+        self._pause_cond = threading.Condition(threading.Lock())
+        self.messages = []
+        self.log = SimpleNamespace(emit=lambda message, msg_type="info": self.messages.append((message, msg_type)))
+        self.waits = 0  # wait_if_paused被调用的次数（即占用线程等待的次数）
+        self.pause_reasons = []
+
+    def is_paused(self):
+        return self._is_paused
+
+    def pause(self, reason="用户触发暂停操作"):
+        with self._pause_cond:
+            self.pause_reasons.append(reason)
+            self._is_paused = True
+
+    def resume(self):
+        with self._pause_cond:
+            self._is_paused = False
+            self._pause_cond.notify_all()
+
+    def wait_if_paused(self):
+        with self._pause_cond:
+            self.waits += 1
+            while self._is_paused:
+                self._pause_cond.wait()
+
+
+@pytest.fixture
+def make_app():
+    """创建不启动Qt界面的Application，信号替换为Recorder"""
+    from main import Application
+    import logging
+
+    def factory(engine):
+        app = Application.__new__(Application)
+        app.logger = logging.getLogger("Main")
+        app.engine = engine
+        app.gui = SimpleNamespace(signals=SimpleNamespace(log_signal=Recorder(), progress_signal=Recorder(),
+                                                        stream_signal=Recorder()))
+        return app
+
+    return factory
+
+
+@pytest.fixture
+def fake_api():
+    return FakeAPI()
+
+
+@pytest.fixture
+def make_engine(fake_api, monkeypatch):
+    """创建使用FakeAPI的异步引擎（非流式），并以给定预算开始一个任务"""
+    monkeypatch.setitem(STREAM_CONFIG, "ENABLED", False)
+    from translation.translation_engine import AsyncTranslationEngine
+
+    def factory(max_concurrency=4, budget=None):
+        engine = AsyncTranslationEngine(f"sk-test-{uuid.uuid4().hex}", max_concurrency, transport=fake_api.transport)
+        engine.begin_job("test", budget)
+        return engine
+
+    return factory
+
+
+@pytest.fixture
+def file_hash():
+    """每个测试使用独立的文件哈希，避免共享的模块级缓存互相影响"""
+    return uuid.uuid4().hex
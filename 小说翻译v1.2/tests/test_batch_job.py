@@ -0,0 +1,106 @@
+# tests/test_batch_job.py
+"""BatchTranslationJob 的提交 → 重启 → 轮询 → 收取流程（使用内存中的模拟批量接口）"""
+
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import USAGE, source_text
+
+
+class FakeBatchClient:
+    """模拟的批量接口：files.create/content 与 batches.create/retrieve
+    任务在第二次查询时完成，结果为 "译文：" + 待翻译文本
+    """
+
+    def __init__(self):
+        self.files_store = {}
+        self.batches_store = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:8]}"
+        self.files_store[file_id] = file[1].read().decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self.files_store[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{uuid.uuid4().hex[:8]}"
+        self.batches_store[batch_id] = {"input": input_file_id, "polls": 0}
+        return SimpleNamespace(id=batch_id, status="validating")
+
+    def _retrieve_batch(self, batch_id):
+        batch = self.batches_store[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] < 2:
+            return SimpleNamespace(status="in_progress", output_file_id=None, error_file_id=None,
+                                   request_counts=None)
+        output_id = f"file-{batch_id}-out"
+        if output_id not in self.files_store:
+            lines = []
+            for line in self.files_store[batch["input"]].splitlines():
+                request = json.loads(line)
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": {
+                    "status_code": 200,
+                    "body": {"model": request["body"]["model"], "usage": USAGE, "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "译文：" + source_text(request["body"])},
+                    }]},
+                }}, ensure_ascii=False))
+            self.files_store[output_id] = "\n".join(lines)
+        return SimpleNamespace(status="completed", output_file_id=output_id, error_file_id=None,
+                               request_counts=None)
+
+
+@pytest.fixture
+def sync_engine(fake_api, monkeypatch):
+    from config.settings import STREAM_CONFIG
+    from translation.translation_engine import TranslationEngine
+    monkeypatch.setitem(STREAM_CONFIG, "ENABLED", False)
+    return TranslationEngine([f"sk-test-{uuid.uuid4().hex}"], transport=fake_api.transport)
+
+
+def test_submit_restart_poll_collect(sync_engine, fake_api, tmp_path):
+    from translation.batch_job import BatchTranslationJob
+    from translation.translation_engine import cache
+    from file_processor.file_handler import get_file_hash
+
+    source = tmp_path / "book.txt"
+    source.write_text(f"第{uuid.uuid4().hex[:6]}章\n她付了100円。\n", encoding="utf-8")
+    state_file = str(tmp_path / "batch_job.json")
+    client = FakeBatchClient()
+
+    BatchTranslationJob(sync_engine, client, state_file).submit(
+        [str(source)], "日语", "标准", 1.0, "DeepSeek-V3", output_dir=str(tmp_path))
+
+    # 程序重启：新的任务对象从状态文件恢复
+    job = BatchTranslationJob(sync_engine, client, state_file)
+    assert job.has_pending()
+    assert job.poll(interval=0) == "completed"
+    [output_path] = job.collect(fallback_online=False)
+
+    output = open(output_path, encoding="utf-8").read()
+    assert "100円" in output and "￥" not in output
+    assert fake_api.requests == []  # 没有回退到在线翻译
+    # 缓存中是未还原格式的译文，与在线翻译的缓存约定一致
+    [chunk] = job.state["files"][0]["chunks"]
+    cached = cache.get(chunk["text"], "ja", "standard", get_file_hash(str(source)))
+    assert "￥100" in cached
+    summary = sync_engine.ledger.run_summary()
+    assert (summary["prompt"], summary["completion"], summary["cache_hit"]) == (100, 50, 64)
+    with open(sync_engine.ledger.ledger_file, encoding="utf-8") as f:  # 收取结束时已写入台账文件
+        assert sum(summary["run_id"] in line for line in f) == 1
+
+    # 再次提交同一文件：全部命中缓存，不提交批量任务，输出同样还原格式
+    rerun = BatchTranslationJob(sync_engine, client, str(tmp_path / "rerun.json"))
+    rerun.submit([str(source)], "日语", "标准", 1.0, "DeepSeek-V3", output_dir=str(tmp_path / "rerun"))
+    assert rerun.state["batch_id"] is None
+    [rerun_path] = rerun.collect(fallback_online=False)
+    assert rerun_path != output_path
+    assert open(rerun_path, encoding="utf-8").read() == output
+    assert len(client.batches_store) == 1
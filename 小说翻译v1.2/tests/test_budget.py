@@ -0,0 +1,148 @@
+# tests/test_budget.py
+"""任务预算：发出时预留、暂停期间不发出、继续时重新检查预算"""
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeWorker, USAGE
+from config.settings import RATE_LIMIT_CONFIG
+from translation.cost_ledger import estimate_cost
+from translation.errors import classify_error, BUDGET
+from translation.rate_limiter import estimate_tokens
+
+
+def _costs(engine, text, usage=USAGE):
+    """单个请求的预估费用与FakeAPI返回用量对应的实际费用"""
+    messages = engine._build_prompt("zh", "standard", "", text)
+    prompt_tokens = estimate_tokens(engine._messages_text(messages))
+    model = engine.model_map["DeepSeek-V3"]
+    estimated = estimate_cost(model, prompt_tokens, int(prompt_tokens * RATE_LIMIT_CONFIG["COMPLETION_RATIO"]))
+    actual = estimate_cost(model, usage["prompt_tokens"], usage["completion_tokens"],
+                           usage["prompt_cache_hit_tokens"])
+    return estimated, actual
+
+
+async def _until(predicate, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("等待超时")
+
+
+def test_queued_requests_do_not_reserve_budget(make_engine, fake_api, file_hash):
+    engine = make_engine(max_concurrency=2)
+    fake_api.usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15,
+                      "prompt_cache_hit_tokens": 0, "prompt_cache_miss_tokens": 10}
+    estimated, actual = _costs(engine, "第0段。", fake_api.usage)
+    count = 6
+    budget = max(2.5 * estimated, count * actual * 1.1)
+    assert budget < count * estimated  # 若在提交时为所有分块预留，任务会在开始前暂停
+    engine.begin_job("test", budget)
+    engine.worker = FakeWorker()
+    fake_api.delay = 0.02
+
+    async def run():
+        return await asyncio.gather(*(
+            engine.safe_translate(f"第{i}段。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash)
+            for i in range(count)
+        ))
+
+    results = asyncio.run(run())
+    assert len(results) == count
+    assert not engine.worker.is_paused() and engine.worker.messages == []
+    assert engine.ledger.run_summary()["cost"] == pytest.approx(count * actual)
+    assert engine.ledger.reserved == pytest.approx(0.0)
+
+
+def test_admitted_request_waits_while_paused(make_engine, fake_api):
+    engine = make_engine()
+    worker = engine.worker = FakeWorker()
+    messages = engine._build_prompt("zh", "standard", "", "第1段。")
+
+    async def run():
+        worker.pause()
+        task = asyncio.create_task(engine._request_completion("DeepSeek-V3", messages, 1.0))
+        await asyncio.sleep(0.1)
+        assert fake_api.requests == []
+        assert engine.ledger.reserved == 0
+        worker.resume()
+        await task
+
+    asyncio.run(run())
+    assert len(fake_api.requests) == 1
+
+
+def test_resume_rechecks_budget_instead_of_lifting_it(make_engine, fake_api, file_hash):
+    engine = make_engine()
+    estimated, _ = _costs(engine, "第1段。")
+    engine.begin_job("test", estimated / 2)
+    worker = engine.worker = FakeWorker()
+    budget_text = [str(estimated / 2)]
+    engine.gui = SimpleNamespace(budget_input=SimpleNamespace(text=lambda: budget_text[0]))
+
+    async def run():
+        task = asyncio.create_task(
+            engine.safe_translate("第1段。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash))
+        await _until(worker.is_paused)
+        assert fake_api.requests == []
+        assert "预计超出预算" in worker.messages[0][0]
+        assert worker.pause_reasons == ["预计超出费用预算，自动暂停"]
+
+        worker.resume()  # 预算未调整：继续后再次暂停
+        await asyncio.sleep(0.1)
+        assert worker.is_paused()
+        assert fake_api.requests == []
+        assert engine.ledger.budget == pytest.approx(estimated / 2)
+
+        budget_text[0] = "10"  # 用户提高预算后继续
+        worker.resume()
+        return await asyncio.wait_for(task, 2)
+
+    result, _ = asyncio.run(run())
+    assert result == "译文：第1段。"
+    assert engine.ledger.budget == 10
+    assert len(fake_api.requests) == 1
+
+
+def test_budget_exceeded_without_worker_fails(make_engine, fake_api, file_hash):
+    engine = make_engine(budget=1e-9)
+
+    async def run():
+        await engine.safe_translate("第1段。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash)
+
+    with pytest.raises(Exception) as excinfo:
+        asyncio.run(run())
+    assert classify_error(excinfo.value) == BUDGET
+    assert fake_api.requests == []
+
+
+@pytest.mark.parametrize("text", ["0", "-5", "abc"])
+def test_refresh_budget_keeps_old_budget_for_invalid_input(make_engine, text):
+    engine = make_engine(budget=3.0)
+    engine.gui = SimpleNamespace(budget_input=SimpleNamespace(text=lambda: text))
+    engine._refresh_budget()
+    assert engine.ledger.budget == 3.0
+
+
+def test_ledger_records_are_written_off_the_event_loop(make_engine, fake_api, file_hash, monkeypatch):
+    engine = make_engine()
+    ledger = engine.ledger
+    loop_thread = []
+    writer_threads = []
+    flush = ledger.flush
+    monkeypatch.setattr(ledger, "flush", lambda: (writer_threads.append(threading.get_ident()), flush())[1])
+
+    async def run():
+        loop_thread.append(threading.get_ident())
+        return await engine.safe_translate("第1段。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash)
+
+    asyncio.run(run())
+    assert writer_threads and loop_thread[0] not in writer_threads
+    with open(ledger.ledger_file, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if ledger.run_id in line]
+    assert len(entries) == 1 and entries[0]["prompt_tokens"] == USAGE["prompt_tokens"]
@@ -0,0 +1,246 @@
+# tests/test_cache_manager.py
+"""TranslationCache 的延迟写回、关闭与后台线程的互斥、异步查询与按文件清理"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from config.settings import CACHE_CONFIG
+from cache.cache_manager import TranslationCache
+
+
+@pytest.fixture
+def make_cache(tmp_path, monkeypatch):
+    """在临时数据库上创建缓存；默认同步加载，后台写回间隔足够长，只在显式写回或达到条目数时写入"""
+    monkeypatch.setitem(CACHE_CONFIG, "BACKGROUND_LOAD", False)
+    monkeypatch.setitem(CACHE_CONFIG, "FLUSH_INTERVAL", 60)
+    caches = []
+
+    def make(**overrides):
+        for name, value in overrides.items():
+            monkeypatch.setitem(CACHE_CONFIG, name, value)
+        cache = TranslationCache(str(tmp_path / "cache.db"), "sqlite")
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_set_is_visible_before_write_back_and_persists(make_cache):
+    cache = make_cache()
+    cache.set("原文", "zh", "standard", "译文", "file-a")
+    assert cache.get("原文", "zh", "standard", "file-a") == "译文"
+    assert cache.storage.count() == 0  # 尚未写回存储后端
+
+    cache.save_cache(force=True)
+    assert cache.storage.count() == 1
+    assert cache._pending == {}
+    cache.close()
+
+    reopened = make_cache()
+    assert reopened.get("原文", "zh", "standard", "file-a") == "译文"
+
+
+def test_flush_batch_wakes_background_writer(make_cache):
+    cache = make_cache(FLUSH_BATCH=3)
+    for i in range(3):
+        cache.set(f"原文{i}", "zh", "standard", f"译文{i}", "file-a")
+    _wait_until(lambda: cache.storage.count() == 3)
+
+
+def test_failed_write_back_keeps_entries_pending(make_cache):
+    cache = make_cache()
+    original = cache.storage.put_many
+    cache.storage.put_many = lambda entries: (_ for _ in ()).throw(OSError("磁盘已满"))
+    cache.set("原文", "zh", "standard", "旧译文", "file-a")
+
+    with pytest.raises(OSError):
+        cache._flush()
+    cache.set("原文", "zh", "standard", "新译文", "file-a")  # 写回失败期间的更新不被旧条目覆盖
+    assert cache.get("原文", "zh", "standard", "file-a") == "新译文"
+
+    cache.storage.put_many = original
+    assert cache._flush() == 1
+    assert cache.storage.count() == 1
+
+
+def test_purge_session_drops_pending_entries(make_cache):
+    cache = make_cache()
+    cache.set("原文", "zh", "standard", "译文", "file-a")
+    cache.set("其他", "zh", "standard", "译文", "file-b")
+
+    cache.purge_session_cache("file-a")
+    assert cache.get("原文", "zh", "standard", "file-a") is None
+    cache.save_cache(force=True)
+    assert cache.storage.count() == 1
+
+
+def test_close_waits_for_background_write_back(make_cache):
+    cache = make_cache()
+    storage = cache.storage
+    calls = []
+    writing = threading.Event()
+    original_put, original_close = storage.put_many, storage.close
+
+    def slow_put(entries):
+        entries = list(entries)
+        calls.append("write")
+        writing.set()
+        time.sleep(0.2)
+        original_put(entries)
+        calls.append("written")
+
+    def close():
+        calls.append("close")
+        original_close()
+
+    storage.put_many, storage.close = slow_put, close
+    cache.set("原文", "zh", "standard", "译文", "file-a")
+    cache.save_cache()  # 唤醒后台线程写回
+    assert writing.wait(2)
+
+    cache.close()
+    assert not cache._flusher.is_alive()
+    assert calls == ["write", "written", "close"]
+    cache.close()  # 重复关闭不再操作存储后端
+    assert calls.count("close") == 1
+
+
+def test_aget_reads_storage_off_the_event_loop(make_cache, monkeypatch):
+    cache = make_cache()
+    cache.set("已写回", "zh", "standard", "译文1", "file-a")
+    cache.save_cache(force=True)
+    cache.set("待写回", "zh", "standard", "译文2", "file-a")
+    threads = []
+    original_get = cache.storage.get
+    monkeypatch.setattr(cache.storage, "get", lambda key: threads.append(threading.current_thread()) or original_get(key))
+
+    async def run():
+        return [await cache.aget(text, "zh", "standard", "file-a") for text in ("已写回", "待写回", "未缓存")]
+
+    assert asyncio.run(run()) == ["译文1", "译文2", None]
+    assert len(threads) == 2  # 待写回表命中不读取存储后端
+    assert threading.main_thread() not in threads
+
+
+def test_background_load_misses_wait_for_legacy_import(make_cache, monkeypatch, tmp_path):
+    import cache.cache_manager as cache_manager
+
+    legacy = tmp_path / "translation_cache.json"
+    legacy.write_text('{"legacy-key": "旧版译文"}', encoding="utf-8")
+    monkeypatch.setitem(CACHE_CONFIG, "LEGACY_JSON_FILE", str(legacy))
+    importing = threading.Event()
+    release = threading.Event()
+    original_import = cache_manager.import_json_cache
+
+    def slow_import(*args):
+        importing.set()
+        release.wait(2)
+        return original_import(*args)
+
+    monkeypatch.setattr(cache_manager, "import_json_cache", slow_import)
+    cache = make_cache(BACKGROUND_LOAD=True)
+    assert importing.wait(2)
+    assert cache.opened.is_set() and not cache.loaded.is_set()
+
+    async def run():
+        lookup = asyncio.create_task(cache.aget("任意原文", "zh", "standard"))
+        monkeypatch.setattr(cache, "get_key", lambda *args: "legacy-key")
+        await asyncio.sleep(0.1)
+        assert not lookup.done()  # 未命中的查询等待导入完成
+        release.set()
+        return await lookup
+
+    assert asyncio.run(run()) == "旧版译文"
+    assert cache.loaded.is_set()
+
+
+def test_close_waits_for_background_eviction(make_cache):
+    cache = make_cache(EVICT_INTERVAL=0)
+    storage = cache.storage
+    calls = []
+    evicting = threading.Event()
+    original_evict, original_close = storage.evict, storage.close
+
+    def slow_evict(*args):
+        calls.append("evict")
+        evicting.set()
+        time.sleep(0.2)
+        result = original_evict(*args)
+        calls.append("evicted")
+        return result
+
+    def close():
+        calls.append("close")
+        original_close()
+
+    storage.evict, storage.close = slow_evict, close
+    cache.set("原文", "zh", "standard", "译文", "file-a")
+    cache.save_cache()  # 唤醒后台线程：写回后进入淘汰检查
+    assert evicting.wait(2)
+
+    cache.close()
+    assert calls == ["evict", "evicted", "close"]
+    assert cache.evict() == {"expired": 0, "capacity": 0}  # 关闭后不再淘汰
+
+
+def test_hits_are_recorded_and_cleared_with_the_cache(make_cache):
+    cache = make_cache()
+    cache.set("原文", "zh", "standard", "译文", "file-a")
+    cache.save_cache(force=True)
+
+    assert asyncio.run(cache.aget("原文", "zh", "standard", "file-a")) == "译文"
+    cache.save_cache(force=True)
+    assert cache.get("原文", "zh", "standard", "file-a") == "译文"
+    cache.save_cache(force=True)
+    assert cache.storage._conn.execute("SELECT hits FROM entries").fetchone()[0] == 2
+
+    cache.get("原文", "zh", "standard", "file-a")
+    cache.clear_all_cache()
+    assert cache._touched == set()
+    assert cache.stats()["entries"] == 0
+
+
+def test_purge_session_removes_persisted_and_pending_entries(make_cache):
+    cache = make_cache()
+    cache.set("原文1", "zh", "standard", "译文1", "file-a")
+    cache.set("原文2", "zh", "standard", "译文2", "file-b")
+    cache.close()
+
+    # 重启后按持久化的文件哈希清理，同时删除尚未写回的条目
+    cache = make_cache()
+    cache.set("原文3", "zh", "standard", "译文3", "file-a")
+    assert cache.purge_session_cache("file-a") == 2
+    assert cache.get("原文1", "zh", "standard", "file-a") is None
+    assert cache.get("原文3", "zh", "standard", "file-a") is None
+    assert cache.get("原文2", "zh", "standard", "file-b") == "译文2"
+    cache.save_cache(force=True)
+    assert cache.storage.count() == 1
+
+
+def test_gc_sessions_skips_pinned_and_recently_seen_files(make_cache):
+    cache = make_cache()
+    for file_hash in ("old", "pinned", "seen"):
+        cache.set(f"{file_hash}原文", "zh", "standard", "译文", file_hash)
+    cache.save_cache(force=True)
+    with cache.storage._conn:
+        cache.storage._conn.execute("UPDATE sessions SET last_seen = ?", (time.time() - 10 * 86400,))
+
+    cache.pin_session("pinned")
+    cache.pin_session("seen")  # 开始翻译时记为最近出现，随gc前的写回持久化
+    cache.unpin_session("seen")
+    assert cache.gc_sessions(days=5) == {"sessions": 1, "entries": 1}
+    assert cache.get("old原文", "zh", "standard", "old") is None
+    assert cache.get("pinned原文", "zh", "standard", "pinned") == "译文"
+    assert cache.get("seen原文", "zh", "standard", "seen") == "译文"
@@ -0,0 +1,267 @@
+# tests/test_cache_storage.py
+"""缓存存储后端（SQLite/JSON）、旧版JSON缓存导入、淘汰（TTL、LRU/LFU容量上限、固定会话）与会话索引清理"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from cache.storage import SQLiteCacheStorage, JsonCacheStorage, create_cache_storage, import_json_cache
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteCacheStorage(str(tmp_path / "cache.db"))
+    yield storage
+    storage.close()
+
+
+def _write_legacy(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_sqlite_upsert_keeps_file_hash_when_overwritten_without_one(storage):
+    storage.put_many([("k1", "旧译文", "a"), ("k2", "译文", "b")])
+    storage.put_many([("k1", "新译文", None)])
+
+    assert storage.get("k1") == "新译文"
+    assert storage.keys_for_session("a") == ["k1"]
+    assert storage.count() == 2
+    storage.delete_many(["k1", "missing"])
+    assert storage.get("k1") is None
+    assert storage.count() == 1
+
+
+def test_sqlite_entries_survive_reopen(tmp_path):
+    db_file = str(tmp_path / "cache.db")
+    storage = SQLiteCacheStorage(db_file)
+    storage.put_many([("k1", "译文", "a")])
+    storage.close()
+
+    reopened = SQLiteCacheStorage(db_file)
+    try:
+        assert reopened.get("k1") == "译文"
+    finally:
+        reopened.close()
+
+
+def test_json_storage_rewrites_file(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    storage = create_cache_storage("json", cache_file)
+    storage.put_many([("k1", "译文", "a")])
+    assert json.loads(open(cache_file, encoding="utf-8").read()) == {"k1": "译文"}
+    assert JsonCacheStorage(cache_file).get("k1") == "译文"
+    with pytest.raises(ValueError):
+        create_cache_storage("redis", cache_file)
+
+
+def test_import_json_cache_in_batches_and_renames_file(tmp_path, storage):
+    legacy = _write_legacy(tmp_path / "translation_cache.json", {f"k{i}": f"译文{i}" for i in range(7)})
+
+    assert import_json_cache(legacy, storage, batch_size=3) == 7
+    assert storage.count() == 7
+    assert storage.get("k6") == "译文6"
+    assert not os.path.exists(legacy)
+    assert os.path.exists(f"{legacy}.imported")
+
+
+def test_import_keeps_existing_entries(tmp_path, storage):
+    storage.put_many([("k1", "当前译文", "a")])
+    legacy = _write_legacy(tmp_path / "translation_cache.json", {"k1": "旧版译文", "k2": "旧版译文"})
+
+    import_json_cache(legacy, storage)
+    assert storage.get("k1") == "当前译文"  # 已存在的键不被旧版译文覆盖
+    assert storage.keys_for_session("a") == ["k1"]
+    assert storage.get("k2") == "旧版译文"
+
+
+def test_sqlite_cache_imports_legacy_json_once_on_startup(tmp_path, monkeypatch):
+    from config.settings import CACHE_CONFIG
+    from cache.cache_manager import TranslationCache
+
+    legacy = _write_legacy(tmp_path / "translation_cache.json", {"k1": "旧版译文"})
+    monkeypatch.setitem(CACHE_CONFIG, "LEGACY_JSON_FILE", legacy)
+    monkeypatch.setitem(CACHE_CONFIG, "BACKGROUND_LOAD", False)
+    db_file = str(tmp_path / "cache.db")
+
+    cache = TranslationCache(db_file, "sqlite")
+    assert cache.storage.get("k1") == "旧版译文"
+    assert os.path.exists(f"{legacy}.imported")
+    cache.set("原文", "zh", "standard", "译文", "a")
+    cache.close()
+
+    # 再次启动时旧版文件已改名，不会重复导入或覆盖新写入的条目
+    reopened = TranslationCache(db_file, "sqlite")
+    try:
+        assert reopened.storage.count() == 2
+        assert reopened.get("原文", "zh", "standard", "a") == "译文"
+    finally:
+        reopened.close()
+
+
+def test_sqlite_reads_do_not_wait_for_the_write_lock(storage):
+    storage.put_many([("k1", "译文", "a")])
+    result = []
+    with storage._lock:  # 模拟进行中的写回或导入
+        reader = threading.Thread(target=lambda: result.append(storage.get("k1")))
+        reader.start()
+        reader.join(1)
+    assert result == ["译文"]
+
+
+def _set_entry(storage, key, accessed=None, hits=None):
+    """直接修改条目的最近访问时间（距今秒数）与命中次数"""
+    with storage._conn:
+        if accessed is not None:
+            storage._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time() - accessed, key))
+        if hits is not None:
+            storage._conn.execute("UPDATE entries SET hits = ? WHERE key = ?", (hits, key))
+
+
+def _keys(storage):
+    return sorted(row[0] for row in storage._conn.execute("SELECT key FROM entries"))
+
+
+def test_ttl_expires_stale_entries_except_pinned(storage):
+    storage.put_many([("fresh", "译文", "a"), ("stale", "译文", "a"), ("stale-pinned", "译文", "b")])
+    _set_entry(storage, "stale", accessed=1000)
+    _set_entry(storage, "stale-pinned", accessed=1000)
+
+    assert storage.evict(ttl=100, pinned_hashes={"b"}) == {"expired": 1, "capacity": 0}
+    assert _keys(storage) == ["fresh", "stale-pinned"]
+
+
+def test_lru_evicts_least_recently_accessed_down_to_max_entries(storage):
+    storage.put_many([(f"k{i}", "译文", "a") for i in range(5)])
+    for i in range(5):
+        _set_entry(storage, f"k{i}", accessed=100 - i * 10)  # k0 最久未访问
+    storage.touch_many(["k0"])  # 命中后变为最近访问
+
+    assert storage.evict(max_entries=3) == {"expired": 0, "capacity": 2}
+    assert _keys(storage) == ["k0", "k3", "k4"]
+
+
+def test_lfu_evicts_least_hit_entries(storage):
+    storage.put_many([(f"k{i}", "译文", "a") for i in range(4)])
+    for i, hits in enumerate([5, 0, 3, 1]):
+        _set_entry(storage, f"k{i}", hits=hits)
+
+    assert storage.evict(max_entries=2, policy="lfu")["capacity"] == 2
+    assert _keys(storage) == ["k0", "k2"]
+
+
+def test_max_bytes_counts_utf8_size_and_skips_pinned(storage):
+    storage.put_many([("old", "长" * 100, "a"), ("pinned", "长" * 100, "b"), ("new", "长" * 100, "a")])
+    _set_entry(storage, "old", accessed=300)
+    _set_entry(storage, "pinned", accessed=200)
+    assert storage.usage() == (3, 900)  # 每个汉字3字节
+
+    assert storage.evict(max_bytes=700, pinned_hashes={"b"})["capacity"] == 1
+    assert _keys(storage) == ["new", "pinned"]
+    assert storage.evict(max_bytes=700, pinned_hashes={"b"})["capacity"] == 0
+
+
+def test_cache_evict_uses_config_and_pins_active_files(tmp_path, monkeypatch):
+    from config.settings import CACHE_CONFIG
+    from cache.cache_manager import TranslationCache
+
+    monkeypatch.setitem(CACHE_CONFIG, "BACKGROUND_LOAD", False)
+    monkeypatch.setitem(CACHE_CONFIG, "MAX_ENTRIES", 2)
+    cache = TranslationCache(str(tmp_path / "cache.db"), "sqlite")
+    try:
+        cache.pin_session("active")
+        for i in range(3):
+            cache.set(f"原文{i}", "zh", "standard", f"译文{i}", "active")
+        cache.set("旧文件", "zh", "standard", "旧译文", "done")
+        cache.save_cache(force=True)  # 写回后执行一次淘汰检查
+
+        assert cache.get("旧文件", "zh", "standard", "done") is None
+        assert cache.storage.count() == 3
+        assert cache.stats()["capacity"] == 1
+
+        cache.unpin_session("active")
+        assert cache.evict()["capacity"] == 1
+        assert cache.storage.count() == 2
+    finally:
+        cache.close()
+
+
+def test_old_database_is_migrated_and_backfilled(tmp_path):
+    db_file = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, translation TEXT NOT NULL, file_hash TEXT,"
+                 " updated REAL NOT NULL)")
+    conn.execute("INSERT INTO entries VALUES ('k1', '译文', 'a', 1000.0)")
+    conn.commit()
+    conn.close()
+
+    storage = SQLiteCacheStorage(db_file)
+    try:
+        row = storage._conn.execute("SELECT size, accessed, hits FROM entries WHERE key = 'k1'").fetchone()
+        assert row == (6, 1000.0, 0)  # 大小按UTF-8字节回填，最近访问时间取写入时间
+        assert storage.get("k1") == "译文"
+        assert storage.evict(ttl=100) == {"expired": 1, "capacity": 0}
+    finally:
+        storage.close()
+
+
+def _set_last_seen(storage, file_hash, seconds_ago):
+    with storage._conn:
+        storage._conn.execute("UPDATE sessions SET last_seen = ? WHERE file_hash = ?",
+                              (time.time() - seconds_ago, file_hash))
+
+
+def test_gc_sessions_removes_stale_files_except_pinned(storage):
+    storage.put_many([("a1", "译文", "a"), ("a2", "译文", "a"), ("b1", "译文", "b"),
+                      ("c1", "译文", "c"), ("shared", "译文", None)])
+    for file_hash in "abc":
+        _set_last_seen(storage, file_hash, 1000)
+    storage.touch_sessions(["c"])  # 再次翻译后不再视为长期未出现
+
+    assert storage.gc_sessions(100, pinned_hashes={"b"}) == {"sessions": 1, "entries": 2}
+    assert _keys(storage) == ["b1", "c1", "shared"]
+    assert storage.gc_sessions(100) == {"sessions": 1, "entries": 1}
+    assert _keys(storage) == ["c1", "shared"]
+
+
+def test_session_index_survives_reopen_and_backfills_old_databases(tmp_path):
+    db_file = str(tmp_path / "cache.db")
+    storage = SQLiteCacheStorage(db_file)
+    storage.put_many([("a1", "译文", "a"), ("a2", "译文", "a"), ("b1", "译文", "b")])
+    # 模拟没有sessions表的旧数据库
+    with storage._conn:
+        storage._conn.execute("DROP TABLE sessions")
+    storage.close()
+
+    storage = SQLiteCacheStorage(db_file)
+    try:
+        assert sorted(storage.keys_for_session("a")) == ["a1", "a2"]
+        sessions = dict(storage._conn.execute("SELECT file_hash, last_seen FROM sessions"))
+        assert sorted(sessions) == ["a", "b"]
+        assert storage.delete_session("a") == 2
+        assert _keys(storage) == ["b1"]
+        assert storage.keys_for_session("a") == []
+    finally:
+        storage.close()
+
+
+def test_cache_tool_gc_command(tmp_path, capsys):
+    import cache_tool
+
+    db_file = str(tmp_path / "cache.db")
+    storage = SQLiteCacheStorage(db_file)
+    storage.put_many([("old", "译文", "old-file"), ("new", "译文", "new-file")])
+    _set_last_seen(storage, "old-file", 3 * 86400)
+    storage.close()
+
+    assert cache_tool.main(["--cache-file", db_file, "--backend", "sqlite", "gc", "--days", "2"]) == 0
+    assert "已清理 1 个文件，共 1 条缓存" in capsys.readouterr().out
+    storage = SQLiteCacheStorage(db_file)
+    try:
+        assert _keys(storage) == ["new"]
+    finally:
+        storage.close()
@@ -0,0 +1,107 @@
+# tests/test_concurrency.py
+"""AdaptiveConcurrencyController 的AIMD调整与在途名额控制"""
+
+import asyncio
+
+import httpx
+import openai
+
+from config.settings import CONCURRENCY_CONFIG
+from translation.concurrency import AdaptiveConcurrencyController
+
+
+def _controller(initial_limit=4, **overrides):
+    return AdaptiveConcurrencyController(initial_limit, {**CONCURRENCY_CONFIG, **overrides})
+
+
+def _rate_limit_error():
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api.example.com"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_additive_increase_once_per_window():
+    controller = _controller(initial_limit=2)
+    controller.record_success(1.0)  # 第一个样本只建立基线
+    for _ in range(2):
+        controller.record_success(1.0)
+    assert controller.limit == 3
+    for _ in range(2):
+        controller.record_success(1.0)
+    assert controller.limit == 3  # 上限提高后需要完成新窗口（3个）才再次增长
+    controller.record_success(1.0)
+    assert controller.limit == 4
+
+
+def test_slow_requests_do_not_increase():
+    controller = _controller(initial_limit=2)
+    controller.record_success(1.0)
+    for _ in range(10):
+        controller.record_success(5.0)  # 超过基线 × LATENCY_TOLERANCE
+    assert controller.limit == 2
+
+
+def test_latency_normalized_by_tokens():
+    controller = _controller(initial_limit=1)
+    controller.record_success(1.0, total_tokens=100)
+    controller.record_success(10.0, total_tokens=1000)  # 每Token耗时相同，视为正常
+    assert controller.limit == 2
+
+
+def test_multiplicative_decrease_with_cooldown():
+    controller = _controller(initial_limit=8)
+    assert controller.record_failure(_rate_limit_error()) == "rate_limit"
+    assert controller.limit == 4
+    controller.record_failure(_rate_limit_error())  # 冷却期内同一波失败不再下调
+    assert controller.limit == 4
+    controller._last_decrease -= CONCURRENCY_CONFIG["DECREASE_COOLDOWN"]
+    controller.record_failure(_rate_limit_error())
+    assert controller.limit == 2
+    assert [change[1:3] for change in controller.snapshot()["changes"]] == [(8, 4), (4, 2)]
+
+
+def test_non_congestion_errors_do_not_decrease():
+    controller = _controller(initial_limit=8)
+    controller.record_failure(ValueError("API返回空内容"))
+    assert controller.limit == 8
+
+
+def test_limit_bounds_and_fixed_mode():
+    controller = _controller(initial_limit=100, MAX_LIMIT=6, MIN_LIMIT=2)
+    assert controller.limit == 6
+    controller.record_failure(_rate_limit_error())
+    controller._last_decrease = 0.0
+    controller.record_failure(_rate_limit_error())
+    assert controller.limit == 2
+
+    fixed = _controller(initial_limit=3, ADAPTIVE=False)
+    fixed.record_success(1.0)
+    for _ in range(10):
+        fixed.record_success(1.0)
+    fixed.record_failure(_rate_limit_error())
+    assert fixed.limit == 3
+
+
+def test_in_flight_never_exceeds_limit_and_wakes_on_increase():
+    controller = _controller(initial_limit=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with controller:
+            peak = max(peak, controller.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(request() for _ in range(10)))
+        assert peak == 2
+        # 上限提高时唤醒等待中的协程
+        await controller.acquire()
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        controller._set_limit(3, "测试")
+        await asyncio.wait_for(waiter, 1)
+        assert controller.in_flight == 3
+
+    asyncio.run(run())
@@ -0,0 +1,81 @@
+# tests/test_key_pool.py
+"""KeyPool 的分配策略与失效/冷却处理"""
+
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from translation.errors import NoAvailableKeyError
+from translation.key_pool import KeyPool, WEIGHTED_ROUND_ROBIN
+
+
+def _status_error(status):
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+    response = httpx.Response(status, request=request, json={"error": {"message": "x"}})
+    error_type = {401: openai.AuthenticationError, 429: openai.RateLimitError}[status]
+    return error_type("x", response=response, body=None)
+
+
+def _pool(keys, **kwargs):
+    return KeyPool(keys, lambda api_key: api_key, **kwargs)
+
+
+def test_least_loaded_spreads_in_flight_requests():
+    pool = _pool(["sk-a-key-1", "sk-b-key-2"])
+
+    async def run():
+        return [await pool.acquire() for _ in range(4)]
+
+    slots = asyncio.run(run())
+    assert [slot.in_flight for slot in pool.slots] == [2, 2]
+    for slot in slots:
+        pool.release(slot)
+    assert [slot.in_flight for slot in pool.slots] == [0, 0]
+
+
+def test_weighted_round_robin_follows_weights():
+    pool = _pool([("sk-a-key-1", 3), ("sk-b-key-2", 1)], strategy=WEIGHTED_ROUND_ROBIN)
+
+    async def run():
+        chosen = []
+        for _ in range(8):
+            slot = await pool.acquire()
+            chosen.append(slot.client)
+            pool.release(slot)
+        return chosen
+
+    chosen = asyncio.run(run())
+    assert chosen.count("sk-a-key-1") == 6
+    assert chosen.count("sk-b-key-2") == 2
+
+
+def test_auth_failure_removes_key_from_rotation():
+    pool = _pool(["sk-a-key-1", "sk-b-key-2"])
+    pool.report_failure(pool.slots[0], _status_error(401))
+
+    async def run():
+        return [(await pool.acquire()).client for _ in range(3)]
+
+    assert asyncio.run(run()) == ["sk-b-key-2"] * 3
+    pool.report_failure(pool.slots[1], _status_error(401))
+    with pytest.raises(NoAvailableKeyError):
+        asyncio.run(pool.acquire())
+
+
+def test_rate_limited_key_cools_down_then_returns():
+    pool = _pool(["sk-a-key-1", "sk-b-key-2"])
+    pool.report_failure(pool.slots[0], _status_error(429))
+    assert pool.summary()[0]["status"] == "cooling"
+    pool.slots[1].cooldown_until = pool.slots[0].cooldown_until = time.monotonic() + 0.1
+
+    async def run():
+        started = time.monotonic()
+        slot = await pool.acquire()
+        return slot, time.monotonic() - started
+
+    slot, waited = asyncio.run(run())
+    assert waited >= 0.05
+    assert slot.in_flight == 1
@@ -0,0 +1,63 @@
+# tests/test_main.py
+"""Application._execute_translation 的并发翻译、按原文顺序回填与打包模式"""
+
+import re
+import uuid
+
+import main
+from conftest import FakeWorker, source_text
+from config.settings import PACK_CONFIG, PROMPT_CONFIG
+from file_processor.file_handler import split_file
+
+
+def test_out_of_order_results_are_reassembled_in_source_order(make_app, fake_api, file_hash, tmp_path,
+                                                              monkeypatch):
+    from translation.translation_engine import TranslationEngine
+
+    monkeypatch.setattr(main, "split_file", lambda path, lang: split_file(path, lang, max_tokens=12))  # 每段一块
+    count = 6
+    source = tmp_path / "book.txt"
+    source.write_text("".join(f"第{i}段，这是一段用于测试分块顺序的文字。\n" for i in range(count)), encoding="utf-8")
+    completed = []
+
+    def index_of(body):
+        return int(re.search(r"第(\d+)段", source_text(body)).group(1))
+
+    def reply(body):
+        completed.append(index_of(body))
+        return "译文：" + source_text(body)
+
+    # 越靠前的分块越晚完成
+    fake_api.delay = lambda body: 0.03 * (count - index_of(body))
+    fake_api.reply = reply
+    engine = TranslationEngine(f"sk-test-{uuid.uuid4().hex}", transport=fake_api.transport)
+    app = make_app(engine)
+    values = {"-LANG-": "中文", "-TEMP-": 1.0, "-MODEL-": "DeepSeek-V3"}
+
+    results = app._execute_translation(str(source), "zh", "standard", values, file_hash, FakeWorker())
+
+    assert completed != sorted(completed)  # 确实乱序完成
+    assert results == [f"译文：第{i}段，这是一段用于测试分块顺序的文字。" for i in range(count)]
+    progress = [args[0] for args in app.gui.signals.progress_signal.calls]
+    assert progress == sorted(progress) and progress[-1] == 100
+
+
+def test_pack_mode_sends_grouped_segments(make_app, fake_api, file_hash, tmp_path, monkeypatch):
+    from translation.translation_engine import TranslationEngine
+
+    monkeypatch.setitem(PACK_CONFIG, "ENABLED", True)
+    monkeypatch.setitem(PACK_CONFIG, "SEGMENT_TOKENS", 12)  # 每段一块
+    monkeypatch.setitem(PACK_CONFIG, "MAX_SEGMENTS", 3)
+    source = tmp_path / "book.txt"
+    source.write_text("".join(f"第{i}段，这是一段用于测试打包的文字。\n" for i in range(6)), encoding="utf-8")
+    fake_api.reply = lambda body: re.sub(r"(【#\d+】\n)", r"\1译文：",
+                                         source_text(body).split(PROMPT_CONFIG["PACK_PROMPT"])[-1])
+    engine = TranslationEngine(f"sk-test-{uuid.uuid4().hex}", transport=fake_api.transport)
+    app = make_app(engine)
+    values = {"-LANG-": "中文", "-TEMP-": 1.0, "-MODEL-": "DeepSeek-V3"}
+
+    results = app._execute_translation(str(source), "zh", "standard", values, file_hash, FakeWorker())
+
+    assert len(fake_api.requests) == 2
+    assert results == [f"译文：第{i}段，这是一段用于测试打包的文字。" for i in range(6)]
+    assert engine.pack_stats == {"packs": 2, "segments": 6, "fallbacks": 0}
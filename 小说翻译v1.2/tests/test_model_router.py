@@ -0,0 +1,89 @@
+# tests/test_model_router.py
+"""ModelRouter 的分块特征、路由决策与推理模型延迟回退"""
+
+import asyncio
+
+import pytest
+
+from config.settings import ROUTER_CONFIG, TRANSLATION_CONFIG
+from translation.model_router import FLAG_DIALOGUE, FLAG_POETRY, FLAG_RUBY, ModelRouter, analyze_chunk, difficulty_flags
+
+FAST, REASONING = ROUTER_CONFIG["FAST_MODEL"], ROUTER_CONFIG["REASONING_MODEL"]
+PROSE = "他走进房间，看见桌上放着一封信。" * 30
+DIALOGUE = "\n".join(["「你来了。」", "「嗯，我来了。」"] * 20)
+POEM = "\n".join(["春风又绿江南岸", "明月何时照我还", "孤帆远影碧空尽", "唯见长江天际流"] * 3)
+RUBY = "".join(f"彼は魔法《まほう》を使った。{PROSE[:20]}" for _ in range(20))
+
+
+@pytest.mark.parametrize("text, expected", [
+    (PROSE, []),
+    (DIALOGUE, [FLAG_DIALOGUE]),
+    (POEM, [FLAG_POETRY]),
+    (RUBY, [FLAG_RUBY]),
+])
+def test_difficulty_flags(text, expected):
+    assert difficulty_flags(analyze_chunk(text)) == expected
+
+
+def _route(router, text):
+    model = router.route(text)
+    return model, router.decisions[-1][3]
+
+
+def test_plain_and_short_chunks_use_fast_model():
+    router = ModelRouter()
+    assert _route(router, PROSE) == (FAST, "普通文本")
+    model, reason = _route(router, "「短い。」\n「うん。」")
+    assert model == FAST and reason.startswith("短分块")
+
+
+def test_long_difficult_chunk_uses_reasoning_model():
+    router = ModelRouter()
+    assert len(DIALOGUE) >= ROUTER_CONFIG["SHORT_CHUNK"]
+    assert _route(router, DIALOGUE) == (REASONING, "高难度(dialogue)")
+
+
+def test_slow_reasoning_model_keeps_single_flag_chunks_on_fast_model():
+    router = ModelRouter()
+    for _ in range(ROUTER_CONFIG["MIN_SAMPLES"] - 1):
+        router.record_result(REASONING, ROUTER_CONFIG["LATENCY_LIMIT"] + 30, 1000)
+    assert router.route(DIALOGUE) == REASONING  # 样本不足时不参考延迟
+
+    router.record_result(REASONING, ROUTER_CONFIG["LATENCY_LIMIT"] + 30, 1000)
+    model, reason = _route(router, DIALOGUE)
+    assert model == FAST and reason.startswith("推理模型延迟过高")
+    # 同时命中多个难度特征的分块仍使用推理模型
+    hard = "\n".join(f"「魔法《まほう》だ{i}」" for i in range(40))
+    assert len(difficulty_flags(analyze_chunk(hard))) >= 2
+    assert router.route(hard) == REASONING
+
+
+def test_summary_counts_decisions_and_usage():
+    router = ModelRouter()
+    router.route(PROSE)
+    router.route(DIALOGUE)
+    router.record_result(FAST, 2.0, 300)
+    router.record_result(FAST, 4.0, 500)
+
+    summary = router.summary()
+    assert summary["decisions"] == 2
+    assert summary["models"][FAST] == {"routed": 1, "chars": len(PROSE), "requests": 2, "avg_latency": 3.0,
+                                       "tokens": 800}
+    assert summary["models"][REASONING] == {"routed": 1, "chars": len(DIALOGUE)}
+    router.reset_stats()
+    assert router.summary() == {"decisions": 0, "models": {}}
+
+
+def test_auto_model_routes_each_chunk(make_engine, fake_api, file_hash):
+    engine = make_engine()
+
+    async def run():
+        return await asyncio.gather(
+            engine.safe_translate(PROSE, "中文", "standard", 1.0, ROUTER_CONFIG["AUTO_MODEL"], file_hash),
+            engine.safe_translate(DIALOGUE, "中文", "standard", 1.0, ROUTER_CONFIG["AUTO_MODEL"], file_hash),
+        )
+
+    results = asyncio.run(run())
+    assert [model for _, model in results] == [FAST, REASONING]
+    model_map = TRANSLATION_CONFIG["MODEL_MAP"]
+    assert sorted(body["model"] for body in fake_api.requests) == sorted([model_map[FAST], model_map[REASONING]])
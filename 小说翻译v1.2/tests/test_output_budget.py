@@ -0,0 +1,86 @@
+# tests/test_output_budget.py
+"""输出预算：按语言对学习输出/输入比例（EMA）与max_tokens的上下限"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from config.settings import OUTPUT_BUDGET_CONFIG
+from translation.output_budget import OutputBudget, detect_source
+
+PAIR = "ja->zh/standard"
+
+
+def usage(completion_tokens):
+    return SimpleNamespace(prompt_tokens=0, completion_tokens=completion_tokens)
+
+
+@pytest.fixture
+def budget(tmp_path):
+    config = dict(OUTPUT_BUDGET_CONFIG, DEFAULT_RATIO=1.5, SAFETY_FACTOR=1.5, MIN_TOKENS=512, MAX_TOKENS=8192,
+                  ALPHA=0.2, MIN_SAMPLE_TOKENS=100, SAVE_EVERY=3)
+    return OutputBudget(str(tmp_path / "output_ratio.json"), config)
+
+
+def test_detect_source_prefers_kana_over_kanji():
+    assert detect_source("彼は静かに笑った。") == "ja"
+    assert detect_source("他静静地笑了。") == "zh"
+    assert detect_source("그는 조용히 웃었다.") == "ko"
+    assert detect_source("He smiled quietly.") == "other"
+
+
+def test_first_sample_sets_ratio_then_ema_moves_toward_observed(budget):
+    assert budget.ratio(PAIR) == 1.5
+    budget.record(PAIR, 1000, usage(1000), "deepseek-chat")
+    assert budget.ratio(PAIR) == pytest.approx(1.0)
+    budget.record(PAIR, 1000, usage(2000), "deepseek-chat")
+    assert budget.ratio(PAIR) == pytest.approx(1.0 + 0.2 * (2.0 - 1.0))
+    assert budget.ratios[PAIR]["samples"] == 2
+
+
+def test_truncated_short_and_reasoner_responses_are_not_learned(budget):
+    budget.record(PAIR, 1000, usage(8192), "deepseek-chat", finish_reason="length")
+    budget.record(PAIR, 50, usage(500), "deepseek-chat")
+    budget.record(PAIR, 1000, usage(5000), "deepseek-reasoner")
+    budget.record(PAIR, 1000, None, "deepseek-chat")
+    assert PAIR not in budget.ratios
+
+
+def test_truncation_stats_count_continuations(budget):
+    budget.record_truncation(2)
+    budget.record_truncation(0)
+    summary = budget.summary()
+    assert (summary["truncated"], summary["continuations"]) == (2, 2)
+
+
+def test_max_tokens_scales_with_input_and_is_clamped(budget):
+    budget.ratios[PAIR] = {"ratio": 2.0, "samples": 10}
+    assert budget.max_tokens(PAIR, 1000, "deepseek-chat") == 1000 * 2 * 3 // 2
+    assert budget.max_tokens(PAIR, 10, "deepseek-chat") == 512
+    assert budget.max_tokens(PAIR, 100000, "deepseek-chat") == 8192
+    # 推理模型的输出含思维链，固定使用上限
+    assert budget.max_tokens(PAIR, 10, "deepseek-reasoner") == 8192
+    assert budget.summary()["requests"] == 4
+
+
+def test_disabled_budget_uses_fixed_cap(budget):
+    budget.config = dict(budget.config, ENABLED=False)
+    assert budget.max_tokens(PAIR, 10, "deepseek-chat") == 8192
+
+
+def test_record_requests_save_without_writing_and_ratios_survive_reload(budget):
+    results = [budget.record(PAIR, 1000, usage(1200), "deepseek-chat") for _ in range(3)]
+    assert results == [False, False, True]
+    # record只更新内存，文件由调用方保存
+    assert not os.path.exists(budget.ratio_file)
+    budget.save()
+    reloaded = OutputBudget(budget.ratio_file, budget.config)
+    assert reloaded.ratio(PAIR) == pytest.approx(budget.ratio(PAIR))
+    assert reloaded.ratios[PAIR]["samples"] == 3
+
+
+def test_corrupt_ratio_file_starts_from_default(tmp_path):
+    ratio_file = tmp_path / "output_ratio.json"
+    ratio_file.write_text("{broken", encoding="utf-8")
+    assert OutputBudget(str(ratio_file)).ratio(PAIR) == OUTPUT_BUDGET_CONFIG["DEFAULT_RATIO"]
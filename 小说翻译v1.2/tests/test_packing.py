@@ -0,0 +1,72 @@
+# tests/test_packing.py
+"""多段打包：按Token切分与分组、打包请求的发送与逐段缓存"""
+
+import asyncio
+import re
+
+from conftest import source_text
+from config.settings import PACK_CONFIG, PROMPT_CONFIG, FILE_HANDLER_CONFIG
+from file_processor.file_handler import split_file, group_for_packing
+
+
+def packed_reply(body):
+    """逐段回复打包请求：保留【#编号】标记，每段译文为 "译文：" + 原文"""
+    numbered = source_text(body).split(PROMPT_CONFIG["PACK_PROMPT"])[-1]
+    return re.sub(r"(【#\d+】\n)", r"\1译文：", numbered)
+
+
+def test_dialogue_file_is_split_into_packable_segments(tmp_path):
+    source = tmp_path / "dialogue.txt"
+    source.write_text("".join(f"「これは{i}番目の台詞です、よろしくお願いします。」\n" for i in range(300)),
+                      encoding="utf-8")
+
+    # 常规分块已合并到 DEFAULT_MAX_TOKENS，没有可打包的短分块
+    chunks = split_file(str(source), "ja")
+    groups = group_for_packing(chunks, PACK_CONFIG["MAX_SEGMENTS"], PACK_CONFIG["MAX_PACK_TOKENS"])
+    assert all(len(group) == 1 for group in groups)
+
+    # 打包模式按 SEGMENT_TOKENS 切分，相邻的段合并为打包请求
+    segments = split_file(str(source), "ja", PACK_CONFIG["SEGMENT_TOKENS"])
+    groups = group_for_packing(segments, PACK_CONFIG["MAX_SEGMENTS"], PACK_CONFIG["MAX_PACK_TOKENS"])
+    assert len(groups) < len(segments)
+    assert max(len(group) for group in groups) > 1
+    assert sorted(i for group in groups for i in group) == list(range(len(segments)))
+    assert FILE_HANDLER_CONFIG["CHUNKING"]["DEFAULT_MAX_TOKENS"] > PACK_CONFIG["SEGMENT_TOKENS"]
+
+
+def test_packed_request_caches_unrestored_segments(make_engine, fake_api, file_hash):
+    from translation.translation_engine import cache
+
+    engine = make_engine()
+    fake_api.reply = packed_reply
+    texts = ["一段目です。", "100円を払った。", "三段目です。"]
+
+    async def run():
+        return await engine.translate_packed(texts, "日语", "standard", 1.0, "DeepSeek-V3", file_hash)
+
+    results, _ = asyncio.run(run())
+    assert len(fake_api.requests) == 1
+    assert "【#3】" in source_text(fake_api.requests[0])
+    assert results == ["译文：一段目です。", "译文：100円を払った。", "译文：三段目です。"]
+    assert engine.pack_stats == {"packs": 1, "segments": 3, "fallbacks": 0}
+    # 缓存与单段请求一致：保存未还原格式的译文
+    assert cache.get(texts[1], "ja", "standard", file_hash) == "译文：￥100を払った。"
+
+    # 再次翻译全部命中缓存，命中的段同样还原格式
+    cached_results, _ = asyncio.run(run())
+    assert cached_results == results
+    assert len(fake_api.requests) == 1
+    assert engine.hit_stats["cache"] == 3
+
+
+def test_packed_cache_hit_matches_single_path(make_engine, fake_api, file_hash):
+    engine = make_engine()
+    text = "200円を払った。"
+
+    async def run():
+        single, _ = await engine.safe_translate(text, "日语", "standard", 1.0, "DeepSeek-V3", file_hash)
+        packed, _ = await engine.translate_packed([text], "日语", "standard", 1.0, "DeepSeek-V3", file_hash)
+        return single, packed
+
+    single, packed = asyncio.run(run())
+    assert packed == [single] == ["译文：200円を払った。"]
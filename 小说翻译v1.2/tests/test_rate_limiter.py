@@ -0,0 +1,90 @@
+# tests/test_rate_limiter.py
+"""TokenBucket / RateLimiter 的预约、等待、修正、取消退还与进程内共享"""
+
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from config.settings import RATE_LIMIT_CONFIG
+from translation.rate_limiter import TokenBucket, RateLimiter, get_shared_limiter
+
+
+def test_bucket_reserve_returns_wait_for_debt():
+    bucket = TokenBucket(60)  # 每秒补充1个
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(2) == pytest.approx(2.0, abs=0.05)
+    assert bucket.tokens == pytest.approx(-2.0, abs=0.05)
+
+
+def test_bucket_caps_oversized_request_at_capacity():
+    bucket = TokenBucket(60)
+    assert bucket.reserve(1000) == 0.0  # 超过容量的请求按容量扣减，不会永远等待
+    assert bucket.tokens == pytest.approx(0.0, abs=0.05)
+
+
+def test_bucket_refills_over_time_up_to_capacity():
+    bucket = TokenBucket(6000)  # 每秒补充100个
+    bucket.reserve(6000)
+    time.sleep(0.1)
+    bucket.adjust(0)
+    assert bucket.tokens == pytest.approx(10, abs=5)
+    bucket.adjust(10 ** 6)
+    assert bucket.tokens == bucket.capacity
+
+
+def test_settle_refunds_overestimate_and_charges_underestimate():
+    limiter = RateLimiter(600, 6000)
+    limiter._reserve(1000)
+    limiter.settle(1000, 400)
+    assert limiter.token_bucket.tokens == pytest.approx(5600, abs=5)
+    limiter.settle(400, 1400)
+    assert limiter.token_bucket.tokens == pytest.approx(4600, abs=5)
+
+
+def test_acquire_waits_on_request_bucket_without_blocking_loop():
+    limiter = RateLimiter(600, 10 ** 6)  # 每0.1秒补充1个请求
+    limiter.request_bucket.tokens = 1
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    async def run():
+        tick_task = asyncio.create_task(ticker())
+        start = time.monotonic()
+        await asyncio.gather(limiter.acquire(10), limiter.acquire(10), limiter.acquire(10))
+        elapsed = time.monotonic() - start
+        tick_task.cancel()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    assert elapsed == pytest.approx(0.2, abs=0.08)
+    assert ticks >= 10  # 等待期间事件循环仍在运行
+
+
+def test_shared_limiter_per_name_and_disabled():
+    name = f"test-{uuid.uuid4().hex}"
+    assert get_shared_limiter(name) is get_shared_limiter(name)
+    assert get_shared_limiter(name) is not get_shared_limiter(f"{name}-other")
+    assert get_shared_limiter(name, {**RATE_LIMIT_CONFIG, "ENABLED": False}) is None
+
+
+def test_cancelled_acquire_refunds_request_and_tokens():
+    limiter = RateLimiter(60, 6000)
+    limiter.request_bucket.tokens = 0  # RPM桶为空，acquire需要等待约1秒
+
+    async def run():
+        task = asyncio.create_task(limiter.acquire(1000))
+        await asyncio.sleep(0.05)
+        assert limiter.token_bucket.tokens == pytest.approx(5000, abs=5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert limiter.request_bucket.tokens == pytest.approx(0, abs=0.1)
+    assert limiter.token_bucket.tokens == pytest.approx(6000, abs=5)
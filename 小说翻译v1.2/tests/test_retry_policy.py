@@ -0,0 +1,102 @@
+# tests/test_retry_policy.py
+"""错误分类、Retry-After解析与按错误类别的重试决策"""
+
+import asyncio
+import email.utils
+import time
+
+import httpx
+import openai
+import pytest
+
+from translation.errors import (
+    classify_error, RATE_LIMIT, SERVER_ERROR, TIMEOUT, CONNECTION, CONTEXT_LENGTH, BAD_REQUEST, AUTH,
+    EMPTY_RESPONSE, UNKNOWN
+)
+from translation.retry_policy import RetryPolicy, RetryBudget, parse_retry_after, RETRY, RESPLIT, FAIL
+
+REQUEST = httpx.Request("POST", "https://api.test/v1/chat/completions")
+
+
+def _status_error(status, message="error", headers=None):
+    response = httpx.Response(status, request=REQUEST, headers=headers, json={"error": {"message": message}})
+    error_type = {400: openai.BadRequestError, 401: openai.AuthenticationError, 403: openai.PermissionDeniedError,
+                  429: openai.RateLimitError}.get(status, openai.InternalServerError)
+    return error_type(message, response=response, body=None)
+
+
+def _wrapped(exc):
+    """与引擎一致：原始异常作为 __cause__ 包装在通用异常中"""
+    error = Exception(f"API调用失败: {exc}")
+    error.__cause__ = exc
+    return error
+
+
+@pytest.mark.parametrize("exc, category", [
+    (_status_error(429), RATE_LIMIT),
+    (_status_error(503), SERVER_ERROR),
+    (openai.APITimeoutError(REQUEST), TIMEOUT),
+    (asyncio.TimeoutError(), TIMEOUT),
+    (openai.APIConnectionError(request=REQUEST), CONNECTION),
+    (_status_error(400, "This model's maximum context length is 65536 tokens"), CONTEXT_LENGTH),
+    (_status_error(400, "invalid temperature"), BAD_REQUEST),
+    (_status_error(401), AUTH),
+    (_status_error(403), AUTH),
+    (ValueError("API返回空内容"), EMPTY_RESPONSE),
+    (RuntimeError("其他错误"), UNKNOWN),
+])
+def test_classify_error_follows_exception_chain(exc, category):
+    assert classify_error(exc) == category
+    assert classify_error(_wrapped(exc)) == category
+
+
+def test_parse_retry_after_formats_and_clamp():
+    assert parse_retry_after(_status_error(429, headers={"retry-after-ms": "1500"})) == 1.5
+    assert parse_retry_after(_status_error(429, headers={"retry-after": "3"})) == 3.0
+    retry_at = email.utils.formatdate(time.time() + 10, usegmt=True)
+    assert parse_retry_after(_status_error(429, headers={"retry-after": retry_at})) == pytest.approx(10, abs=1.5)
+    # 异常的响应头不会让分块无限期等待
+    assert parse_retry_after(_status_error(429, headers={"retry-after": "86400"}), max_wait=30) == 30
+    assert parse_retry_after(_status_error(429, headers={"retry-after": "-5"})) == 0.0
+    assert parse_retry_after(_status_error(429, headers={"retry-after": "soon"})) is None
+    assert parse_retry_after(_status_error(429)) is None
+    assert parse_retry_after(RuntimeError("no response")) is None
+
+
+def test_decide_by_category():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4)
+    assert policy.decide(_wrapped(_status_error(401)), 0).action == FAIL
+    assert policy.decide(_status_error(400, "maximum context length exceeded"), 0).action == RESPLIT
+    assert policy.decide(_status_error(400, "bad"), 0).action == RESPLIT
+
+    decision = policy.decide(_status_error(503), 0)
+    assert decision.action == RETRY and 0.5 <= decision.delay <= 1.0
+    assert policy.decide(_status_error(503), 5).delay <= 4  # 退避不超过单次等待上限
+    assert policy.decide(_status_error(429, headers={"retry-after": "2"}), 0).delay == 2.0
+    assert policy.decide(_status_error(429, headers={"retry-after": "600"}), 0).delay == 4
+    # 单个分块连续失败后转入分块降级
+    assert policy.decide(_status_error(503), 3).action == RESPLIT
+
+
+def test_exhausted_budget_fails_congestion_instead_of_resplitting():
+    policy = RetryPolicy()
+    budget = RetryBudget(limit=1)
+    assert policy.decide(_status_error(429), 0, budget).action == RETRY
+    assert budget.remaining == 0
+    for exc in (_status_error(429), _status_error(502), openai.APITimeoutError(REQUEST)):
+        decision = policy.decide(_wrapped(exc), 0, budget)
+        assert decision.action == FAIL
+    assert policy.decide(ValueError("API返回空内容"), 0, budget).action == RESPLIT
+    assert policy.decide(_status_error(400, "too many tokens"), 0, budget).action == RESPLIT
+
+
+def test_safe_translate_retries_server_error(make_engine, fake_api, file_hash):
+    engine = make_engine()
+    engine.retry_policy.base_delay = 0.01
+    fake_api.reply = lambda body: (httpx.Response(503, json={"error": {"message": "busy"}})
+                                   if len(fake_api.requests) == 1 else "译文：完成")
+
+    result, _ = asyncio.run(engine.safe_translate("第1段。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash))
+    assert result == "译文：完成"
+    assert len(fake_api.requests) == 2
+    assert engine.retry_budget.used == 1
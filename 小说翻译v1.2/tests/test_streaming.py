@@ -0,0 +1,104 @@
+# tests/test_streaming.py
+"""流式响应的增量拼接、部分结果回调与停滞检测（使用 conftest.FakeAPI 的SSE响应）"""
+
+import asyncio
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from config.settings import STREAM_CONFIG
+from translation.streaming import STAGE_FIRST_TOKEN, STAGE_IDLE, StreamStallError, collect_stream
+
+
+def _open_stream(fake_api, text="字" * 24):
+    client = AsyncOpenAI(api_key="sk-test", base_url="http://test/v1", max_retries=0,
+                         http_client=httpx.AsyncClient(transport=fake_api.transport))
+    return client.chat.completions.create(
+        model="deepseek-chat", stream=True, stream_options={"include_usage": True},
+        messages=[{"role": "user", "content": "需要翻译的文本：\n" + text}]
+    )
+
+
+def test_stream_deltas_are_assembled_into_one_response(make_engine, fake_api, file_hash, monkeypatch):
+    engine = make_engine()
+    monkeypatch.setitem(STREAM_CONFIG, "ENABLED", True)
+    partials = []
+
+    result = asyncio.run(engine.translate_with_context(
+        "第一段很长的正文。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash, stream_callback=partials.append
+    ))
+
+    assert result == "译文：第一段很长的正文。"
+    assert fake_api.requests[0]["stream"] is True
+    assert fake_api.requests[0]["stream_options"] == {"include_usage": True}
+    assert partials[-1] == "译文：第一段很长的正文。"
+    assert all(result.startswith(partial) for partial in partials)
+
+
+def test_stream_callback_is_throttled(fake_api):
+    fake_api.stream_gaps = [0.0] * 3 + [0.05] * 3
+    partials = []
+
+    async def run():
+        stream = await _open_stream(fake_api)
+        return await collect_stream(stream, partials.append, interval=0.04)
+
+    response = asyncio.run(run())
+    assert response.choices[0].message.content == "译文：" + "字" * 24
+    assert response.choices[0].finish_reason == "stop"
+    assert response.usage.total_tokens == 150
+    # 7个增量块：前3块连续到达只回调第一块，之后3块间隔超过节流时间各回调一次，
+    # 最后一块紧随其后不回调，结束时再回调完整结果
+    assert len(partials) == 5
+
+
+def test_slow_first_token_aborts_stream(fake_api):
+    fake_api.stream_gaps = [0.5]
+
+    async def run():
+        stream = await _open_stream(fake_api)
+        await collect_stream(stream, first_token_timeout=0.1, idle_timeout=1.0)
+
+    with pytest.raises(StreamStallError) as excinfo:
+        asyncio.run(run())
+    assert excinfo.value.stage == STAGE_FIRST_TOKEN
+    assert excinfo.value.timeout == 0.1
+
+
+def test_idle_gap_after_first_token_aborts_stream(fake_api):
+    fake_api.stream_gaps = [0.0, 0.0, 0.5]
+
+    async def run():
+        stream = await _open_stream(fake_api)
+        await collect_stream(stream, first_token_timeout=1.0, idle_timeout=0.1)
+
+    with pytest.raises(StreamStallError) as excinfo:
+        asyncio.run(run())
+    assert excinfo.value.stage == STAGE_IDLE
+
+
+def test_gaps_below_thresholds_are_recorded_in_stats(fake_api):
+    fake_api.stream_gaps = [0.05, 0.0, 0.05]
+
+    async def run():
+        stream = await _open_stream(fake_api)
+        return await collect_stream(stream, first_token_timeout=1.0, idle_timeout=1.0)
+
+    stats = asyncio.run(run()).stream_stats
+    assert stats.first_token >= 0.05
+    assert 0.05 <= stats.max_gap < 1.0
+    assert stats.duration >= stats.first_token + stats.max_gap
+
+
+def test_engine_counts_stall_and_raises(make_engine, fake_api, file_hash, monkeypatch):
+    engine = make_engine()
+    monkeypatch.setitem(STREAM_CONFIG, "ENABLED", True)
+    engine.stall_monitor.idle_timeout = 0.1
+    fake_api.stream_gaps = [0.0, 0.5]
+
+    with pytest.raises(Exception, match="流式响应停滞"):
+        asyncio.run(engine.translate_with_context(
+            "第一段很长的正文。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash
+        ))
+    assert engine.stall_monitor.summary()["stalls"] == {STAGE_FIRST_TOKEN: 0, STAGE_IDLE: 1}
@@ -0,0 +1,58 @@
+# tests/test_token_counter.py
+"""Token计数器（估算、分词器回退）与按Token预算分块"""
+
+import sys
+
+import pytest
+
+from config.settings import TOKENIZER_CONFIG
+from file_processor import token_counter
+from file_processor.file_handler import dynamic_split
+from file_processor.token_counter import EstimateTokenCounter, ByteLengthCounter
+from translation.rate_limiter import estimate_tokens
+
+
+def test_estimator_weights_cjk_and_other_characters():
+    counter = EstimateTokenCounter(cjk_ratio=0.6, other_ratio=0.3)
+    assert counter.count("这是十个中文字符测试") == 6
+    assert counter.count("ひらがなカタカナ") == 4  # 假名按中日韩字符计
+    assert counter.count("hello world") == 3
+    assert counter.count("你好, world") == 1 + 2  # 2×0.6 + 7×0.3 = 3.3
+    assert counter.count("") == 1
+
+
+def test_missing_tokenizer_file_falls_back_to_estimate(monkeypatch, tmp_path):
+    monkeypatch.setitem(TOKENIZER_CONFIG, "COUNTER", "tokenizer")
+    monkeypatch.setitem(TOKENIZER_CONFIG, "TOKENIZER_FILE", str(tmp_path / "missing.json"))
+    assert isinstance(token_counter._create_counter(), EstimateTokenCounter)
+
+
+def test_uninstalled_tokenizers_falls_back_to_estimate(monkeypatch, tmp_path):
+    tokenizer_file = tmp_path / "tokenizer.json"
+    tokenizer_file.write_text("{}", encoding="utf-8")
+    monkeypatch.setitem(TOKENIZER_CONFIG, "COUNTER", "tokenizer")
+    monkeypatch.setitem(TOKENIZER_CONFIG, "TOKENIZER_FILE", str(tokenizer_file))
+    monkeypatch.setitem(sys.modules, "tokenizers", None)  # 导入时抛出ImportError
+    assert isinstance(token_counter._create_counter(), EstimateTokenCounter)
+
+
+def test_rate_limiter_estimate_uses_shared_counter(monkeypatch):
+    monkeypatch.setattr(token_counter, "_counter", ByteLengthCounter())
+    assert estimate_tokens("中文") == 6
+
+
+@pytest.mark.parametrize("max_tokens", [50, 150])
+def test_dynamic_split_respects_token_budget(max_tokens):
+    counter = EstimateTokenCounter(cjk_ratio=1, other_ratio=1)  # 按字符计数，便于精确核对
+    paragraphs = [f"第{i}段。" + "这是一句用于测试分块的中文句子。" * (i % 4 + 1) for i in range(20)]
+    chunks = dynamic_split(paragraphs, "zh", max_tokens, counter)
+    assert len(chunks) > 1
+    assert all(counter.count(chunk) <= max_tokens for chunk in chunks)
+    # 超长段落按句切分时会在句尾补换行，除此之外内容完整且顺序不变
+    assert "".join(chunks).replace("\n", "") == "".join(paragraphs)
+
+
+def test_dynamic_split_sizes_cjk_by_tokens_not_bytes():
+    text = "这是一句用于测试分块的中文句子。" * 100  # 1600个字符：约960 Token、4800字节
+    assert len(dynamic_split(text, "zh", 1000, EstimateTokenCounter())) == 1
+    assert len(dynamic_split(text, "zh", 1000, ByteLengthCounter())) > 1
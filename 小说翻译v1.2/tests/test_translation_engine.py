@@ -0,0 +1,303 @@
+# tests/test_translation_engine.py
+"""AsyncTranslationEngine 的行为测试（使用 conftest.FakeAPI 模拟接口）"""
+
+import asyncio
+import math
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from conftest import USAGE, FakeWorker, source_text
+from config.settings import FILE_HANDLER_CONFIG, OUTPUT_BUDGET_CONFIG
+from translation.rate_limiter import estimate_tokens
+
+
+def test_wait_if_paused_stays_on_loop_when_not_paused(make_engine, monkeypatch):
+    engine = make_engine()
+    engine.worker = FakeWorker()
+    calls = []
+    original = asyncio.to_thread
+    monkeypatch.setattr(asyncio, "to_thread", lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs))
+
+    async def run():
+        for _ in range(100):
+            await engine._wait_if_paused()
+
+    asyncio.run(run())
+    assert calls == []
+    assert engine.worker.waits == 0
+
+
+def test_paused_chunks_share_one_waiting_thread(make_engine, fake_api, file_hash):
+    engine = make_engine()
+    worker = engine.worker = FakeWorker()
+    worker.pause()
+
+    async def run():
+        tasks = [asyncio.create_task(engine.safe_translate(f"第{i}段。", "中文", "standard", 1.0, "DeepSeek-V3",
+                                                           file_hash)) for i in range(20)]
+        await asyncio.sleep(0.2)
+        assert fake_api.requests == []
+        assert worker.waits == 1
+        worker.resume()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(run())
+    assert [result for result, _ in results] == [f"译文：第{i}段。" for i in range(20)]
+    assert len(fake_api.requests) == 20
+
+
+def test_cancel_during_rate_limit_wait_releases_key_and_refunds(make_engine):
+    engine = make_engine()
+    slot = engine.key_pool.slots[0]
+    limiter = slot.rate_limiter
+    limiter.request_bucket.tokens = -5  # RPM桶欠额，acquire需要等待约0.5秒
+    capacity = limiter.token_bucket.capacity
+    messages = engine._build_prompt("zh", "standard", "", "第1段。")
+
+    async def run():
+        task = asyncio.create_task(engine._request_completion("DeepSeek-V3", messages, 1.0))
+        await asyncio.sleep(0.1)
+        assert slot.in_flight == 1
+        assert limiter.token_bucket.tokens < capacity
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert slot.in_flight == 0
+    assert limiter.token_bucket.tokens == pytest.approx(capacity)
+    assert engine.concurrency.in_flight == 0
+
+
+def test_key_in_flight_counts_only_admitted_requests(make_engine, fake_api):
+    engine = make_engine(max_concurrency=1)
+    fake_api.delay = 0.05
+    slot = engine.key_pool.slots[0]
+    samples = []
+    messages = engine._build_prompt("zh", "standard", "", "第1段。")
+
+    async def sample():
+        while True:
+            samples.append(slot.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        sampler = asyncio.create_task(sample())
+        await asyncio.gather(*(engine._request_completion("DeepSeek-V3", messages, 1.0) for _ in range(5)))
+        sampler.cancel()
+
+    asyncio.run(run())
+    assert len(fake_api.requests) == 5
+    assert max(samples) == 1
+
+
+def _enable_hedging(engine):
+    policy = engine.hedge_policy
+    policy.enabled, policy.min_samples, policy.min_delay, policy.max_ratio = True, 1, 0.05, 1.0
+    policy.record_latency(0.01)
+
+
+def test_cancelled_hedge_loser_is_recorded_as_estimate(make_engine, fake_api):
+    engine = make_engine()
+    _enable_hedging(engine)
+    fake_api.delay = lambda body: 1.0 if len(fake_api.requests) == 1 else 0.0  # 主请求卡住，对冲请求立即返回
+    messages = engine._build_prompt("zh", "standard", "", "第1段。")
+
+    async def run():
+        result = await engine._hedged_completion("DeepSeek-V3", messages, 1.0)
+        await asyncio.sleep(0.05)  # 等待落败请求完成取消
+        return result
+
+    response, _, _ = asyncio.run(run())
+    assert response.choices[0].message.content == "译文：第1段。"
+    assert len(fake_api.requests) == 2
+    stats = engine.hedge_policy.summary()
+    assert stats["hedge_wins"] == 1
+    assert stats["duplicate_tokens"] == 0
+    assert stats["estimated_duplicate_tokens"] > 0
+    summary = engine.ledger.run_summary()  # 胜出请求按实际用量，落败请求按预估的输入Token
+    assert summary["prompt"] > 100 and summary["completion"] == 50
+    assert 0 < summary["estimated_cost"] < summary["cost"]
+    assert engine.key_pool.slots[0].in_flight == 0
+
+
+def test_finished_hedge_loser_counts_actual_usage(make_engine):
+    engine = make_engine()
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+
+    async def finished():
+        return SimpleNamespace(usage=usage), 0.0, "DeepSeek-V3"
+
+    async def run():
+        loser = asyncio.create_task(finished())
+        await loser
+        started = asyncio.Event()
+        started.set()
+        engine._account_hedge_loser(loser, started, 90)
+
+    asyncio.run(run())
+    stats = engine.hedge_policy.summary()
+    assert stats["duplicate_tokens"] == 150
+    assert stats["estimated_duplicate_tokens"] == 0
+    assert engine.ledger.run_summary()["prompt"] == 0  # 台账由 _request_completion 记录，这里不重复记录
+
+
+def test_fallback_caches_stitched_text_before_restoring(make_engine, fake_api, file_hash, monkeypatch):
+    from translation.translation_engine import cache
+
+    monkeypatch.setitem(FILE_HANDLER_CONFIG["CHUNKING"], "FALLBACK_MAX_TOKENS", 10)  # 每句一个子块
+    engine = make_engine()
+    # 整块请求超出上下文长度（转入分块降级），子块请求正常返回
+    fake_api.reply = lambda body: (
+        httpx.Response(400, json={"error": {"message": "This model's maximum context length is 65536 tokens"}})
+        if len(fake_api.requests) == 1 else "译文：" + source_text(body)
+    )
+    first, second = "她付了100円，这是第一句话。", "这是第二句话，也不太短。"
+    text = first + second
+
+    async def run():
+        return await engine.safe_translate(text, "日语", "standard", 1.0, "DeepSeek-V3", file_hash)
+
+    result, _ = asyncio.run(run())
+    assert result == f"译文：{first}\n译文：{second}"
+    assert len(fake_api.requests) == 3
+    assert cache.get(text, "ja", "standard", file_hash) == f"译文：{first.replace('100円', '￥100')}\n译文：{second}"
+
+    cached, _ = asyncio.run(run())
+    assert cached == result
+    assert len(fake_api.requests) == 3
+
+
+def test_truncation_after_continuations_falls_back_to_split(make_engine, fake_api, file_hash, monkeypatch):
+    from translation.translation_engine import cache
+
+    monkeypatch.setitem(OUTPUT_BUDGET_CONFIG, "MAX_CONTINUATIONS", 0)
+    monkeypatch.setitem(FILE_HANDLER_CONFIG["CHUNKING"], "FALLBACK_MAX_TOKENS", 10)  # 每句一个子块
+    engine = make_engine()
+    # 整块请求被截断且不允许续写（转入分块降级），子块请求正常返回
+    fake_api.reply = lambda body: ("半截", "length") if len(fake_api.requests) == 1 else "译文：" + source_text(body)
+    first, second = "她付了100円，这是第一句话。", "这是第二句话，也不太短。"
+    text = first + second
+
+    async def run():
+        return await engine.safe_translate(text, "日语", "standard", 1.0, "DeepSeek-V3", file_hash)
+
+    result, _ = asyncio.run(run())
+    assert result == f"译文：{first}\n译文：{second}"
+    assert len(fake_api.requests) == 3
+    assert cache.get(text, "ja", "standard", file_hash) == f"译文：{first.replace('100円', '￥100')}\n译文：{second}"
+    assert engine.output_budget.summary()["truncated"] == 1
+
+
+def test_identical_chunks_in_flight_share_one_request(make_engine, fake_api, file_hash):
+    engine = make_engine()
+    fake_api.delay = 0.1
+
+    async def run():
+        return await asyncio.gather(*(
+            engine.safe_translate("同じ段落。100円。", "日语", "standard", 1.0, "DeepSeek-V3", file_hash)
+            for _ in range(5)
+        ))
+
+    results = asyncio.run(run())
+    assert len(fake_api.requests) == 1
+    assert [result for result, _ in results] == ["译文：同じ段落。100円。"] * 5
+    assert engine.hit_stats["coalesced"] == 4
+    assert engine._inflight == {}
+
+
+def test_coalesced_waiters_retry_after_failure(make_engine, fake_api, file_hash):
+    engine = make_engine()
+    engine.retry_policy.base_delay = 0.01
+    fake_api.delay = 0.05
+    # 第一个请求返回空内容（失败），等待者各自重试，重试请求再次合并
+    fake_api.reply = lambda body: "" if len(fake_api.requests) == 1 else "译文：" + source_text(body)
+
+    async def run():
+        return await asyncio.gather(*(
+            engine.safe_translate("失败的段落。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash)
+            for _ in range(3)
+        ))
+
+    results = asyncio.run(run())
+    assert [result for result, _ in results] == ["译文：失败的段落。"] * 3
+    assert len(fake_api.requests) == 2
+    assert engine._inflight == {}
+
+
+def test_setup_failure_leaves_no_inflight_entry(make_engine, fake_api, file_hash, monkeypatch):
+    engine = make_engine()
+    build_prompt = engine._build_prompt
+    monkeypatch.setattr(engine, "_build_prompt", lambda *args: {}["未知风格"])
+
+    async def run():
+        return await engine.translate_with_context("准备失败的段落。", "zh", "standard", 1.0, "DeepSeek-V3", file_hash)
+
+    with pytest.raises(KeyError):
+        asyncio.run(run())
+    assert engine._inflight == {}
+    assert fake_api.requests == []
+
+    # 登记项未残留，相同分块的下一次请求正常发送而不是等待永不完成的结果
+    monkeypatch.setattr(engine, "_build_prompt", build_prompt)
+    assert asyncio.run(asyncio.wait_for(run(), 5)) == "译文：准备失败的段落。"
+    assert len(fake_api.requests) == 1
+
+
+def test_unknown_model_leaves_no_inflight_entry(make_engine, fake_api, file_hash):
+    engine = make_engine()
+
+    async def run(model_name):
+        return await engine.translate_with_context("未知模型的段落。", "zh", "standard", 1.0, model_name, file_hash)
+
+    # "自动"需由路由器先换成具体模型，直接传入时计算max_tokens就会失败
+    with pytest.raises(KeyError):
+        asyncio.run(run("自动"))
+    assert engine._inflight == {}
+    assert fake_api.requests == []
+
+    assert asyncio.run(asyncio.wait_for(run("DeepSeek-V3"), 5)) == "译文：未知模型的段落。"
+
+
+def test_request_max_tokens_follows_output_budget(make_engine, fake_api, file_hash):
+    engine = make_engine()
+    text = "这是一句用于测试输出上限的中文句子。" * 200
+    pair = engine.output_budget.pair(text, "zh", "standard")
+    engine.output_budget.ratios[pair] = {"ratio": 2.0, "samples": 5}
+
+    asyncio.run(engine.translate_with_context(text, "zh", "standard", 1.0, "DeepSeek-V3", file_hash))
+    expected = math.ceil(estimate_tokens(text) * 2.0 * OUTPUT_BUDGET_CONFIG["SAFETY_FACTOR"])
+    assert OUTPUT_BUDGET_CONFIG["MIN_TOKENS"] < expected < OUTPUT_BUDGET_CONFIG["MAX_TOKENS"]
+    assert fake_api.requests[0]["max_tokens"] == expected
+
+
+def test_stitch_continuation_requires_minimum_overlap():
+    from translation.translation_engine import AsyncTranslationEngine
+    stitch = AsyncTranslationEngine._stitch_continuation
+    assert stitch("He said\n", "\nThe end") == "He said\n\nThe end"
+    assert stitch("她说。", "。然后") == "她说。。然后"
+    assert stitch("他推开门，慢慢地走进了昏暗的房间。", "慢慢地走进了昏暗的房间。屋里很暗。") == "他推开门，慢慢地走进了昏暗的房间。屋里很暗。"
+    assert stitch("前半部分", "") == "前半部分"
+
+
+def test_truncated_response_is_continued_and_stitched(make_engine, fake_api, file_hash):
+    from translation.translation_engine import cache
+
+    engine = make_engine()
+    replies = iter([("他推开门，慢慢地走进了昏暗的房间。", "length"), ("慢慢地走进了昏暗的房间。屋里很暗。", "stop")])
+    fake_api.reply = lambda body: next(replies)
+
+    async def run():
+        return await engine.safe_translate("彼はドアを開けた。", "中文", "standard", 1.0, "DeepSeek-V3", file_hash)
+
+    result, _ = asyncio.run(run())
+    assert result == "他推开门，慢慢地走进了昏暗的房间。屋里很暗。"
+    assert cache.get("彼はドアを開けた。", "zh", "standard", file_hash) == result
+    # 续写请求保留原消息前缀，已输出的译文作为assistant消息
+    assert fake_api.requests[1]["messages"][:-2] == fake_api.requests[0]["messages"]
+    assert fake_api.requests[1]["messages"][-2] == {"role": "assistant", "content": "他推开门，慢慢地走进了昏暗的房间。"}
+    # 两次请求都记入台账，前缀缓存统计按合并后的用量
+    assert engine.ledger.run_summary()["prompt"] == 2 * USAGE["prompt_tokens"]
+    assert engine.prompt_cache_stats["hit"] == 2 * USAGE["prompt_cache_hit_tokens"]
+    assert engine.output_budget.summary()["continuations"] == 1
@@ -0,0 +1,318 @@
+# translation/batch_job.py
+"""
+离线批量翻译模块
+功能：将一个或多个文件的分块整理为服务商批量任务（JSONL请求文件），提交后轮询结果，
+     写回翻译缓存并按常规方式输出译文文件
+核心机制：
+- 分块与提示词构造复用交互翻译流程，缓存键保持一致，已缓存的分块不再提交
+- 任务状态持久化到状态文件，程序重启后可继续轮询与收取结果
+- 批量结果中缺失或失败的分块可回退到在线翻译补齐
+- 缓存写入未还原格式的译文（与在线翻译一致），输出前统一还原
+- 接口地址可配置，便于对接本地模拟的批量接口进行测试
+"""
+
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from openai import OpenAI
+
+from config.settings import API_CONFIG, BATCH_CONFIG, ROUTER_CONFIG
+from file_processor.file_handler import get_file_hash, split_file, save_as_word, save_as_txt
+from translation.rate_limiter import estimate_tokens
+from translation.translation_engine import cache
+
+logger = logging.getLogger("BatchJob")
+
+# 批量任务的终止状态
+FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+# 状态文件中的阶段
+PHASE_SUBMITTED = "submitted"
+PHASE_COLLECTED = "collected"
+
+
+def create_batch_client(api_key, base_url=None):
+    """创建批量接口使用的同步客户端
+    :param api_key: API密钥
+    :param base_url: 批量接口地址，默认读取 BATCH_CONFIG，未配置时沿用 API_CONFIG
+    :return: OpenAI实例
+    """
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url or BATCH_CONFIG["BASE_URL"] or API_CONFIG["BASE_URL"],
+        timeout=API_CONFIG["TIMEOUT"],
+    )
+
+
+class BatchTranslationJob:
+    """离线批量翻译任务
+
+    用法：
+        job = BatchTranslationJob(engine, client)
+        if not job.has_pending():
+            job.submit(["book.txt"], "中文", "标准", 1.3, "DeepSeek-V3")
+        job.poll()
+        output_paths = job.collect()
+
+    属性：
+    - engine: 同步翻译引擎，用于构造提示词、自动路由模型与在线回退
+    - client: 批量接口客户端
+    - state_file: 任务状态文件路径
+    - state: 当前任务状态（None表示没有任务）
+    """
+
+    def __init__(self, engine, client, state_file=BATCH_CONFIG["STATE_FILE"]):
+        self.engine = engine
+        self.client = client
+        self.state_file = state_file
+        self.state = self._load_state()
+
+    # ---------- 状态持久化 ---------- #
+    def _load_state(self):
+        """读取状态文件，不存在时返回None"""
+        if not os.path.exists(self.state_file):
+            return None
+        with open(self.state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self):
+        """原子写入状态文件，避免中途退出导致文件损坏"""
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_file, self.state_file)
+
+    def has_pending(self):
+        """是否存在尚未收取结果的任务"""
+        return self.state is not None and self.state["phase"] != PHASE_COLLECTED
+
+    # ---------- 提交 ---------- #
+    def submit(self, sources, language, style, temperature, model_name, output_dir=None, word=False):
+        """分块并提交批量任务
+        :param sources: 源文件路径列表（.txt/.docx）
+        :param language: 目标语言名称（如"中文"）
+        :param style: 翻译风格名称（如"标准"）
+        :param temperature: 温度值
+        :param model_name: 模型名称，为"自动"时按分块路由
+        :param output_dir: 输出目录，默认与源文件相同
+        :param word: 是否输出为Word文档
+        :return: 任务状态字典
+        :raises RuntimeError: 已有未完成的任务时抛出
+        """
+        if self.has_pending():
+            raise RuntimeError(f"已有未完成的批量任务: {self.state.get('batch_id')}，请先继续该任务")
+
+        target_lang = self.engine.language_map[language]
+        style_code = self.engine.style_map[style]
+        files, lines = [], []
+        for file_index, source in enumerate(sources):
+            file_hash = get_file_hash(source)
+            chunks = split_file(source, target_lang)
+            entries = []
+            for chunk_index, chunk in enumerate(chunks):
+                entry = {"custom_id": f"{file_index}-{chunk_index}", "text": chunk}
+                entries.append(entry)
+                if cache.get(chunk, target_lang, style_code, file_hash):
+                    continue
+                chunk_model = model_name
+                if model_name == ROUTER_CONFIG["AUTO_MODEL"]:
+                    chunk_model = self.engine.router.route(chunk)
+                previous_chunk = chunks[chunk_index - 1] if chunk_index > 0 else ""
+                messages, replacements = self.engine.prepare_prompt(chunk, target_lang, style_code, previous_chunk)
+                max_tokens = self.engine.output_budget.max_tokens(
+                    self.engine.output_budget.pair(chunk, target_lang, style_code),
+                    estimate_tokens(chunk), self.engine.model_map[chunk_model]
+                )
+                entry.update(model=chunk_model, replacements=replacements)
+                lines.append(json.dumps({
+                    "custom_id": entry["custom_id"],
+                    "method": "POST",
+                    "url": BATCH_CONFIG["ENDPOINT"],
+                    "body": {
+                        "model": self.engine.model_map[chunk_model],
+                        "messages": messages,
+                        "temperature": float(temperature),
+                        "max_tokens": max_tokens,
+                    },
+                }, ensure_ascii=False))
+            files.append({
+                "source": source,
+                "file_hash": file_hash,
+                "output_path": self._output_path(source, output_dir, word),
+                "word": word,
+                "chunks": entries,
+            })
+            logger.info("[BatchJob] 文件分块完成 | %s | 分块数: %d", os.path.basename(source), len(chunks))
+
+        self.state = {
+            "phase": PHASE_SUBMITTED,
+            "batch_id": None,
+            "status": None,
+            "created_at": time.time(),
+            "target_lang": target_lang,
+            "style": style_code,
+            "temperature": float(temperature),
+            "model": model_name,
+            "files": files,
+        }
+        if lines:
+            payload = ("\n".join(lines) + "\n").encode("utf-8")
+            input_file = self.client.files.create(file=("batch_input.jsonl", io.BytesIO(payload)), purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=BATCH_CONFIG["ENDPOINT"],
+                completion_window=BATCH_CONFIG["COMPLETION_WINDOW"],
+            )
+            self.state.update(batch_id=batch.id, input_file_id=input_file.id, status=batch.status)
+            logger.info("[BatchJob] 批量任务已提交 | ID: %s | 请求数: %d", batch.id, len(lines))
+        else:
+            self.state["status"] = "completed"
+            logger.info("[BatchJob] 所有分块均已缓存，无需提交批量任务")
+        self._save_state()
+        return self.state
+
+    @staticmethod
+    def _output_path(source, output_dir, word):
+        """生成输出路径（与交互翻译的命名规则一致）"""
+        output_dir = output_dir or os.path.dirname(os.path.abspath(source))
+        os.makedirs(output_dir, exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(source))[0]
+        ext = '.docx' if word else '.txt'
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(output_dir, f"{base_name}_translated_{timestamp}{ext}")
+
+    # ---------- 轮询 ---------- #
+    def poll(self, interval=BATCH_CONFIG["POLL_INTERVAL"], timeout=None):
+        """轮询批量任务直到结束
+        :param interval: 轮询间隔（秒）
+        :param timeout: 最长等待时间（秒），None表示一直等待
+        :return: 最终状态字符串
+        :raises TimeoutError: 超过最长等待时间仍未结束时抛出（任务状态已保存，可稍后继续）
+        """
+        if self.state is None:
+            raise RuntimeError("没有可轮询的批量任务")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.state["status"] not in FINAL_STATUSES:
+            batch = self.client.batches.retrieve(self.state["batch_id"])
+            self.state.update(status=batch.status, output_file_id=batch.output_file_id,
+                              error_file_id=batch.error_file_id)
+            self._save_state()
+            counts = batch.request_counts
+            logger.info("[BatchJob] 任务状态: %s | 完成: %s/%s | 失败: %s", batch.status,
+                        counts.completed if counts else "-", counts.total if counts else "-",
+                        counts.failed if counts else "-")
+            if batch.status in FINAL_STATUSES:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"批量任务 {self.state['batch_id']} 尚未完成，稍后可继续轮询")
+            time.sleep(interval)
+        return self.state["status"]
+
+    # ---------- 收取结果 ---------- #
+    def _download_results(self):
+        """下载批量结果
+        :return: {custom_id: (译文原文, 接口模型名, Token用量)}，仅包含成功且未被截断的请求
+        """
+        results = {}
+        output_file_id = self.state.get("output_file_id")
+        if not output_file_id:
+            return results
+        for line in self.client.files.content(output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                logger.warning("[BatchJob] 请求失败 | %s | %s", record.get("custom_id"),
+                               record.get("error") or response.get("status_code"))
+                continue
+            choice = response["body"]["choices"][0]
+            if choice.get("finish_reason") == "length":
+                # 截断的结果按缺失处理，由在线回退续写补齐
+                logger.warning("[BatchJob] 结果被截断 | %s", record.get("custom_id"))
+                continue
+            content = choice["message"]["content"]
+            if content:
+                body = response["body"]
+                usage = SimpleNamespace(**body["usage"]) if body.get("usage") else None
+                results[record["custom_id"]] = (content, body.get("model"), usage)
+        return results
+
+    def collect(self, fallback_online=BATCH_CONFIG["FALLBACK_ONLINE"]):
+        """收取结果：写回缓存、补齐缺失分块并输出译文文件
+        :param fallback_online: 批量结果缺失的分块是否回退到在线翻译
+        :return: 输出文件路径列表
+        :raises RuntimeError: 任务未结束或存在无法补齐的分块时抛出
+        """
+        if self.state is None or self.state["status"] not in FINAL_STATUSES:
+            raise RuntimeError("批量任务尚未结束，无法收取结果")
+        results = self._download_results()
+        # 批量结果与在线回退的用量记入同一次台账运行，任务名为源文件名
+        self.engine.begin_job(", ".join(os.path.basename(f["source"]) for f in self.state["files"]))
+        target_lang = self.state["target_lang"]
+        style = self.state["style"]
+
+        output_paths = []
+        for file_entry in self.state["files"]:
+            file_hash = file_entry["file_hash"]
+            chunks = file_entry["chunks"]
+            translated_chunks = []
+            for index, entry in enumerate(chunks):
+                text = entry["text"]
+                replacements = entry.get("replacements", {})
+                if entry["custom_id"] in results:
+                    content, model, usage = results[entry["custom_id"]]
+                    self.engine.record_usage(model, usage, cache.get_key(text, target_lang, style, file_hash))
+                    result = self.engine.clean_result(content)
+                    cache.set(text, target_lang, style, result, file_hash)
+                    translated = self.engine.restore_formatting(result, replacements, target_lang)
+                elif cached := cache.get(text, target_lang, style, file_hash):
+                    translated = self.engine.restore_formatting(cached, replacements, target_lang)
+                else:
+                    if not fallback_online:
+                        raise RuntimeError(f"分块 {entry['custom_id']} 没有批量结果")
+                    logger.warning("[BatchJob] 分块 %s 无批量结果，回退在线翻译", entry["custom_id"])
+                    previous_chunk = chunks[index - 1]["text"] if index > 0 else ""
+                    translated, _ = self.engine.safe_translate(
+                        text, self._language_name(target_lang), style, self.state["temperature"],
+                        entry.get("model", self.state["model"]), file_hash, previous_chunk
+                    )
+                translated_chunks.append(translated)
+
+            if file_entry["word"]:
+                save_as_word(translated_chunks, file_entry["output_path"])
+            else:
+                save_as_txt(translated_chunks, file_entry["output_path"])
+            output_paths.append(file_entry["output_path"])
+            logger.info("[BatchJob] 译文已保存 | %s", file_entry["output_path"])
+
+        cache.save_cache(force=True)
+        self.engine.ledger.flush()
+        self.state["phase"] = PHASE_COLLECTED
+        self._save_state()
+        return output_paths
+
+    def _language_name(self, target_lang):
+        """由语言代码反查语言名称（safe_translate接收语言名称）"""
+        for name, code in self.engine.language_map.items():
+            if code == target_lang:
+                return name
+        return target_lang
+
+    def summary(self):
+        """导出任务概况
+        :return: 包含任务ID、状态、阶段、文件数与分块数的字典
+        """
+        if self.state is None:
+            return None
+        return {
+            "batch_id": self.state["batch_id"],
+            "status": self.state["status"],
+            "phase": self.state["phase"],
+            "files": len(self.state["files"]),
+            "chunks": sum(len(f["chunks"]) for f in self.state["files"]),
+        }
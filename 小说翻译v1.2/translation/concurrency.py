@@ -0,0 +1,146 @@
+# translation/concurrency.py
+"""
+自适应并发控制模块
+功能：根据API实际表现动态调整同时在途的请求数（AIMD：加性增、乘性减）
+核心机制：
+- 延迟接近基线时，每完成约一个"窗口"（当前上限个）请求将上限加一
+- 遇到429/5xx/超时时将上限按系数乘性下调，并设置冷却期避免同一波失败连续下调
+- 延迟按Token数归一化，避免长短分块之间的耗时差异干扰判断
+- 记录每次调整的原因，便于在真实负载下调参
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from config.settings import API_CONFIG, CONCURRENCY_CONFIG
+from translation.errors import classify_error, CONGESTION_ERRORS
+
+logger = logging.getLogger("Concurrency")
+
+
+class AdaptiveConcurrencyController:
+    """AIMD自适应并发控制器
+
+    属性：
+    - limit: 当前允许的在途请求上限
+    - in_flight: 当前在途请求数
+    - history: 上限调整记录，元素为 (时间戳, 原上限, 新上限, 原因)
+
+    用法：
+        async with controller:
+            ...  # 发起API请求
+    """
+
+    def __init__(self, initial_limit=API_CONFIG["MAX_CONCURRENCY"], config=CONCURRENCY_CONFIG):
+        """初始化控制器
+        :param initial_limit: 初始并发上限
+        :param config: 自适应并发配置，默认读取 CONCURRENCY_CONFIG
+        """
+        self.adaptive = config["ADAPTIVE"]
+        self.min_limit = max(1, config["MIN_LIMIT"])
+        self.max_limit = max(self.min_limit, config["MAX_LIMIT"])
+        self.increase_step = config["INCREASE_STEP"]
+        self.decrease_factor = config["DECREASE_FACTOR"]
+        self.latency_tolerance = config["LATENCY_TOLERANCE"]
+        self.decrease_cooldown = config["DECREASE_COOLDOWN"]
+        self.limit = min(max(int(initial_limit), self.min_limit), self.max_limit)
+        self.in_flight = 0
+        self.history = deque(maxlen=config["HISTORY_SIZE"])
+        self._latencies = deque(maxlen=config["BASELINE_WINDOW"])  # 归一化延迟样本
+        self._successes_since_change = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    async def acquire(self):
+        """等待直到在途请求数低于当前上限"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        """释放一个在途名额并唤醒等待者"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @property
+    def baseline_latency(self):
+        """基线延迟：窗口内归一化延迟的最小值（无样本时为None）"""
+        return min(self._latencies) if self._latencies else None
+
+    def record_success(self, latency, total_tokens=None):
+        """记录一次成功请求
+        :param latency: 请求耗时（秒），即 _process_api_response 中测得的 latency
+        :param total_tokens: 本次请求消耗的Token数，用于延迟归一化（可选）
+        """
+        sample = latency / max(total_tokens, 1) * 1000 if total_tokens else latency
+        baseline = self.baseline_latency
+        self._latencies.append(sample)
+        if not self.adaptive or baseline is None:
+            return
+
+        if sample <= baseline * self.latency_tolerance:
+            self._successes_since_change += 1
+            # 每完成约一个窗口的请求才增加一次，相当于每个RTT加一
+            if self._successes_since_change >= self.limit and self.limit < self.max_limit:
+                self._set_limit(
+                    self.limit + self.increase_step,
+                    f"延迟接近基线({sample:.2f}/{baseline:.2f})，加性增长"
+                )
+
+    def record_failure(self, exc):
+        """记录一次失败请求，拥塞类错误触发乘性下调
+        :param exc: 捕获到的异常
+        :return: 错误类别
+        """
+        category = classify_error(exc)
+        if not self.adaptive or category not in CONGESTION_ERRORS:
+            return category
+
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            logger.debug("[Concurrency] 冷却期内忽略下调 | 错误类别: %s", category)
+            return category
+        self._last_decrease = now
+        self._set_limit(int(self.limit * self.decrease_factor), f"检测到{category}，乘性下调")
+        return category
+
+    def _set_limit(self, new_limit, reason):
+        """调整上限并记录原因"""
+        new_limit = min(max(new_limit, self.min_limit), self.max_limit)
+        self._successes_since_change = 0
+        if new_limit == self.limit:
+            return
+        old_limit, self.limit = self.limit, new_limit
+        self.history.append((time.time(), old_limit, new_limit, reason))
+        logger.info("[Concurrency] 并发上限调整 %d → %d | 原因: %s", old_limit, new_limit, reason)
+        # 上限提高时唤醒等待者（可能在其他协程中调用，需调度到事件循环）
+        if new_limit > old_limit:
+            try:
+                asyncio.get_running_loop().create_task(self._notify())
+            except RuntimeError:
+                pass
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def snapshot(self):
+        """导出当前状态，便于日志或界面展示
+        :return: 包含当前上限、在途数、基线延迟与最近调整记录的字典
+        """
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "baseline_latency": self.baseline_latency,
+            "changes": list(self.history),
+        }
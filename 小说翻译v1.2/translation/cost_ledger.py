@@ -0,0 +1,197 @@
+# translation/cost_ledger.py
+"""
+费用台账模块
+功能：按请求记录输入、输出与前缀缓存命中Token，按价格表估算费用并持久化，支持任务预算上限
+核心机制：
+- 每个成功请求追加一行JSON记录（任务名、运行ID、模型、Token用量、费用）到台账文件
+- 发出后被取消的请求（如落败的对冲请求）按预估的输入Token记录，并标记为预估
+- 记录只在内存中累加并放入待写队列，由调用方在事件循环之外（线程中）调用flush批量追加到文件
+- 价格表按模型区分缓存命中输入、缓存未命中输入与输出的单价（每百万Token）
+- 请求发出前（拿到并发名额后）预估费用并预留，预计超出预算时由引擎暂停任务，继续时重新检查预算
+- 提供按任务名、运行ID、时间范围查询的汇总接口
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from config.settings import LEDGER_CONFIG
+
+logger = logging.getLogger("CostLedger")
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cache_hit_tokens=0, prices=LEDGER_CONFIG["PRICES"]):
+    """按价格表估算一次请求的费用
+    :param model: 接口模型名（如 deepseek-chat）
+    :param prompt_tokens: 输入Token数（含缓存命中部分）
+    :param completion_tokens: 输出Token数
+    :param cache_hit_tokens: 输入中命中前缀缓存的Token数
+    :param prices: 价格表 {模型: {"input_hit", "input_miss", "output"}}，单位为每百万Token
+    :return: 费用（价格表所用货币）
+    """
+    price = prices.get(model)
+    if price is None:
+        return 0.0
+    cache_miss_tokens = max(0, prompt_tokens - cache_hit_tokens)
+    return (cache_hit_tokens * price["input_hit"]
+            + cache_miss_tokens * price["input_miss"]
+            + completion_tokens * price["output"]) / 1_000_000
+
+
+class CostLedger:
+    """费用台账
+
+    属性：
+    - ledger_file: 台账文件路径（JSON Lines）
+    - job / run_id: 当前任务名与运行ID
+    - budget: 当前任务的预算上限（None表示不限）
+    - run_cost: 当前运行已记录的费用（含预估部分）
+    - estimated_cost: run_cost中按预估记录的部分
+    """
+
+    def __init__(self, ledger_file=LEDGER_CONFIG["FILE"]):
+        self.ledger_file = ledger_file
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # 串行化文件写入，避免两批记录交错
+        self._pending = []  # 待追加到台账文件的记录行
+        self.begin_run("", None)
+
+    def begin_run(self, job, budget=None):
+        """开始新的运行
+        :param job: 任务名（通常为源文件名，用于事后查询）
+        :param budget: 预算上限，None或0表示不限
+        """
+        with self._lock:
+            self.job = job
+            self.run_id = uuid.uuid4().hex[:12]
+            self.budget = budget or None
+            self.run_cost = 0.0
+            self.estimated_cost = 0.0
+            self.reserved = 0.0
+            self.tokens = {"prompt": 0, "completion": 0, "cache_hit": 0}
+
+    # ---------- 预算 ---------- #
+    def reserve(self, cost):
+        """预留一次请求的预估费用
+        :param cost: 预估费用
+        :return: 预留成功返回True；预计超出预算时不预留并返回False
+        """
+        with self._lock:
+            if self.budget is not None and self.run_cost + self.reserved + cost > self.budget:
+                return False
+            self.reserved += cost
+            return True
+
+    def release(self, cost):
+        """释放预留费用（请求结束后调用，实际费用由record记录）"""
+        with self._lock:
+            self.reserved = max(0.0, self.reserved - cost)
+
+    def set_budget(self, budget):
+        """修改当前运行的预算上限（用户在暂停期间调整预算后继续任务）
+        :param budget: 新的预算上限，None或0表示不限
+        """
+        with self._lock:
+            self.budget = budget or None
+
+    # ---------- 记录 ---------- #
+    def record(self, model, usage, cache_hit_tokens=0, chunk_key=None, estimated=False):
+        """记录一次请求并放入待写队列（不做文件I/O，可在事件循环中调用）
+        :param model: 接口模型名
+        :param usage: 响应中的Token用量对象（可能为None）
+        :param cache_hit_tokens: 输入中命中前缀缓存的Token数
+        :param chunk_key: 分块缓存键（可选）
+        :param estimated: 用量为预估值（请求发出后被取消，没有返回实际用量）
+        :return: 本次请求的费用
+        """
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, cache_hit_tokens)
+        with self._lock:
+            self.run_cost += cost
+            if estimated:
+                self.estimated_cost += cost
+            self.tokens["prompt"] += prompt_tokens
+            self.tokens["completion"] += completion_tokens
+            self.tokens["cache_hit"] += cache_hit_tokens
+            entry = {
+                "time": time.time(),
+                "job": self.job,
+                "run_id": self.run_id,
+                "chunk": chunk_key,
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cache_hit_tokens": cache_hit_tokens,
+                "cost": round(cost, 6),
+                "estimated": estimated,
+            }
+            self._pending.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        return cost
+
+    def flush(self):
+        """将待写队列中的记录追加到台账文件（文件I/O，异步代码中应通过 asyncio.to_thread 调用）
+        :return: 本次写入的记录数
+        """
+        with self._write_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return 0
+            try:
+                with open(self.ledger_file, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+            except OSError as e:
+                logger.error("[CostLedger] 写入台账失败: %s", e)
+                with self._lock:
+                    self._pending[:0] = lines  # 保留未写入的记录，下次写入时重试
+                return 0
+            return len(lines)
+
+    def run_summary(self):
+        """导出当前运行的费用汇总"""
+        with self._lock:
+            return {
+                "job": self.job,
+                "run_id": self.run_id,
+                "cost": self.run_cost,
+                "estimated_cost": self.estimated_cost,
+                "budget": self.budget,
+                "currency": LEDGER_CONFIG["CURRENCY"],
+                **self.tokens,
+            }
+
+    # ---------- 查询 ---------- #
+    def query(self, job=None, run_id=None, since=None):
+        """汇总台账记录
+        :param job: 任务名（子串匹配，如"第3卷"）
+        :param run_id: 运行ID
+        :param since: 起始时间戳
+        :return: {"cost", "requests", "prompt_tokens", "completion_tokens", "cache_hit_tokens", "models", "runs"}
+        """
+        self.flush()
+        totals = {"cost": 0.0, "requests": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                  "cache_hit_tokens": 0, "models": {}, "runs": set()}
+        if not os.path.exists(self.ledger_file):
+            return totals
+        with open(self.ledger_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if job and job not in entry["job"]:
+                    continue
+                if run_id and entry["run_id"] != run_id:
+                    continue
+                if since and entry["time"] < since:
+                    continue
+                totals["cost"] += entry["cost"]
+                totals["requests"] += 1
+                for field in ("prompt_tokens", "completion_tokens", "cache_hit_tokens"):
+                    totals[field] += entry[field]
+                totals["models"][entry["model"]] = totals["models"].get(entry["model"], 0.0) + entry["cost"]
+                totals["runs"].add(entry["run_id"])
+        return totals
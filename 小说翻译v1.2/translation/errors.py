@@ -0,0 +1,101 @@
+# translation/errors.py
+"""
+API错误分类模块
+功能：将翻译过程中捕获的异常归类为有限的错误类别，供并发控制、重试策略等模块统一判断
+核心机制：
+- 沿异常链（__cause__/__context__）查找原始的OpenAI SDK异常
+- 按异常类型与HTTP状态码归类，兼容SDK未细分的状态码
+"""
+
+import asyncio
+
+import openai
+
+# 错误类别常量
+RATE_LIMIT = "rate_limit"          # 429 请求过于频繁
+SERVER_ERROR = "server_error"      # 5xx 服务端错误
+TIMEOUT = "timeout"                # 请求超时
+CONNECTION = "connection"          # 网络连接错误
+CONTEXT_LENGTH = "context_length"  # 输入超出模型上下文长度
+BAD_REQUEST = "bad_request"        # 其他400错误
+AUTH = "auth"                      # 401/403 密钥无效或无权限
+EMPTY_RESPONSE = "empty_response"  # API返回空内容
+BUDGET = "budget"                  # 预计超出任务预算
+TRUNCATED = "truncated"            # 输出多次续写后仍被截断
+UNKNOWN = "unknown"
+
+# 表示服务端过载、需要降低并发的错误类别
+CONGESTION_ERRORS = frozenset({RATE_LIMIT, SERVER_ERROR, TIMEOUT})
+
+_CONTEXT_LENGTH_MARKERS = ("context length", "context_length", "maximum context", "too many tokens")
+
+
+class NoAvailableKeyError(Exception):
+    """所有API密钥均已失效（401/403），无法继续发起请求"""
+
+
+class BudgetExceededError(Exception):
+    """预计超出任务预算，且没有可暂停的任务线程（如命令行调用）"""
+
+
+class TruncatedOutputError(Exception):
+    """译文达到输出上限被截断，且续写次数已用完"""
+
+
+def _iter_exception_chain(exc):
+    """遍历异常链，避免循环引用导致死循环"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def find_api_error(exc):
+    """在异常链中查找OpenAI SDK异常
+    :param exc: 捕获到的异常
+    :return: openai.APIError实例，未找到时返回None
+    """
+    for item in _iter_exception_chain(exc):
+        if isinstance(item, openai.APIError):
+            return item
+    return None
+
+
+def classify_error(exc):
+    """将异常归类为错误类别
+    :param exc: 捕获到的异常（可以是包装后的异常）
+    :return: 错误类别字符串
+    """
+    for item in _iter_exception_chain(exc):
+        if isinstance(item, NoAvailableKeyError):
+            return AUTH
+        if isinstance(item, BudgetExceededError):
+            return BUDGET
+        if isinstance(item, TruncatedOutputError):
+            return TRUNCATED
+        # 注意：APITimeoutError是APIConnectionError的子类，需先判断
+        if isinstance(item, (openai.APITimeoutError, asyncio.TimeoutError, TimeoutError)):
+            return TIMEOUT
+        if isinstance(item, openai.APIConnectionError):
+            return CONNECTION
+        if isinstance(item, openai.RateLimitError):
+            return RATE_LIMIT
+        if isinstance(item, (openai.AuthenticationError, openai.PermissionDeniedError)):
+            return AUTH
+        if isinstance(item, openai.APIStatusError):
+            status = item.status_code
+            if status == 429:
+                return RATE_LIMIT
+            if status >= 500:
+                return SERVER_ERROR
+            if status in (401, 403):
+                return AUTH
+            if status in (400, 413, 422):
+                message = str(item).lower()
+                if any(marker in message for marker in _CONTEXT_LENGTH_MARKERS):
+                    return CONTEXT_LENGTH
+                return BAD_REQUEST
+        if isinstance(item, ValueError) and "空内容" in str(item):
+            return EMPTY_RESPONSE
+    return UNKNOWN
@@ -0,0 +1,119 @@
+# translation/hedging.py
+"""
+对冲请求模块
+功能：当某个分块的请求耗时超过近期延迟的高分位数时，发送一个重复请求，取先返回者
+核心机制：
+- 滑动窗口统计近期请求延迟，按配置的分位数（如p95）作为对冲等待时间
+- 对冲请求可使用更快的模型（如DeepSeek-V3）
+- 按对冲请求占总请求的比例设置上限，控制重复开销
+- 统计对冲次数、胜出次数与落败请求的重复Token开销（已完成的按实际用量，发出后被取消的按输入预估），
+  每个任务结束时汇报
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+
+from config.settings import HEDGE_CONFIG
+
+logger = logging.getLogger("Hedging")
+
+
+class HedgePolicy:
+    """对冲请求策略
+
+    属性：
+    - enabled: 是否启用对冲
+    - hedge_model: 对冲请求使用的模型名称（None表示与原请求相同）
+    - requests / hedges / hedge_wins: 本任务的主请求数、对冲请求数与对冲胜出次数
+    - duplicate_tokens: 落败请求（已返回但结果未采用）的实际Token用量
+    - estimated_duplicate_tokens: 发出后被取消的落败请求按输入预估的Token数（实际用量无法得知）
+    """
+
+    def __init__(self, config=HEDGE_CONFIG):
+        """
+        :param config: 对冲配置，默认读取 HEDGE_CONFIG
+        """
+        self.enabled = config["ENABLED"]
+        self.percentile = config["PERCENTILE"]
+        self.min_samples = config["MIN_SAMPLES"]
+        self.min_delay = config["MIN_DELAY"]
+        self.max_ratio = config["MAX_HEDGE_RATIO"]
+        self.hedge_model = config["HEDGE_MODEL"]
+        self._latencies = deque(maxlen=config["WINDOW"])
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """重置任务级统计（延迟样本跨任务保留）"""
+        with self._lock:
+            self.requests = 0
+            self.hedges = 0
+            self.hedge_wins = 0
+            self.duplicate_tokens = 0
+            self.estimated_duplicate_tokens = 0
+
+    def record_latency(self, latency):
+        """记录一次成功请求的耗时
+        :param latency: 请求耗时（秒）
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def record_request(self):
+        """记录一次主请求，用于计算对冲比例上限"""
+        with self._lock:
+            self.requests += 1
+
+    def hedge_delay(self):
+        """计算对冲等待时间
+        :return: 主请求超过该秒数仍未返回时触发对冲；未启用或样本不足时返回None
+        """
+        with self._lock:
+            if not self.enabled or len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+            index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+            return max(self.min_delay, ordered[index])
+
+    def try_acquire_hedge(self):
+        """申请发送一次对冲请求，超过比例上限时拒绝
+        :return: 允许发送返回True
+        """
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * max(self.requests, 1):
+                logger.debug("[Hedging] 对冲比例已达上限 | 对冲: %d | 请求: %d", self.hedges, self.requests)
+                return False
+            self.hedges += 1
+            return True
+
+    def record_duplicate(self, tokens, estimated=False):
+        """记录落败请求的重复开销
+        :param tokens: Token数
+        :param estimated: 为True时表示请求发出后被取消，tokens为按输入的预估值
+        """
+        with self._lock:
+            if estimated:
+                self.estimated_duplicate_tokens += tokens
+            else:
+                self.duplicate_tokens += tokens
+
+    def record_hedge_win(self):
+        """记录一次对冲请求先于主请求返回"""
+        with self._lock:
+            self.hedge_wins += 1
+
+    def summary(self):
+        """导出本任务的对冲统计
+        :return: 统计字典
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_ratio": self.hedges / self.requests if self.requests else 0.0,
+                "duplicate_tokens": self.duplicate_tokens,
+                "estimated_duplicate_tokens": self.estimated_duplicate_tokens,
+            }
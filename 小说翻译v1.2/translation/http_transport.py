@@ -0,0 +1,105 @@
+# translation/http_transport.py
+"""
+HTTP传输层模块
+功能：为翻译引擎构建可控的共享httpx连接池，并统计连接复用情况
+核心机制：
+- 连接池上限随引擎最大并发数伸缩，保持长连接（keep-alive）
+- 可选HTTP/2（需安装h2，未安装时自动回退HTTP/1.1）
+- 支持注入外部预先配置好的transport
+- 通过httpcore的trace扩展区分新建连接与复用连接
+"""
+
+import importlib.util
+import logging
+import threading
+
+import httpx
+from openai import DefaultAsyncHttpxClient
+
+from config.settings import HTTP_CONFIG, CONCURRENCY_CONFIG
+
+logger = logging.getLogger("HttpTransport")
+
+
+class ConnectionStats:
+    """连接复用统计
+
+    属性：
+    - requests: 发出的HTTP请求数
+    - new_connections: 新建的TCP连接数（其余请求复用已有连接）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """重置统计（每个翻译任务开始时调用）"""
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+
+    async def on_request(self, request):
+        """httpx请求钩子：计数并挂载trace回调，捕获新建连接事件"""
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.new_connections += 1
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        with self._lock:
+            self.requests += 1
+
+    def summary(self):
+        """导出统计
+        :return: 包含请求数、新建连接数与复用次数的字典
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused": max(0, self.requests - self.new_connections),
+            }
+
+
+def http2_available():
+    """检查是否安装了HTTP/2依赖（h2）"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def build_transport(max_connections, http2=HTTP_CONFIG["HTTP2"]):
+    """构建带连接池配置的异步transport
+    :param max_connections: 连接池上限
+    :param http2: 是否启用HTTP/2
+    :return: httpx.AsyncHTTPTransport
+    """
+    if http2 and not http2_available():
+        logger.warning("[HttpTransport] 未安装h2，回退HTTP/1.1（可执行 pip install httpx[http2] 启用HTTP/2）")
+        http2 = False
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=HTTP_CONFIG["KEEPALIVE_EXPIRY"],
+    )
+    logger.info("[HttpTransport] 连接池配置 | 上限: %d | HTTP/2: %s", max_connections, http2)
+    return httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+
+def build_http_client(max_concurrency=CONCURRENCY_CONFIG["MAX_LIMIT"], transport=None):
+    """构建供AsyncOpenAI使用的httpx客户端
+    :param max_concurrency: 引擎可能达到的最大并发数，用于确定连接池大小
+    :param transport: 外部注入的transport（可选，注入时连接池由调用方配置）
+    :return: (httpx.AsyncClient, ConnectionStats)
+    """
+    if transport is None:
+        transport = build_transport(max_concurrency + HTTP_CONFIG["POOL_HEADROOM"])
+    stats = ConnectionStats()
+    client = DefaultAsyncHttpxClient(
+        transport=transport,
+        event_hooks={"request": [stats.on_request]},
+    )
+    return client, stats
@@ -0,0 +1,167 @@
+# translation/key_pool.py
+"""
+多密钥负载均衡模块
+功能：在多个API密钥（账号）之间分配请求，突破单账号的速率限制
+核心机制：
+- 每个密钥持有独立的API客户端与进程内共享的限速器
+- 支持"最少在途"与"平滑加权轮询"两种分配策略
+- 返回401/403的密钥永久移出轮换；返回429的密钥冷却一段时间后自动恢复
+- 全部密钥冷却时等待最早恢复的密钥，全部失效时抛出NoAvailableKeyError
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+
+from config.settings import KEY_POOL_CONFIG
+from translation.errors import classify_error, NoAvailableKeyError, AUTH, RATE_LIMIT
+from translation.rate_limiter import get_shared_limiter
+from translation.retry_policy import parse_retry_after
+
+logger = logging.getLogger("KeyPool")
+
+# 分配策略
+LEAST_LOADED = "least_loaded"
+WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
+
+
+class KeySlot:
+    """单个API密钥的运行状态
+
+    属性：
+    - name: 脱敏后的密钥标识，用于日志
+    - client: 该密钥对应的API客户端
+    - rate_limiter: 该密钥的共享限速器（未启用限速时为None）
+    - weight: 分配权重
+    - in_flight: 当前在途请求数
+    - disabled: 是否已永久移出轮换
+    - cooldown_until: 冷却结束时间（time.monotonic）
+    """
+
+    def __init__(self, api_key, weight, client):
+        digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+        self.name = f"{api_key[:6]}…{digest}"
+        self.client = client
+        self.rate_limiter = get_shared_limiter(name=f"key-{digest}")
+        self.weight = max(1, int(weight))
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.disabled = False
+        self.cooldown_until = 0.0
+        self._current_weight = 0  # 平滑加权轮询的动态权重
+
+    def available(self, now):
+        return not self.disabled and now >= self.cooldown_until
+
+
+class KeyPool:
+    """API密钥池
+
+    用法：
+        slot = await pool.acquire()
+        try:
+            ...  # 使用 slot.client 发起请求
+        except Exception as e:
+            pool.report_failure(slot, e)
+            raise
+        finally:
+            pool.release(slot)
+    """
+
+    def __init__(self, key_entries, client_factory, strategy=KEY_POOL_CONFIG["STRATEGY"]):
+        """
+        :param key_entries: 密钥列表，元素为密钥字符串或 (密钥, 权重) 元组
+        :param client_factory: 根据密钥创建API客户端的函数
+        :param strategy: 分配策略（least_loaded / weighted_round_robin）
+        """
+        self.strategy = strategy
+        self.slots = []
+        for entry in key_entries:
+            api_key, weight = (entry, 1) if isinstance(entry, str) else entry
+            self.slots.append(KeySlot(api_key, weight, client_factory(api_key)))
+        if not self.slots:
+            raise ValueError("至少需要一个API密钥")
+        logger.info("[KeyPool] 密钥池初始化 | 密钥数: %d | 策略: %s", len(self.slots), strategy)
+
+    def reset_stats(self):
+        """重置任务级统计（失效与冷却状态跨任务保留）"""
+        for slot in self.slots:
+            slot.requests = 0
+            slot.failures = 0
+
+    def _select(self, candidates):
+        """按策略从可用密钥中选择一个"""
+        if self.strategy == WEIGHTED_ROUND_ROBIN:
+            total = sum(slot.weight for slot in candidates)
+            for slot in candidates:
+                slot._current_weight += slot.weight
+            chosen = max(candidates, key=lambda slot: slot._current_weight)
+            chosen._current_weight -= total
+            return chosen
+        return min(candidates, key=lambda slot: (slot.in_flight / slot.weight, slot.requests / slot.weight))
+
+    async def acquire(self):
+        """获取一个可用密钥，全部冷却时等待
+        :return: KeySlot
+        :raises NoAvailableKeyError: 所有密钥均已失效
+        """
+        while True:
+            now = time.monotonic()
+            candidates = [slot for slot in self.slots if slot.available(now)]
+            if candidates:
+                slot = self._select(candidates)
+                slot.in_flight += 1
+                slot.requests += 1
+                return slot
+            active = [slot for slot in self.slots if not slot.disabled]
+            if not active:
+                raise NoAvailableKeyError("所有API密钥均已失效，请检查api_key.txt")
+            wait = min(slot.cooldown_until for slot in active) - now
+            logger.info("[KeyPool] 所有密钥冷却中，等待 %.1fs", wait)
+            await asyncio.sleep(max(wait, 0.05))
+
+    def release(self, slot):
+        """归还密钥"""
+        slot.in_flight -= 1
+
+    def report_failure(self, slot, exc):
+        """根据错误类别处理密钥状态
+        :param slot: 发生错误的密钥
+        :param exc: 捕获到的异常
+        """
+        slot.failures += 1
+        category = classify_error(exc)
+        if category == AUTH:
+            slot.disabled = True
+            logger.error("[KeyPool] 密钥 %s 认证失败，已移出轮换", slot.name)
+        elif category == RATE_LIMIT:
+            cooldown = parse_retry_after(exc) or KEY_POOL_CONFIG["RATE_LIMIT_COOLDOWN"]
+            slot.cooldown_until = time.monotonic() + cooldown
+            logger.warning("[KeyPool] 密钥 %s 触发限流，冷却 %.1fs", slot.name, cooldown)
+
+    @property
+    def primary_client(self):
+        """首个未失效密钥的客户端，用于预热等辅助请求"""
+        for slot in self.slots:
+            if not slot.disabled:
+                return slot.client
+        return self.slots[0].client
+
+    def summary(self):
+        """导出各密钥的使用情况
+        :return: 列表，元素为单个密钥的状态字典
+        """
+        now = time.monotonic()
+        return [
+            {
+                "name": slot.name,
+                "weight": slot.weight,
+                "requests": slot.requests,
+                "failures": slot.failures,
+                "in_flight": slot.in_flight,
+                "status": "disabled" if slot.disabled else ("cooling" if now < slot.cooldown_until else "active"),
+            }
+            for slot in self.slots
+        ]
@@ -0,0 +1,164 @@
+# translation/model_router.py
+"""
+模型路由模块
+功能：在"自动选择"模式下按分块特征为每个分块挑选模型
+核心机制：
+- 提取分块特征：长度、对话行占比、诗歌式短行占比、注音（ruby）密度
+- 短小或普通的分块交给快速模型，只有被标记为高难度的分块交给推理模型
+- 推理模型近期延迟过高时，只有同时命中多个难度特征的分块才使用推理模型
+- 记录每次路由决策及各模型的实际耗时与Token用量，每个任务结束时汇报
+"""
+
+import logging
+import re
+import statistics
+import threading
+import time
+from collections import deque
+
+from config.settings import ROUTER_CONFIG
+
+logger = logging.getLogger("ModelRouter")
+
+# 难度特征
+FLAG_DIALOGUE = "dialogue"
+FLAG_POETRY = "poetry"
+FLAG_RUBY = "ruby"
+
+# 对话行：以日文/中文引号开头
+_DIALOGUE_LINE = re.compile(r'^\s*[「『“"‘（(]')
+# 注音：pixiv的 [[rb:漢字 > かな]]、青空文库的 |漢字《かな》 或 漢字《かな》
+_RUBY = re.compile(r'\[\[rb:.*?>.*?\]\]|[|｜]?[\u4e00-\u9fff]+《[^》]+》')
+# 句末标点，诗歌式短行通常不以句末标点结尾
+_SENTENCE_END = re.compile(r'[。！？!?…」』”"]\s*$')
+
+
+def analyze_chunk(text):
+    """提取分块特征
+    :param text: 分块原文
+    :return: 特征字典（length / lines / dialogue_ratio / poetry_ratio / ruby_density）
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    line_count = len(lines) or 1
+    dialogue = sum(1 for line in lines if _DIALOGUE_LINE.match(line))
+    poetry = sum(
+        1 for line in lines
+        if len(line.strip()) <= ROUTER_CONFIG["POETRY_LINE_LENGTH"] and not _SENTENCE_END.search(line)
+    )
+    ruby = len(_RUBY.findall(text))
+    return {
+        "length": len(text),
+        "lines": len(lines),
+        "dialogue_ratio": dialogue / line_count,
+        "poetry_ratio": poetry / line_count,
+        "ruby_density": ruby * 1000 / max(len(text), 1),
+    }
+
+
+def difficulty_flags(features, config=ROUTER_CONFIG):
+    """根据特征判断难度标记
+    :param features: analyze_chunk 返回的特征字典
+    :param config: 路由配置
+    :return: 命中的难度特征列表
+    """
+    flags = []
+    if features["dialogue_ratio"] >= config["DIALOGUE_RATIO"]:
+        flags.append(FLAG_DIALOGUE)
+    if features["lines"] >= config["POETRY_MIN_LINES"] and features["poetry_ratio"] >= config["POETRY_RATIO"]:
+        flags.append(FLAG_POETRY)
+    if features["ruby_density"] >= config["RUBY_DENSITY"]:
+        flags.append(FLAG_RUBY)
+    return flags
+
+
+class ModelRouter:
+    """按分块特征选择模型的路由策略
+
+    属性：
+    - fast_model / reasoning_model: 快速模型与推理模型名称
+    - decisions: 本任务的路由决策列表，元素为 (时间戳, 分块长度, 模型, 原因)
+    """
+
+    def __init__(self, config=ROUTER_CONFIG):
+        """
+        :param config: 路由配置，默认读取 ROUTER_CONFIG
+        """
+        self.config = config
+        self.fast_model = config["FAST_MODEL"]
+        self.reasoning_model = config["REASONING_MODEL"]
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """重置任务级统计（延迟样本跨任务保留）"""
+        with self._lock:
+            self.decisions = []
+            self.usage = {}
+
+    def _recent_latency(self, model_name):
+        """模型近期延迟的中位数，样本不足时返回None"""
+        samples = self._latencies.get(model_name)
+        if not samples or len(samples) < self.config["MIN_SAMPLES"]:
+            return None
+        return statistics.median(samples)
+
+    def route(self, text):
+        """为分块选择模型
+        :param text: 分块原文
+        :return: 模型名称
+        """
+        features = analyze_chunk(text)
+        flags = difficulty_flags(features, self.config)
+        with self._lock:
+            reasoning_latency = self._recent_latency(self.reasoning_model)
+
+        if not flags:
+            model, reason = self.fast_model, "普通文本"
+        elif features["length"] < self.config["SHORT_CHUNK"] and len(flags) < 2:
+            model, reason = self.fast_model, f"短分块({'/'.join(flags)})"
+        elif (reasoning_latency is not None and reasoning_latency > self.config["LATENCY_LIMIT"]
+              and len(flags) < 2):
+            model, reason = self.fast_model, f"推理模型延迟过高({reasoning_latency:.1f}s)"
+        else:
+            model, reason = self.reasoning_model, "高难度(" + "/".join(flags) + ")"
+
+        with self._lock:
+            self.decisions.append((time.time(), features["length"], model, reason))
+        logger.debug("[ModelRouter] 路由决策 | 长度: %d | 模型: %s | 原因: %s | 特征: %s",
+                     features["length"], model, reason, features)
+        return model
+
+    def record_result(self, model_name, latency, total_tokens):
+        """记录一次成功请求的耗时与Token用量（所有模式下都会记录）
+        :param model_name: 实际使用的模型名称
+        :param latency: 请求耗时（秒）
+        :param total_tokens: 使用Token数
+        """
+        with self._lock:
+            samples = self._latencies.setdefault(model_name, deque(maxlen=self.config["WINDOW"]))
+            samples.append(latency)
+            stats = self.usage.setdefault(model_name, {"requests": 0, "latency": 0.0, "tokens": 0})
+            stats["requests"] += 1
+            stats["latency"] += latency
+            stats["tokens"] += total_tokens
+
+    def summary(self):
+        """导出本任务的路由统计
+        :return: 字典，包含各模型的路由次数、原文字数、请求数、平均耗时与Token用量
+        """
+        with self._lock:
+            decisions = list(self.decisions)
+            usage = {name: dict(stats) for name, stats in self.usage.items()}
+
+        models = {}
+        for _, length, model, _ in decisions:
+            entry = models.setdefault(model, {"routed": 0, "chars": 0})
+            entry["routed"] += 1
+            entry["chars"] += length
+        for name, stats in usage.items():
+            entry = models.setdefault(name, {"routed": 0, "chars": 0})
+            entry["requests"] = stats["requests"]
+            entry["avg_latency"] = stats["latency"] / stats["requests"]
+            entry["tokens"] = stats["tokens"]
+        return {"decisions": len(decisions), "models": models}
@@ -0,0 +1,179 @@
+# translation/output_budget.py
+"""
+输出预算模块
+功能：按输入Token数与语言对为每个请求计算输出上限（max_tokens），替代固定的8192
+核心机制：
+- 语言对由原文主要文字（假名/谚文/汉字/其他）、目标语言与翻译风格组成
+- 每个语言对维护输出/输入Token比，按实际用量以指数滑动平均（EMA）更新
+- max_tokens = 输入Token数 × 学习到的比例 × 安全系数，并限制在上下限之间
+- 被截断（finish_reason == "length"）的响应与过短的输入不参与学习，避免比例失真；
+  截断后经续写补齐的译文按合并后的用量学习
+- 推理模型的输出包含思维链，不参与学习且固定使用上限
+- 学习结果持久化到文件，跨任务、跨进程沿用；record只更新内存，由调用方在事件循环之外（线程中）调用save写入
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+from config.settings import OUTPUT_BUDGET_CONFIG
+
+logger = logging.getLogger("OutputBudget")
+
+# 原文主要文字的判断顺序：假名优先于汉字（日文原文同样包含大量汉字）
+_SCRIPT_PATTERNS = (
+    ("ja", re.compile('[\u3040-\u30ff]')),
+    ("ko", re.compile('[\uac00-\ud7af]')),
+    ("zh", re.compile('[\u4e00-\u9fff]')),
+)
+
+
+def detect_source(text, sample=2000):
+    """粗略判断原文语言（仅用于区分语言对）
+    :param text: 原文
+    :param sample: 只检查开头的字符数
+    :return: ja / ko / zh / other
+    """
+    sample_text = text[:sample]
+    for code, pattern in _SCRIPT_PATTERNS:
+        if len(pattern.findall(sample_text)) * 10 >= len(sample_text):
+            return code
+    return "other"
+
+
+class OutputBudget:
+    """按语言对学习输出/输入比例的输出预算
+
+    属性：
+    - ratio_file: 比例持久化文件路径
+    - ratios: 学习到的比例 {语言对: {"ratio": 比例, "samples": 样本数}}
+    - stats: 本任务的请求数、max_tokens合计、截断次数与续写请求数
+    """
+
+    def __init__(self, ratio_file=OUTPUT_BUDGET_CONFIG["FILE"], config=OUTPUT_BUDGET_CONFIG):
+        self.ratio_file = ratio_file
+        self.config = config
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.ratios = self._load()
+        self.reset_stats()
+
+    def _load(self):
+        """读取持久化的比例，文件不存在或损坏时从默认值开始"""
+        if not self.ratio_file or not os.path.exists(self.ratio_file):
+            return {}
+        try:
+            with open(self.ratio_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("[OutputBudget] 比例文件读取失败，使用默认比例 | %s", e)
+            return {}
+
+    def save(self):
+        """原子写入比例文件（文件I/O，异步代码中应通过 asyncio.to_thread 调用）"""
+        if not self.ratio_file:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+            data = json.dumps(self.ratios, ensure_ascii=False, indent=2)
+            self._unsaved = 0
+        temp_file = f"{self.ratio_file}.tmp"
+        try:
+            with open(temp_file, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(temp_file, self.ratio_file)
+        except OSError as e:
+            logger.error("[OutputBudget] 比例文件保存失败: %s", e)
+
+    def reset_stats(self):
+        """重置任务级统计（每个任务开始时调用）"""
+        with self._lock:
+            self.stats = {"requests": 0, "max_tokens": 0, "truncated": 0, "continuations": 0, "pairs": set()}
+
+    @staticmethod
+    def pair(text, target_lang, style):
+        """生成语言对标识
+        :param text: 原文
+        :param target_lang: 目标语言代码
+        :param style: 翻译风格代码
+        :return: 形如 "ja->zh/light_novel" 的字符串
+        """
+        return f"{detect_source(text)}->{target_lang}/{style}"
+
+    def ratio(self, pair):
+        """语言对当前的输出/输入比例（无样本时使用默认值）"""
+        entry = self.ratios.get(pair)
+        return entry["ratio"] if entry else self.config["DEFAULT_RATIO"]
+
+    def max_tokens(self, pair, input_tokens, model):
+        """计算单个请求的输出上限
+        :param pair: 语言对标识
+        :param input_tokens: 待翻译文本的Token数（不含提示词与上下文）
+        :param model: 接口模型名（如 deepseek-chat）
+        :return: max_tokens
+        """
+        if not self.config["ENABLED"] or model in self.config["FIXED_MODELS"]:
+            limit = self.config["MAX_TOKENS"]
+        else:
+            limit = math.ceil(input_tokens * self.ratio(pair) * self.config["SAFETY_FACTOR"])
+            limit = min(self.config["MAX_TOKENS"], max(self.config["MIN_TOKENS"], limit))
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["max_tokens"] += limit
+            self.stats["pairs"].add(pair)
+        return limit
+
+    def record(self, pair, input_tokens, usage, model, finish_reason=None):
+        """按实际输出用量更新语言对的比例
+        :param pair: 语言对标识
+        :param input_tokens: 待翻译文本的Token数
+        :param usage: 响应中的Token用量对象（可能为None）
+        :param model: 接口模型名
+        :param finish_reason: 响应的结束原因
+        :return: 未保存的更新达到 SAVE_EVERY 次时返回True，提示调用方保存
+        """
+        if finish_reason == "length":
+            return False
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        if (not completion_tokens or input_tokens < self.config["MIN_SAMPLE_TOKENS"]
+                or model in self.config["FIXED_MODELS"]):
+            return False
+        observed = completion_tokens / input_tokens
+        with self._lock:
+            entry = self.ratios.get(pair)
+            if entry is None:
+                entry = self.ratios[pair] = {"ratio": observed, "samples": 0}
+            else:
+                entry["ratio"] += self.config["ALPHA"] * (observed - entry["ratio"])
+            entry["samples"] += 1
+            self._unsaved += 1
+            ratio = entry["ratio"]
+            should_save = self._unsaved >= self.config["SAVE_EVERY"]
+        logger.debug("[OutputBudget] 更新比例 | %s | 本次: %.2f | 平均: %.2f", pair, observed, ratio)
+        return should_save
+
+    def record_truncation(self, continuations):
+        """记录一次截断及其续写请求数
+        :param continuations: 为补齐该译文发送的续写请求数
+        """
+        with self._lock:
+            self.stats["truncated"] += 1
+            self.stats["continuations"] += continuations
+
+    def summary(self):
+        """导出本任务的输出预算统计
+        :return: 请求数、平均max_tokens、截断与续写次数、本任务涉及语言对的比例
+        """
+        with self._lock:
+            requests = self.stats["requests"]
+            return {
+                "requests": requests,
+                "avg_max_tokens": self.stats["max_tokens"] / requests if requests else 0,
+                "truncated": self.stats["truncated"],
+                "continuations": self.stats["continuations"],
+                "ratios": {pair: self.ratio(pair) for pair in sorted(self.stats["pairs"])},
+            }
@@ -0,0 +1,153 @@
+# translation/rate_limiter.py
+"""
+速率限制模块
+功能：按服务商配额（每分钟请求数RPM、每分钟Token数TPM）对API调用限速
+核心机制：
+- 令牌桶算法，RPM与TPM各使用一个独立的桶
+- 预约式扣减：调用前按估算Token数扣减，余额不足时计算等待时间而非直接失败
+- 调用结束后根据 response.usage.total_tokens 修正估算偏差
+- 进程内共享：同一名称的限速器在所有引擎实例间共用
+- 线程安全：共享的限速器可被多个引擎（各自的事件循环线程）同时使用
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from config.settings import RATE_LIMIT_CONFIG
+from file_processor.token_counter import count_tokens
+
+logger = logging.getLogger("RateLimiter")
+
+
+def estimate_tokens(text):
+    """估算文本的Token数（使用与分块相同的共享计数器）
+
+    :param text: 待估算文本
+    :return: 估算的Token数（至少为1）
+    """
+    return int(count_tokens(text))
+
+
+class TokenBucket:
+    """线程安全的令牌桶
+
+    属性：
+    - capacity: 桶容量（即每分钟配额）
+    - rate: 每秒补充的令牌数
+    - tokens: 当前余额，预约后可能为负，表示需要等待的欠额
+    """
+
+    def __init__(self, per_minute):
+        """
+        :param per_minute: 每分钟配额
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """预约令牌并返回需要等待的秒数
+        超过桶容量的请求按容量扣减，避免永远无法满足
+        :param amount: 需要的令牌数
+        :return: 等待时间（秒），0表示可立即执行
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, delta):
+        """修正余额（正数退还，负数追加扣减）
+        :param delta: 修正量
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class RateLimiter:
+    """RPM/TPM双桶限速器
+
+    用法：
+        reserved = await limiter.acquire(estimated_tokens)
+        ...  # 发起API请求
+        limiter.settle(reserved, response.usage.total_tokens)
+    在acquire等待期间被取消时自动退还预约；请求发出后取消不退还请求数（服务商已计数）
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, name="default"):
+        """
+        :param requests_per_minute: 每分钟请求数上限
+        :param tokens_per_minute: 每分钟Token数上限
+        :param name: 限速器名称，用于日志
+        """
+        self.name = name
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+    def _reserve(self, estimated_tokens):
+        wait = max(self.request_bucket.reserve(1), self.token_bucket.reserve(estimated_tokens))
+        if wait > 0:
+            logger.info("[RateLimiter] %s 配额不足，等待 %.2fs | 预估Token: %d",
+                        self.name, wait, estimated_tokens)
+        return wait
+
+    async def acquire(self, estimated_tokens):
+        """异步等待配额（不占用线程）
+        :param estimated_tokens: 预估的本次请求总Token数
+        :return: 实际预约的Token数，用于之后的settle修正
+        """
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # 等待期间被取消，请求不会发出：退还预约的请求数与Token配额
+                self.refund(estimated_tokens)
+                raise
+        return estimated_tokens
+
+    def refund(self, reserved_tokens):
+        """退还一次未发出请求的全部预约（RPM桶1个请求与TPM桶的预估Token）
+        :param reserved_tokens: 调用前预约的Token数
+        """
+        self.request_bucket.adjust(1)
+        self.token_bucket.adjust(reserved_tokens)
+
+    def settle(self, reserved_tokens, actual_tokens):
+        """根据实际用量修正TPM桶
+        :param reserved_tokens: 调用前预约的Token数
+        :param actual_tokens: response.usage.total_tokens（失败时传0全额退还）
+        """
+        self.token_bucket.adjust(reserved_tokens - actual_tokens)
+
+
+_shared_limiters = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter(name="default", config=RATE_LIMIT_CONFIG):
+    """获取进程内共享的限速器，同名限速器只创建一次
+    :param name: 限速器名称（同一账号/密钥应使用同一名称）
+    :param config: 速率限制配置，默认读取 RATE_LIMIT_CONFIG
+    :return: RateLimiter实例；配置中关闭限速时返回None
+    """
+    if not config["ENABLED"]:
+        return None
+    with _shared_lock:
+        if name not in _shared_limiters:
+            _shared_limiters[name] = RateLimiter(
+                config["REQUESTS_PER_MINUTE"], config["TOKENS_PER_MINUTE"], name=name
+            )
+            logger.debug("[RateLimiter] 创建共享限速器 %s | RPM: %d | TPM: %d",
+                         name, config["REQUESTS_PER_MINUTE"], config["TOKENS_PER_MINUTE"])
+        return _shared_limiters[name]
@@ -0,0 +1,151 @@
+# translation/retry_policy.py
+"""
+重试策略模块
+功能：根据错误类别决定重试、等待时长或直接转入分块降级
+核心机制：
+- 带抖动的指数退避，避免大量并发请求同时重试
+- 任务级重试预算：一个翻译任务内所有分块共享重试次数上限
+- 按错误类别区分处理：
+  - 超时/5xx/连接错误：退避后重试
+  - 429：优先遵循服务端返回的Retry-After（不超过单次等待上限）
+  - 上下文超长/400、续写后仍被截断：不再浪费重试次数，直接重新分块
+  - 密钥无效、预计超出任务预算：立即失败
+  - 重试预算耗尽时，拥塞类错误（429/5xx/超时）直接失败，不再拆分为更多请求
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+
+from config.settings import API_CONFIG
+from translation.errors import (
+    classify_error, find_api_error,
+    RATE_LIMIT, CONTEXT_LENGTH, BAD_REQUEST, AUTH, BUDGET, TRUNCATED, CONGESTION_ERRORS
+)
+
+logger = logging.getLogger("RetryPolicy")
+
+# 重试决策动作
+RETRY = "retry"        # 等待后重试
+RESPLIT = "resplit"    # 转入分块降级
+FAIL = "fail"          # 直接失败
+
+RetryDecision = namedtuple("RetryDecision", ["action", "delay", "category", "reason"])
+
+
+class RetryBudget:
+    """任务级重试预算（线程安全）
+
+    属性：
+    - limit: 本任务允许的重试总次数
+    - used: 已消耗的重试次数
+    """
+
+    def __init__(self, limit=API_CONFIG["RETRY_BUDGET"]):
+        """
+        :param limit: 重试总次数上限
+        """
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        return max(0, self.limit - self.used)
+
+    def consume(self):
+        """消耗一次重试机会
+        :return: 预算充足返回True，已耗尽返回False
+        """
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+
+def parse_retry_after(exc, max_wait=API_CONFIG["RETRY_WAIT_MAX"]):
+    """从429响应头中解析Retry-After
+    支持 retry-after-ms、秒数以及HTTP日期三种格式
+
+    :param exc: 捕获到的异常
+    :param max_wait: 等待上限（秒），异常的响应头不会让分块无限期等待
+    :return: 等待秒数（0 ~ max_wait），无法解析时返回None
+    """
+    api_error = find_api_error(exc)
+    response = getattr(api_error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    wait = None
+    try:
+        if (value := headers.get("retry-after-ms")) is not None:
+            wait = float(value) / 1000
+        elif (value := headers.get("retry-after")) is not None:
+            try:
+                wait = float(value)
+            except ValueError:
+                retry_at = email.utils.parsedate_to_datetime(value)
+                wait = retry_at.timestamp() - time.time()
+    except (TypeError, ValueError):
+        logger.debug("[RetryPolicy] 无法解析Retry-After: %s", headers.get("retry-after"))
+    if wait is None or wait != wait:  # 无法解析或NaN
+        return None
+    return min(max(0.0, wait), max_wait)
+
+
+class RetryPolicy:
+    """按错误类别决策的重试策略
+
+    属性：
+    - max_attempts: 单个分块的最大重试次数
+    - base_delay: 退避基数（秒）
+    - max_delay: 单次等待上限（秒）
+    """
+
+    def __init__(self, max_attempts=API_CONFIG["MAX_RETRY"], base_delay=API_CONFIG["RETRY_WAIT_BASE"],
+                 max_delay=API_CONFIG["RETRY_WAIT_MAX"]):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        """带抖动的指数退避
+        在 [上限/2, 上限] 区间内随机取值，既保证最小等待又打散重试时间点
+        :param attempt: 已失败次数（从0开始）
+        :return: 等待秒数
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt + 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def decide(self, exc, attempt, budget=None):
+        """根据异常决定下一步动作
+        :param exc: 捕获到的异常
+        :param attempt: 当前分块已失败的次数（从0开始）
+        :param budget: 任务级重试预算（可选）
+        :return: RetryDecision
+        """
+        category = classify_error(exc)
+        if category == AUTH:
+            return RetryDecision(FAIL, 0.0, category, "API密钥无效或无权限")
+        if category == BUDGET:
+            return RetryDecision(FAIL, 0.0, category, "预计超出任务预算")
+        if category in (CONTEXT_LENGTH, BAD_REQUEST):
+            return RetryDecision(RESPLIT, 0.0, category, "请求内容被拒绝，直接重新分块")
+        if category == TRUNCATED:
+            return RetryDecision(RESPLIT, 0.0, category, "续写后译文仍被截断，直接重新分块")
+        if attempt >= self.max_attempts:
+            return RetryDecision(RESPLIT, 0.0, category, f"连续失败{attempt}次")
+        if budget is not None and not budget.consume():
+            if category in CONGESTION_ERRORS:
+                # 拆分只会把一个请求变成更多请求，拥塞时加重负载，且子块失败后不再降级
+                return RetryDecision(FAIL, 0.0, category, "任务重试预算已耗尽，服务端持续拥塞")
+            return RetryDecision(RESPLIT, 0.0, category, "任务重试预算已耗尽")
+
+        delay = self.backoff(attempt)
+        if category == RATE_LIMIT and (retry_after := parse_retry_after(exc, self.max_delay)) is not None:
+            delay = retry_after
+        return RetryDecision(RETRY, delay, category, "可重试错误")
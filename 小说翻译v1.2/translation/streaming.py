@@ -0,0 +1,189 @@
+# translation/streaming.py
+"""
+流式响应处理模块
+功能：消费 chat.completions 的流式响应（stream=True），增量拼接译文并回调部分结果
+核心机制：
+- 逐块累积 delta.content，按时间间隔节流回调，避免高频刷新界面
+- 从流末尾的usage块读取Token用量（需 stream_options.include_usage）
+- 拼装为与非流式响应结构一致的对象，后续处理流程（清洗、缓存）保持不变
+- 基于不活跃时间的停滞检测：首Token超时与Token间隔超时分别计时，
+  缓慢但持续输出的长请求不会被误杀，真正卡死的请求在数秒内中止并交给重试策略
+"""
+
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+
+from config.settings import STREAM_CONFIG
+
+logger = logging.getLogger("Streaming")
+
+# 停滞阶段
+STAGE_FIRST_TOKEN = "first_token"
+STAGE_IDLE = "idle"
+
+
+class StreamStallError(TimeoutError):
+    """流式响应停滞（首Token或Token间隔超时）
+    继承TimeoutError，错误分类时按超时处理，可直接重试
+    """
+
+    def __init__(self, stage, timeout):
+        self.stage = stage
+        self.timeout = timeout
+        stage_name = "首Token" if stage == STAGE_FIRST_TOKEN else "Token间隔"
+        super().__init__(f"流式响应停滞：{stage_name}超过{timeout}秒无输出")
+
+
+def build_response(content, finish_reason, usage, stream_stats=None):
+    """构造与非流式ChatCompletion结构一致的响应对象
+    :param content: 完整译文
+    :param finish_reason: 结束原因（stop/length等）
+    :param usage: Token用量对象（可能为None）
+    :param stream_stats: 流式计时统计（首Token耗时、最大Token间隔、总耗时）
+    :return: 具有 choices[0].message.content / choices[0].finish_reason / usage 属性的对象
+    """
+    message = SimpleNamespace(role="assistant", content=content)
+    choice = SimpleNamespace(index=0, message=message, finish_reason=finish_reason)
+    return SimpleNamespace(choices=[choice], usage=usage, stream_stats=stream_stats)
+
+
+def _has_activity(chunk):
+    """判断流式块是否包含实际输出（正文或推理内容）"""
+    for choice in chunk.choices or []:
+        delta = choice.delta
+        if delta and (delta.content or getattr(delta, "reasoning_content", None)):
+            return True
+    return False
+
+
+async def collect_stream(stream, on_delta=None, interval=STREAM_CONFIG["CALLBACK_INTERVAL"],
+                         first_token_timeout=STREAM_CONFIG["FIRST_TOKEN_TIMEOUT"],
+                         idle_timeout=STREAM_CONFIG["IDLE_TIMEOUT"]):
+    """消费流式响应并拼接完整结果
+    :param stream: AsyncOpenAI 返回的异步流对象
+    :param on_delta: 部分结果回调，参数为截至目前的累积译文
+    :param interval: 回调最小间隔（秒）
+    :param first_token_timeout: 首Token超时（秒），推理模型的思考内容同样计为输出
+    :param idle_timeout: 两次输出之间的最长间隔（秒）
+    :return: build_response 构造的响应对象
+    :raises StreamStallError: 超过阈值无输出时中止请求并抛出
+    """
+    parts = []
+    finish_reason = None
+    usage = None
+    last_emit = 0.0
+    started = last_activity = time.monotonic()
+    first_token = None
+    max_gap = 0.0
+    iterator = stream.__aiter__()
+
+    try:
+        while True:
+            # 按"距上次输出"计算截止时间，空的心跳块不会重置计时
+            limit = first_token_timeout if first_token is None else idle_timeout
+            remaining = last_activity + limit - time.monotonic()
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), max(remaining, 0))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                raise StreamStallError(STAGE_FIRST_TOKEN if first_token is None else STAGE_IDLE, limit) from None
+
+            now = time.monotonic()
+            if _has_activity(chunk):
+                if first_token is None:
+                    first_token = now - started
+                else:
+                    max_gap = max(max_gap, now - last_activity)
+                last_activity = now
+
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            delta = choice.delta.content if choice.delta else None
+            if not delta:
+                continue
+            parts.append(delta)
+            if on_delta and now - last_emit >= interval:
+                last_emit = now
+                on_delta("".join(parts))
+    except BaseException:
+        # 停滞、取消（对冲落败）或网络错误时主动关闭连接，释放服务端生成
+        await stream.close()
+        raise
+
+    content = "".join(parts)
+    if on_delta and content:
+        on_delta(content)
+    stats = SimpleNamespace(
+        first_token=first_token or 0.0, max_gap=max_gap, duration=time.monotonic() - started
+    )
+    logger.debug("[Streaming] 流式响应完成 | 长度: %d | 结束原因: %s", len(content), finish_reason)
+    return build_response(content, finish_reason, usage, stats)
+
+
+class StallMonitor:
+    """流式计时统计，用于按分块汇报并调优停滞阈值
+
+    属性：
+    - first_token_timeout / idle_timeout: 当前生效的阈值
+    - records: 本任务成功请求的计时统计列表
+    - stalls: 本任务各阶段的停滞次数
+    """
+
+    def __init__(self, config=STREAM_CONFIG):
+        self.first_token_timeout = config["FIRST_TOKEN_TIMEOUT"]
+        self.idle_timeout = config["IDLE_TIMEOUT"]
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """重置任务级统计"""
+        with self._lock:
+            self.records = []
+            self.stalls = {STAGE_FIRST_TOKEN: 0, STAGE_IDLE: 0}
+
+    def record(self, stats):
+        """记录一次成功请求的计时统计"""
+        with self._lock:
+            self.records.append(stats)
+
+    def record_stall(self, error):
+        """记录一次停滞中止"""
+        with self._lock:
+            self.stalls[error.stage] += 1
+
+    def summary(self):
+        """导出本任务的计时汇总
+        :return: 包含首Token与Token间隔的p50/p95/最大值、阈值及停滞次数的字典
+        """
+        with self._lock:
+            records = list(self.records)
+            stalls = dict(self.stalls)
+
+        def _describe(values):
+            if not values:
+                return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+            ordered = sorted(values)
+            return {
+                "p50": statistics.median(ordered),
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max": ordered[-1],
+            }
+
+        return {
+            "requests": len(records),
+            "first_token": _describe([r.first_token for r in records]),
+            "max_gap": _describe([r.max_gap for r in records]),
+            "first_token_timeout": self.first_token_timeout,
+            "idle_timeout": self.idle_timeout,
+            "stalls": stalls,
+        }
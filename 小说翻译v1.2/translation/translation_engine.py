@@ -7,51 +7,100 @@
 - 实现带上下文的翻译流程
 - 提供错误重试机制和模型降级策略
 - 支持格式保留和缓存优化
+- 基于asyncio的异步引擎，单线程事件循环承载大量在途请求
 """
 
+import asyncio
 import logging
+import threading
 import time
 import re
 import uuid
+from types import SimpleNamespace
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
 from cache.cache_manager import TranslationCache
 from file_processor.file_handler import dynamic_split
-from config.settings import TRANSLATION_CONFIG, PROMPT_CONFIG  # 新增配置导入
+from translation.concurrency import AdaptiveConcurrencyController
+from translation.rate_limiter import estimate_tokens
+from translation.retry_policy import RetryPolicy, RetryBudget, RETRY, RESPLIT
+from translation.hedging import HedgePolicy
+from translation.streaming import collect_stream, build_response, StallMonitor, StreamStallError
+from translation.errors import BudgetExceededError, TruncatedOutputError
+from translation.http_transport import build_http_client
+from translation.key_pool import KeyPool
+from translation.model_router import ModelRouter
+from translation.cost_ledger import CostLedger, estimate_cost
+from translation.output_budget import OutputBudget
+from config.settings import (  # 新增配置导入
+    API_CONFIG, TRANSLATION_CONFIG, PROMPT_CONFIG, RATE_LIMIT_CONFIG, STREAM_CONFIG, HTTP_CONFIG, ROUTER_CONFIG,
+    FILE_HANDLER_CONFIG, OUTPUT_BUDGET_CONFIG
+)
 
 # 初始化缓存管理器实例
 cache = TranslationCache()
 logger = logging.getLogger("TranslationEngine")
 
 
-class TranslationEngine:
-    """翻译引擎核心类
+class AsyncTranslationEngine:
+    """异步翻译引擎核心类
 
     属性：
-    - client: DeepSeek API客户端
+    - key_pool: API密钥池，每个密钥持有独立的AsyncOpenAI客户端与共享限速器
+    - client: 首个可用密钥的客户端，用于预热等辅助请求
+    - http_client / connection_stats: 所有密钥共享的httpx连接池及其连接复用统计
+    - concurrency: 自适应并发控制器，根据延迟与错误动态限制同时在途的API请求数
+    - retry_policy / retry_budget: 按错误类别的重试策略与任务级重试预算
+    - hedge_policy: 长尾请求的对冲策略
+    - stall_monitor: 流式停滞检测的阈值与计时统计
+    - router: 模型选择为"自动"时按分块特征选择模型的路由策略
+    - pack_stats: 本任务的多段打包统计（打包请求数、打包段数、回退次数）
+    - hit_stats: 本任务的缓存命中次数与合并等待（相同分块在途）次数
+    - prompt_cache_stats: 本任务输入Token的服务端前缀缓存命中/未命中数
+    - ledger: 费用台账，记录每个请求的Token用量与费用，并执行任务预算上限
+    - output_budget: 按语言对学习输出/输入比例，为每个请求计算max_tokens
     - language_map: 语言名称到代码的映射
     - style_map: 翻译风格名称到代码的映射
     - model_map: 模型名称到API模型标识的映射
 
     功能：
     - 初始化翻译引擎配置
-    - 实现带上下文的翻译逻辑
-    - 处理API响应和错误重试
+    - 实现带上下文的翻译逻辑（协程）
+    - 处理API响应和错误重试（asyncio.sleep退避，不占用线程）
     - 保留和恢复文本格式
     """
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, max_concurrency=API_CONFIG["MAX_CONCURRENCY"], transport=None):
         """初始化翻译引擎
-        :param api_key: DeepSeek API密钥
+        :param api_key: DeepSeek API密钥，或密钥列表（元素为密钥或 (密钥, 权重)）
+        :param max_concurrency: 初始的在途API请求上限
+        :param transport: 外部注入的httpx异步transport（可选，默认按并发上限构建连接池）
         """
         self.gui = None  # 新增属性
-        logger.info("[TranslationEngine] 初始化翻译引擎")
-        # 初始化API客户端
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url="https://api.deepseek.com",
-            timeout=180,
+        self.worker = None  # 翻译工作线程，用于暂停检查与日志输出
+        logger.info("[TranslationEngine] 初始化异步翻译引擎 | 并发上限: %d", max_concurrency)
+        self.concurrency = AdaptiveConcurrencyController(max_concurrency)
+        # 连接池大小随并发控制器可能达到的最大上限伸缩
+        self.http_client, self.connection_stats = build_http_client(
+            max(self.concurrency.max_limit, max_concurrency), transport
         )
+        # 初始化API客户端（每个密钥一个客户端，共享连接池）
+        api_keys = [api_key] if isinstance(api_key, str) else list(api_key)
+        self.key_pool = KeyPool(api_keys, self._create_client)
+        self.retry_policy = RetryPolicy()
+        self.retry_budget = RetryBudget()
+        self.hedge_policy = HedgePolicy()
+        self.stall_monitor = StallMonitor()
+        self.router = ModelRouter()
+        self.pack_stats = {"packs": 0, "segments": 0, "fallbacks": 0}
+        self.hit_stats = {"cache": 0, "coalesced": 0}
+        self.prompt_cache_stats = {"hit": 0, "miss": 0}
+        self.ledger = CostLedger()
+        self.output_budget = OutputBudget()
+        self._inflight = {}  # 在途请求 {缓存键: asyncio.Future}，用于合并相同分块的请求
+        self._resume_waiter = None  # 暂停期间所有协程共享的恢复等待（只占用一个线程）
+        self._budget_released = asyncio.Event()  # 有预算预留被结算时置位，唤醒等待预算的请求
         # 从配置中加载语言、风格和模型映射
         self.language_map = TRANSLATION_CONFIG["LANGUAGE_MAP"]
         self.style_map = TRANSLATION_CONFIG["STYLE_MAP"]
@@ -59,8 +108,82 @@ class TranslationEngine:
         logger.debug("[TranslationEngine] 翻译引擎配置完成 | 支持语言: %s | 支持风格: %s",
                      self.language_map.keys(), self.style_map.keys())
 
-    def translate_with_context(self, text, target_lang, style, temperature, model_name, file_hash, previous_chunk="",
-                               log_callback=None):
+    def begin_job(self, job_name="", budget=None):
+        """开始新的翻译任务，重置任务级状态（重试预算、对冲统计等）
+        :param job_name: 任务名（通常为源文件名），记入费用台账
+        :param budget: 本任务的费用上限，None表示不限
+        """
+        self.retry_budget = RetryBudget()
+        self.ledger.begin_run(job_name, budget)
+        self.hedge_policy.reset_stats()
+        self.stall_monitor.reset()
+        self.connection_stats.reset()
+        self.key_pool.reset_stats()
+        self.router.reset_stats()
+        self.pack_stats = {"packs": 0, "segments": 0, "fallbacks": 0}
+        self.hit_stats = {"cache": 0, "coalesced": 0}
+        self.prompt_cache_stats = {"hit": 0, "miss": 0}
+        self.output_budget.reset_stats()
+        logger.debug("[TranslationEngine] 新任务开始 | 重试预算: %d", self.retry_budget.limit)
+
+    def _create_client(self, api_key):
+        """为单个密钥创建API客户端
+        :param api_key: DeepSeek API密钥
+        :return: AsyncOpenAI实例
+        """
+        return AsyncOpenAI(
+            api_key=api_key,
+            base_url=API_CONFIG["BASE_URL"],
+            timeout=self._request_timeout(),
+            max_retries=0,  # 重试统一由retry_policy处理，避免SDK内部重复重试
+            http_client=self.http_client,
+        )
+
+    @property
+    def client(self):
+        return self.key_pool.primary_client
+
+    async def warm_up(self, connections=HTTP_CONFIG["WARMUP_CONNECTIONS"]):
+        """预热连接：提前完成DNS、TCP与TLS握手，避免首个翻译请求承担建连开销
+        使用轻量的模型列表接口并发发起请求，失败只记录日志
+        :param connections: 预热的连接数
+        """
+        start_time = time.time()
+        results = await asyncio.gather(
+            *(self.client.models.list() for _ in range(max(1, connections))),
+            return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning("[TranslationEngine] 连接预热失败 %d/%d | %s", len(failures), len(results), failures[0])
+        logger.info("[TranslationEngine] 连接预热完成 | 耗时: %.2fs | %s",
+                    time.time() - start_time, self.connection_stats.summary())
+
+    @staticmethod
+    def _request_timeout():
+        """请求超时设置：连接超时单独限制，读取超时作为流式停滞检测之外的兜底"""
+        return httpx.Timeout(API_CONFIG["TIMEOUT"], connect=STREAM_CONFIG["CONNECT_TIMEOUT"])
+
+    async def _wait_if_paused(self):
+        """暂停状态检查
+        未暂停时直接在事件循环中返回，不切换线程；暂停期间worker的阻塞等待只在一个线程中执行，
+        所有等待恢复的协程共享其结果
+        """
+        if self.worker is None or not self.worker.is_paused():
+            return
+        if self._resume_waiter is None:
+            self._resume_waiter = asyncio.ensure_future(asyncio.to_thread(self.worker.wait_if_paused))
+            self._resume_waiter.add_done_callback(self._clear_resume_waiter)
+        # shield：单个协程被取消时不影响其他协程的等待
+        await asyncio.shield(self._resume_waiter)
+        logger.debug("[TranslationEngine] 通过暂停状态检查")
+
+    def _clear_resume_waiter(self, waiter):
+        if self._resume_waiter is waiter:
+            self._resume_waiter = None
+
+    async def translate_with_context(self, text, target_lang, style, temperature, model_name, file_hash,
+                                     previous_chunk="", log_callback=None, stream_callback=None, restore=True):
         """
         带上下文的翻译核心方法
         :param text: 待翻译文本
@@ -71,6 +194,8 @@ class TranslationEngine:
         :param file_hash: 文件哈希，用于缓存键生成
         :param previous_chunk: 前文内容，用于上下文关联
         :param log_callback: 日志回调函数，用于在GUI中输出缓存命中信息
+        :param stream_callback: 流式部分结果回调，参数为截至目前的累积译文（仅流式模式生效）
+        :param restore: 是否还原格式；为False时返回写入缓存的未还原译文（分块降级拼接子块时使用）
         :return: 翻译结果
         """
         logger.debug("[TranslationEngine] 开始翻译处理 | 目标语言: %s | 风格: %s | 模型: %s | 文件哈希: %s",
@@ -81,40 +206,411 @@ class TranslationEngine:
         # 生成缓存键
         cache_key = cache.get_key(text, target_lang, style, file_hash)
 
-        # 缓存检查，同时传入日志回调函数，将信息输出到GUI实时日志中
-        if cached := cache.get(
+        # 缓存检查（存储读取在线程中执行），同时传入日志回调函数，将信息输出到GUI实时日志中
+        if cached := await cache.aget(
                 text, target_lang, style, file_hash,
-                log_callback=lambda msg: (self.worker.log.emit(msg, "cache") if hasattr(self, 'worker')
+                log_callback=lambda msg: (self.worker.log.emit(msg, "cache") if self.worker is not None
                 else (log_callback(msg) if log_callback else None))
         ):
             logger.info("[TranslationEngine] 缓存命中...")
-            return self.restore_formatting(cached, replacements, target_lang)
+            self.hit_stats["cache"] += 1
+            return self.restore_formatting(cached, replacements, target_lang) if restore else cached
+
+        # 相同分块已在请求中时等待其结果（未还原格式的译文），不重复发送请求
+        if (shared := self._inflight.get(cache_key)) is not None:
+            self.hit_stats["coalesced"] += 1
+            logger.info("[TranslationEngine] 相同分块正在翻译，合并等待其结果 | 缓存键: %s", cache_key[:8])
+            result = await asyncio.shield(shared)
+            return self.restore_formatting(result, replacements, target_lang) if restore else result
 
         # 构建上下文
         context = self._build_context(previous_chunk, target_lang)
         logger.debug("[TranslationEngine] 上下文摘要 | 长度: %d 字符", len(context))
 
+        messages = self._build_prompt(target_lang, style, context, processed_text)
+        pair = self.output_budget.pair(text, target_lang, style)
+        input_tokens = estimate_tokens(processed_text)
+        max_tokens = self.output_budget.max_tokens(pair, input_tokens, self.model_map[model_name])
+        # 请求参数准备完成后才登记在途请求并立即进入try，保证登记项总能在finally中移除
+        shared = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = shared
         try:
-            # API调用
-            start_time = time.time()
-            response = self.client.chat.completions.create(
-                model=self.model_map[model_name],
-                messages=[{"role": "user", "content": self._build_prompt(target_lang, style, context, processed_text)}],
-                temperature=float(temperature),
-                max_tokens=8192,
-                timeout=180
+            response, start_time, model_used = await self._hedged_completion(
+                model_name, messages, temperature, stream_callback, max_tokens, cache_key
+            )
+            if response.choices[0].finish_reason == "length":
+                response = await self._continue_truncated(
+                    model_used, messages, temperature, response, max_tokens, stream_callback, cache_key
                 )
-            result = self._process_api_response(response, start_time, model_name)
+            await self._record_output_usage(pair, input_tokens, response, model_used)
+            result = self._process_api_response(response, start_time, model_used)
 
-            # 缓存结果
+            # 缓存结果（只写入内存待写回表，由缓存的后台线程批量持久化）
             cache.set(text, target_lang, style, result, file_hash)
             logger.debug("[TranslationEngine] 翻译结果处理完成 | 原始长度: %d | 翻译后长度: %d",
                          len(text), len(result))
-            return self.restore_formatting(result, replacements, target_lang)
+            shared.set_result(result)
+            return self.restore_formatting(result, replacements, target_lang) if restore else result
 
         except Exception as e:
-            logger.error("[TranslationEngine] API调用失败: %s", str(e), exc_info=True)
-            raise Exception(f"API调用失败: {str(e)}")
+            category = self.concurrency.record_failure(e)
+            logger.error("[TranslationEngine] API调用失败 | 错误类别: %s | %s", category, str(e), exc_info=True)
+            error = Exception(f"API调用失败: {str(e)}")
+            error.__cause__ = e
+            shared.set_exception(error)
+            raise error
+        finally:
+            del self._inflight[cache_key]
+            if not shared.done():
+                # 发起者被取消时，等待者按失败处理并由各自的重试流程重新请求
+                shared.set_exception(RuntimeError("相同分块的请求已取消"))
+            # 没有等待者时避免"异常未被读取"的警告
+            shared.exception()
+
+    async def _request_completion(self, model_name, messages, temperature, started=None, on_delta=None,
+                                  max_tokens=None, chunk_key=None):
+        """发起一次API请求（并发控制 + 暂停检查 + 预算 + 密钥选择 + 限速），流式模式下增量拼接结果
+        暂停检查与预算预留都在拿到并发名额之后：排队中的请求不占用预算，暂停期间已获准但尚未发出的请求不会发出；
+        密钥与限速配额在拿到并发名额后才获取，密钥的在途数只统计真正发送中的请求；
+        两者都在try之内获取，等待期间被取消（任务取消、对冲落败）时同样归还密钥，限速器退还预约的请求数与Token；
+        返回的用量在释放预算预留之前记入台账，其他请求检查预算时能看到实际花费；
+        请求发出后才被取消时服务端仍会计费，按预估的输入Token记入台账（标记为预估）并保留在限速器中
+        :param model_name: 使用的模型名称
+        :param messages: 请求消息列表（_build_prompt 构造）
+        :param temperature: 温度值
+        :param started: 可选的asyncio.Event，在真正发出请求（拿到并发名额）时置位
+        :param on_delta: 流式部分结果回调
+        :param max_tokens: 输出上限，None时使用 OUTPUT_BUDGET_CONFIG 的上限
+        :param chunk_key: 分块缓存键，记入费用台账（可选）
+        :return: (API响应对象, 请求开始时间, 实际使用的模型名称)
+        """
+        slot = None
+        reserved_tokens = 0
+        response = None
+        sent_tokens = 0  # 请求已发出时为预估的输入Token数
+        billed_tokens = 0  # 未拿到响应时仍需计入限速器的Token数
+        # API调用（并发控制器限制在途请求数，缓存命中不占用名额）
+        async with self.concurrency:
+            await self._wait_if_paused()
+            reserved_cost = await self._reserve_budget(model_name, messages)
+            try:
+                slot = await self.key_pool.acquire()
+                reserved_tokens = await self._acquire_rate_limit(slot.rate_limiter, messages)
+                if started is not None:
+                    started.set()
+                start_time = time.time()
+                sent_tokens = estimate_tokens(self._messages_text(messages))
+                request_kwargs = dict(
+                    model=self.model_map[model_name],
+                    messages=messages,
+                    temperature=float(temperature),
+                    max_tokens=max_tokens or OUTPUT_BUDGET_CONFIG["MAX_TOKENS"],
+                    timeout=self._request_timeout()
+                )
+                if STREAM_CONFIG["ENABLED"]:
+                    stream = await slot.client.chat.completions.create(
+                        stream=True, stream_options={"include_usage": True}, **request_kwargs
+                    )
+                    try:
+                        response = await collect_stream(
+                            stream, on_delta,
+                            first_token_timeout=self.stall_monitor.first_token_timeout,
+                            idle_timeout=self.stall_monitor.idle_timeout
+                        )
+                    except StreamStallError as e:
+                        self.stall_monitor.record_stall(e)
+                        logger.warning("[TranslationEngine] %s，中止请求 | 模型: %s", e, model_name)
+                        raise
+                    self._log_stream_stats(response.stream_stats, model_name)
+                else:
+                    response = await slot.client.chat.completions.create(**request_kwargs)
+                cache_hit, _ = self._prompt_cache_usage(response.usage)
+                self.ledger.record(self.model_map[model_name], response.usage, cache_hit, chunk_key)
+            except asyncio.CancelledError:
+                if sent_tokens and response is None:
+                    billed_tokens = sent_tokens
+                    self.ledger.record(self.model_map[model_name],
+                                       SimpleNamespace(prompt_tokens=sent_tokens, completion_tokens=0),
+                                       chunk_key=chunk_key, estimated=True)
+                raise
+            except Exception as e:
+                if slot is not None:
+                    self.key_pool.report_failure(slot, e)
+                raise
+            finally:
+                if slot is not None:
+                    self.key_pool.release(slot)
+                    # 用实际用量修正预约；请求失败时全额退还，发出后被取消时保留输入部分，未返回用量时保留预估
+                    if response is None:
+                        self._settle_rate_limit(slot.rate_limiter, reserved_tokens, billed_tokens)
+                    elif response.usage is not None:
+                        self._settle_rate_limit(slot.rate_limiter, reserved_tokens, response.usage.total_tokens)
+                self._release_budget(reserved_cost)
+        # 台账文件的追加写入放到线程中执行，避免阻塞事件循环
+        await asyncio.to_thread(self.ledger.flush)
+        self.hedge_policy.record_latency(time.time() - start_time)
+        return response, start_time, model_name
+
+    def _log_stream_stats(self, stats, model_name):
+        """记录单个请求的流式计时，附带当前阈值便于调参"""
+        self.stall_monitor.record(stats)
+        logger.info(
+            "[TranslationEngine] 流式计时 | 模型: %s | 首Token: %.2fs/%ss | 最大间隔: %.2fs/%ss | 总耗时: %.2fs",
+            model_name, stats.first_token, self.stall_monitor.first_token_timeout,
+            stats.max_gap, self.stall_monitor.idle_timeout, stats.duration
+        )
+
+    async def _hedged_completion(self, model_name, messages, temperature, on_delta=None, max_tokens=None,
+                                 chunk_key=None):
+        """带对冲的API请求
+        主请求耗时超过近期延迟分位数时发送对冲请求，取先成功返回者并取消另一个
+        流式回调只跟随主请求，对冲请求胜出时以其完整结果为准
+        落败请求的用量与主请求一样由 _request_completion 记入台账，_account_hedge_loser 另计入对冲统计
+        :return: 同 _request_completion
+        """
+        self.hedge_policy.record_request()
+        delay = self.hedge_policy.hedge_delay()
+        if delay is None:
+            return await self._request_completion(model_name, messages, temperature, on_delta=on_delta,
+                                                  max_tokens=max_tokens, chunk_key=chunk_key)
+
+        started = asyncio.Event()
+        primary = asyncio.create_task(
+            self._request_completion(model_name, messages, temperature, started, on_delta, max_tokens, chunk_key)
+        )
+        tasks = {primary: started}
+        winner = None
+        try:
+            # 排队等待限速与并发名额的时间不计入对冲计时
+            started_waiter = asyncio.create_task(started.wait())
+            await asyncio.wait({primary, started_waiter}, return_when=asyncio.FIRST_COMPLETED)
+            started_waiter.cancel()
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.hedge_policy.try_acquire_hedge():
+                return await primary
+
+            hedge_model = self.hedge_policy.hedge_model or model_name
+            logger.warning("[TranslationEngine] 请求超过 %.1fs 未返回，发送对冲请求 | 模型: %s", delay, hedge_model)
+            hedge_started = asyncio.Event()
+            hedge = asyncio.create_task(
+                self._request_completion(hedge_model, messages, temperature, hedge_started,
+                                         max_tokens=max_tokens, chunk_key=chunk_key)
+            )
+            tasks[hedge] = hedge_started
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is hedge:
+                            self.hedge_policy.record_hedge_win()
+                            logger.info("[TranslationEngine] 对冲请求先返回，已取消原请求")
+                        return task.result()
+            # 两个请求都失败时抛出主请求的异常
+            return primary.result()
+        finally:
+            for task, task_started in tasks.items():
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                if winner is not None:
+                    task.add_done_callback(
+                        lambda loser, loser_started=task_started: self._account_hedge_loser(
+                            loser, loser_started, estimate_tokens(self._messages_text(messages)))
+                    )
+
+    def _account_hedge_loser(self, task, started, prompt_tokens):
+        """将落败请求的开销计入对冲统计（任务结束后回调）
+        已返回的按实际用量；发出后被取消的服务端仍按输入计费，按预估的输入Token计入
+        （台账已由 _request_completion 按同样的口径记录）
+        :param task: 落败的请求任务
+        :param started: 该请求的发出事件
+        :param prompt_tokens: 预估的输入Token数
+        """
+        if task.cancelled():
+            if started.is_set():
+                self.hedge_policy.record_duplicate(prompt_tokens, estimated=True)
+            return
+        if task.exception() is not None:
+            return
+        response, _, _ = task.result()
+        self.hedge_policy.record_duplicate(response.usage.total_tokens if response.usage is not None else 0)
+
+    async def _continue_truncated(self, model_name, messages, temperature, response, max_tokens,
+                                  on_delta=None, chunk_key=None):
+        """译文因输出上限被截断时发送续写请求，拼接为完整译文
+        已输出的译文作为assistant消息附在原消息之后，原消息前缀不变，可命中服务端前缀缓存
+        :param model_name: 使用的模型名称
+        :param messages: 原请求消息列表
+        :param temperature: 温度值
+        :param response: 被截断的响应
+        :param max_tokens: 每次续写的输出上限
+        :param on_delta: 流式部分结果回调（参数为包含已输出部分的累积译文）
+        :param chunk_key: 分块缓存键，续写请求同样记入费用台账（可选）
+        :return: 与API响应结构一致的对象，内容为拼接后的译文，用量为各次请求之和
+        :raises TruncatedOutputError: 续写次数用完仍被截断时抛出（由重试策略转入分块降级）
+        """
+        content = response.choices[0].message.content or ""
+        responses = [response]
+        while responses[-1].choices[0].finish_reason == "length":
+            if len(responses) > OUTPUT_BUDGET_CONFIG["MAX_CONTINUATIONS"]:
+                self.output_budget.record_truncation(len(responses) - 1)
+                raise TruncatedOutputError(f"续写{len(responses) - 1}次后译文仍被截断 | 已输出 {len(content)} 字")
+            logger.warning("[TranslationEngine] 译文达到输出上限被截断，发送续写请求 | 已输出: %d 字 | 第%d次续写",
+                           len(content), len(responses))
+            continuation = messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": PROMPT_CONFIG["CONTINUE_PROMPT"]},
+            ]
+            delta_callback = None
+            if on_delta is not None:
+                delta_callback = lambda partial, prefix=content: on_delta(self._stitch_continuation(prefix, partial))
+            next_response, _, _ = await self._request_completion(
+                model_name, continuation, temperature, on_delta=delta_callback, max_tokens=max_tokens,
+                chunk_key=chunk_key
+            )
+            content = self._stitch_continuation(content, next_response.choices[0].message.content or "")
+            responses.append(next_response)
+
+        self.output_budget.record_truncation(len(responses) - 1)
+        logger.info("[TranslationEngine] 续写完成 | 续写次数: %d | 译文长度: %d", len(responses) - 1, len(content))
+        return build_response(content, responses[-1].choices[0].finish_reason,
+                              self._merge_usage([r.usage for r in responses]),
+                              getattr(responses[0], "stream_stats", None))
+
+    @staticmethod
+    def _stitch_continuation(previous, continuation, max_overlap=200, min_overlap=8):
+        """拼接续写内容，去掉续写开头与已输出结尾重复的部分
+        过短的重合（如换行、标点或单个字）多为巧合，不足 min_overlap 个字符时原样拼接
+        :param previous: 已输出的译文
+        :param continuation: 续写返回的译文
+        :param max_overlap: 检查重复的最大长度
+        :param min_overlap: 视为重复的最小长度
+        :return: 拼接后的译文
+        """
+        for size in range(min(max_overlap, len(previous), len(continuation)), min_overlap - 1, -1):
+            if previous.endswith(continuation[:size]):
+                return previous + continuation[size:]
+        return previous + continuation
+
+    def _merge_usage(self, usages):
+        """合并多次请求的Token用量（用于前缀缓存统计与输出比例学习，费用已由 _request_completion 逐次记入台账）
+        :param usages: 各次响应的用量对象列表（元素可能为None）
+        :return: 合并后的用量对象，全部为None时返回None
+        """
+        usages = [usage for usage in usages if usage is not None]
+        if not usages:
+            return None
+        merged = SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0,
+                                 prompt_cache_hit_tokens=0, prompt_cache_miss_tokens=0)
+        for usage in usages:
+            merged.prompt_tokens += usage.prompt_tokens or 0
+            merged.completion_tokens += usage.completion_tokens or 0
+            merged.total_tokens += usage.total_tokens or 0
+            hit, miss = self._prompt_cache_usage(usage)
+            merged.prompt_cache_hit_tokens += hit
+            merged.prompt_cache_miss_tokens += miss
+        return merged
+
+    async def _reserve_budget(self, model_name, messages):
+        """按预估费用预留预算（拿到并发名额后、发出请求前调用）
+        其他在途请求的预留尚未结算时先等待其结算，按实际花费重新判断；
+        仅凭已花费用即预计超出预算时暂停任务（而不是失败），用户点击"继续"后重新读取界面中的预算再检查，
+        预算仍不足时再次暂停
+        :param model_name: 使用的模型名称
+        :param messages: 请求消息列表
+        :return: 预留的预估费用
+        :raises BudgetExceededError: 没有可暂停的任务线程（如命令行调用）时抛出
+        """
+        prompt_tokens = estimate_tokens(self._messages_text(messages))
+        completion_tokens = int(prompt_tokens * RATE_LIMIT_CONFIG["COMPLETION_RATIO"])
+        cost = estimate_cost(self.model_map[model_name], prompt_tokens, completion_tokens)
+        while not self.ledger.reserve(cost):
+            if self.ledger.reserved > 0:
+                self._budget_released.clear()
+                await self._budget_released.wait()
+                continue
+            summary = self.ledger.run_summary()
+            message = (f"💰 预计超出预算（已用 {summary['cost']:.4f} / {summary['budget']} {summary['currency']}），"
+                       "任务已暂停，请提高预算（留空表示不限）后点击继续")
+            logger.warning("[TranslationEngine] %s", message)
+            if self.worker is None:
+                raise BudgetExceededError(message)
+            if not self.worker.is_paused():
+                self.worker.log.emit(message, "error")
+                self.worker.pause("预计超出费用预算，自动暂停")
+            await self._wait_if_paused()
+            self._refresh_budget()
+        return cost
+
+    def _release_budget(self, cost):
+        """释放预算预留并唤醒等待预算的请求"""
+        self.ledger.release(cost)
+        self._budget_released.set()
+
+    def _refresh_budget(self):
+        """继续任务时重新读取界面中填写的预算（无界面、输入无效或不大于0时保持原预算）"""
+        if self.gui is None:
+            return
+        text = self.gui.budget_input.text().strip()
+        try:
+            budget = float(text) if text else None
+        except ValueError:
+            logger.warning("[TranslationEngine] 无效的费用预算输入: %s，沿用原预算", text)
+            return
+        if budget is not None and budget <= 0:
+            logger.warning("[TranslationEngine] 费用预算必须大于0: %s，沿用原预算", text)
+            return
+        self.ledger.set_budget(budget)
+        logger.info("[TranslationEngine] 继续任务，预算上限: %s", budget or "不限")
+
+    async def _acquire_rate_limit(self, rate_limiter, messages):
+        """按预估Token数等待限速配额
+        :param rate_limiter: 所用密钥的限速器（未启用限速时为None）
+        :param messages: 请求消息列表
+        :return: 预约的Token数（未启用限速时为0）
+        """
+        if rate_limiter is None:
+            return 0
+        prompt_tokens = estimate_tokens(self._messages_text(messages))
+        estimated = prompt_tokens + int(prompt_tokens * RATE_LIMIT_CONFIG["COMPLETION_RATIO"])
+        return await rate_limiter.acquire(estimated)
+
+    def _settle_rate_limit(self, rate_limiter, reserved_tokens, actual_tokens):
+        """用实际Token用量修正限速器的预估扣减"""
+        if rate_limiter is not None and reserved_tokens:
+            rate_limiter.settle(reserved_tokens, actual_tokens)
+
+    def prepare_prompt(self, text, target_lang, style, previous_chunk=""):
+        """构建单个分块的请求消息（不发起请求，供批量任务生成请求文件）
+        :param text: 待翻译文本
+        :param target_lang: 目标语言代码
+        :param style: 翻译风格代码
+        :param previous_chunk: 前文内容
+        :return: (请求消息列表, 占位符映射表)
+        """
+        processed_text, replacements = self.preserve_formatting(text, target_lang)
+        context = self._build_context(previous_chunk, target_lang)
+        return self._build_prompt(target_lang, style, context, processed_text), replacements
+
+    def clean_result(self, content):
+        """清理API返回内容（不还原格式），结果即写入缓存的译文"""
+        return self._clean_result(content)
+
+    def record_usage(self, model, usage, chunk_key=None):
+        """记录不经本引擎发出的请求（如批量任务结果）的用量：计入费用台账与前缀缓存统计
+        :param model: 接口模型名（如 deepseek-chat）
+        :param usage: Token用量对象
+        :param chunk_key: 分块缓存键（可选）
+        :return: 本次请求的费用
+        """
+        cache_hit, cache_miss = self._prompt_cache_usage(usage)
+        self.prompt_cache_stats["hit"] += cache_hit
+        self.prompt_cache_stats["miss"] += cache_miss
+        return self.ledger.record(model, usage, cache_hit, chunk_key)
 
     def _build_context(self, previous_chunk, target_lang):
         """构建上下文摘要（优化上下文截取逻辑）
@@ -129,16 +625,43 @@ class TranslationEngine:
         return f"前文摘要：{previous_chunk[-max_context_length:]}\n\n"
 
     def _build_prompt(self, target_lang, style, context, processed_text):
-        """构造带详细日志的prompt
+        """构造请求消息
+        固定内容（风格模板、语言要求、术语表）放在system消息中，同一任务内保持字节级一致，
+        便于命中服务端的前缀缓存；变化的前文摘要与待翻译文本放在其后的user消息中
         :param target_lang: 目标语言代码
         :param style: 翻译风格代码
         :param context: 上下文摘要
         :param processed_text: 预处理后的文本
-        :return: 完整的prompt字符串
+        :return: 消息列表 [system, user]
         """
-        prompt_template = self._get_prompt_template(target_lang, style)
-        logger.debug("[TranslationEngine] Prompt构造完成 | 总长度: %d 字符", len(prompt_template))
-        return f"{context}{prompt_template}\n需要翻译的文本：\n{processed_text}"
+        system_prompt = self._build_system_prompt(target_lang, style)
+        user_prompt = f"{context}需要翻译的文本：\n{processed_text}"
+        logger.debug("[TranslationEngine] Prompt构造完成 | 固定部分: %d 字符 | 可变部分: %d 字符",
+                     len(system_prompt), len(user_prompt))
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    def _build_system_prompt(self, target_lang, style):
+        """构造固定的system提示词：风格模板 + 语言专项要求 + 术语表
+        :param target_lang: 目标语言代码
+        :param style: 翻译风格代码
+        :return: system提示词字符串
+        """
+        parts = [self._get_prompt_template(target_lang, style)]
+        if lang_rules := self._get_lang_specific_instructions(target_lang):
+            parts.append(lang_rules)
+        if glossary := PROMPT_CONFIG["GLOSSARY"]:
+            # 按原文排序，保证术语表顺序稳定
+            terms = "\n".join(f"- {source} → {target}" for source, target in sorted(glossary.items()))
+            parts.append(f"术语表（请统一使用以下译法）：\n{terms}")
+        return "\n".join(parts)
+
+    @staticmethod
+    def _messages_text(messages):
+        """拼接消息内容，用于Token预估"""
+        return "".join(message["content"] for message in messages)
 
     def _get_prompt_template(self, target_lang, style):
         """获取翻译提示模板
@@ -151,7 +674,7 @@ class TranslationEngine:
             # 强制要求提示词必须包含翻译目标语言标记
             base_requirement = f"请严格使用{target_lang}进行翻译，并按照以下要求翻译，仅输出翻译后的文本：\n"
 
-            if hasattr(self, 'gui') and (custom_prompt := self.gui.prompt_input.text().strip()):
+            if self.gui is not None and (custom_prompt := self.gui.prompt_input.text().strip()):
                 # 自动补全格式要求
                 if "翻译后的文本" not in custom_prompt:
                     custom_prompt = f"{base_requirement}{custom_prompt}"
@@ -180,8 +703,14 @@ class TranslationEngine:
         """
         return PROMPT_CONFIG["LANG_SPECIFIC_PROMPT"].get(target_lang, "")
 
+    async def _record_output_usage(self, pair, input_tokens, response, model_name):
+        """将实际输出用量计入语言对的输出/输入比例，需要保存时在线程中写入比例文件"""
+        if self.output_budget.record(pair, input_tokens, response.usage, self.model_map[model_name],
+                                     response.choices[0].finish_reason):
+            await asyncio.to_thread(self.output_budget.save)
+
     def _process_api_response(self, response, start_time, model_name):
-        """处理API响应并记录性能指标
+        """处理API响应并记录性能指标（费用已由 _request_completion 按请求记入台账）
         :param response: API响应对象
         :param start_time: API调用开始时间
         :param model_name: 使用的模型名称
@@ -192,61 +721,186 @@ class TranslationEngine:
         result = response.choices[0].message.content
         result = self._clean_result(result)
         latency = time.time() - start_time
+        total_tokens = response.usage.total_tokens if response.usage is not None else 0
+        cache_hit, cache_miss = self._prompt_cache_usage(response.usage)
+        self.prompt_cache_stats["hit"] += cache_hit
+        self.prompt_cache_stats["miss"] += cache_miss
+        self.concurrency.record_success(latency, total_tokens)
+        self.router.record_result(model_name, latency, total_tokens)
         logger.info(
-            "[TranslationEngine] API调用成功 | 耗时: %.2fs | 模型: %s | 使用Token: %d",
-            latency, model_name, response.usage.total_tokens
+            "[TranslationEngine] API调用成功 | 耗时: %.2fs | 模型: %s | 使用Token: %d | "
+            "前缀缓存命中/未命中Token: %d/%d | 并发上限: %d",
+            latency, model_name, total_tokens, cache_hit, cache_miss, self.concurrency.limit
         )
         return result
 
-    def safe_translate(self, text, target_lang, style, temp, model_name, file_hash, previous_chunk="", retry=0,
-                       log_callback=None):
+    @staticmethod
+    def _prompt_cache_usage(usage):
+        """读取输入Token的前缀缓存命中情况
+        DeepSeek返回 prompt_cache_hit_tokens / prompt_cache_miss_tokens，
+        OpenAI兼容接口返回 prompt_tokens_details.cached_tokens
+        :param usage: 响应中的Token用量对象（可能为None）
+        :return: (命中Token数, 未命中Token数)
+        """
+        if usage is None:
+            return 0, 0
+        hit = getattr(usage, "prompt_cache_hit_tokens", None)
+        if hit is not None:
+            return hit, getattr(usage, "prompt_cache_miss_tokens", None) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        hit = getattr(details, "cached_tokens", None) or 0
+        return hit, max(0, (usage.prompt_tokens or 0) - hit)
+
+    async def safe_translate(self, text, target_lang, style, temp, model_name, file_hash, previous_chunk="",
+                             log_callback=None, allow_fallback=True, stream_callback=None, restore=True):
         """
         增强安全性的翻译方法（支持暂停检查）
+        重试以循环实现，由retry_policy按错误类别决定退避时长或直接转入分块降级
         :param text: 待翻译文本
         :param target_lang: 用户选择的目标语言（例如 'zh'、'en' 等）
         :param style: 用户选择的风格（例如 "standard"、"light_novel"、"formal"）
         :param temp: 温度值
-        :param model_name: 使用的模型名称
+        :param model_name: 使用的模型名称（为"自动"时由router按分块特征选择）
         :param file_hash: 文件哈希，用于缓存键生成
         :param previous_chunk: 上下文文本（默认为空字符串）
-        :param retry: 当前重试次数（默认为0）
         :param log_callback: 日志回调函数，用于在GUI中输出重试等日志信息
+        :param allow_fallback: 重试失败后是否允许分块降级（降级产生的子块不再继续降级）
+        :param stream_callback: 流式部分结果回调（重试时从头重新回调）
+        :param restore: 是否还原格式（同 translate_with_context）
         :return: 翻译结果以及实际使用的模型名称
         """
-        logger.debug("[TranslationEngine] 安全翻译调用 | 重试次数: %d | 模型: %s", retry, model_name)
-        try:
-            if hasattr(self, 'worker'):
-                self.worker.wait_if_paused()
-                logger.debug("[TranslationEngine] 通过暂停状态检查")
-
-            # 调用translate_with_context，并传递log_callback
-            result = self.translate_with_context(
-                text,
-                self.language_map[target_lang],
-                style,
-                temp,
-                model_name,
-                file_hash,
-                previous_chunk,
-                log_callback=log_callback
-            )
-            return result, model_name
+        if model_name == ROUTER_CONFIG["AUTO_MODEL"]:
+            model_name = self.router.route(text)
+        attempt = 0
+        while True:
+            logger.debug("[TranslationEngine] 安全翻译调用 | 重试次数: %d | 模型: %s", attempt, model_name)
+            try:
+                await self._wait_if_paused()
 
-        except Exception as e:
-            if retry < 3:
-                wait_time = 2 ** retry + 0.5
-                logger.warning("[TranslationEngine] 翻译失败，准备重试...")
-                if log_callback:
-                    log_callback(f"请求超时，第{retry + 1}次重试（等待{wait_time:.1f}秒）")
-                new_model = self._handle_model_downgrade(model_name, retry)
-                time.sleep(wait_time)
-                return self.safe_translate(
-                    text, target_lang, style, temp, new_model,
-                    file_hash, previous_chunk, retry + 1, log_callback=log_callback
+                # 调用translate_with_context，并传递log_callback
+                result = await self.translate_with_context(
+                    text,
+                    self.language_map[target_lang],
+                    style,
+                    temp,
+                    model_name,
+                    file_hash,
+                    previous_chunk,
+                    log_callback=log_callback,
+                    stream_callback=stream_callback,
+                    restore=restore
                 )
+                return result, model_name
+
+            except Exception as e:
+                decision = self.retry_policy.decide(e, attempt, self.retry_budget)
+                if decision.action == RETRY:
+                    logger.warning("[TranslationEngine] 翻译失败，准备重试 | 错误类别: %s | 等待: %.1fs",
+                                   decision.category, decision.delay)
+                    if log_callback:
+                        log_callback(f"请求失败（{decision.category}），第{attempt + 1}次重试"
+                                     f"（等待{decision.delay:.1f}秒）")
+                    model_name = self._handle_model_downgrade(model_name, attempt)
+                    await asyncio.sleep(decision.delay)
+                    attempt += 1
+                    continue
+                if decision.action == RESPLIT and allow_fallback:
+                    logger.error("[TranslationEngine] %s，启用分块降级 | 原始长度: %d", decision.reason, len(text))
+                    return await self._handle_fallback(text, target_lang, style, temp, model_name, file_hash,
+                                                       previous_chunk, restore)
+                logger.error("[TranslationEngine] 翻译失败且不再重试 | %s | 错误类别: %s",
+                             decision.reason, decision.category)
+                raise
+
+    async def translate_packed(self, texts, target_lang, style, temp, model_name, file_hash, previous_chunk="",
+                               log_callback=None):
+        """多段打包翻译：将多个短分块放入一次请求，按编号拆分结果
+        每段仍按原有缓存键单独缓存（缓存未还原格式的译文，与 translate_with_context 一致）；
+        拆分校验失败或请求失败时回退为逐段请求
+        :param texts: 待翻译的分块列表（按原文顺序）
+        :param target_lang: 用户选择的目标语言（例如 'zh'、'en' 等）
+        :param style: 翻译风格代码
+        :param temp: 温度值
+        :param model_name: 使用的模型名称
+        :param file_hash: 文件哈希，用于缓存键生成
+        :param previous_chunk: 第一段之前的原文，用于上下文关联
+        :param log_callback: 日志回调函数
+        :return: 翻译结果列表以及实际使用的模型名称
+        """
+        lang_code = self.language_map[target_lang]
+        if model_name == ROUTER_CONFIG["AUTO_MODEL"]:
+            model_name = self.router.route("\n".join(texts))
+        processed = [self.preserve_formatting(text, lang_code) for text in texts]
+        results = [None] * len(texts)
+        pending = []
+        for index, text in enumerate(texts):
+            if cached := await cache.aget(text, lang_code, style, file_hash):
+                self.hit_stats["cache"] += 1
+                results[index] = self.restore_formatting(cached, processed[index][1], lang_code)
             else:
-                logger.error("[TranslationEngine] 连续重试失败，启用分块降级 | 原始长度: %d", len(text))
-                return self._handle_fallback(text, target_lang, style, temp, model_name, file_hash)
+                pending.append(index)
+
+        if len(pending) > 1:
+            await self._wait_if_paused()
+            self.pack_stats["packs"] += 1
+            self.pack_stats["segments"] += len(pending)
+            try:
+                translated = await self._request_packed(
+                    [processed[i][0] for i in pending], lang_code, style, temp, model_name,
+                    texts[pending[0] - 1] if pending[0] > 0 else previous_chunk
+                )
+                for index, result in zip(pending, translated):
+                    cache.set(texts[index], lang_code, style, result, file_hash)
+                    results[index] = self.restore_formatting(result, processed[index][1], lang_code)
+                pending = []
+            except Exception as e:
+                self.pack_stats["fallbacks"] += 1
+                logger.warning("[TranslationEngine] 打包请求失败，回退为逐段请求 | 段数: %d | %s", len(pending), e)
+                if log_callback:
+                    log_callback(f"打包翻译失败（{e}），改为逐段翻译 {len(pending)} 段")
+
+        # 剩余的段（单段或打包失败）逐段并发请求
+        singles = await asyncio.gather(*(
+            self.safe_translate(texts[i], target_lang, style, temp, model_name, file_hash,
+                                texts[i - 1] if i > 0 else previous_chunk, log_callback=log_callback)
+            for i in pending
+        ))
+        for index, (result, model_used) in zip(pending, singles):
+            results[index] = result
+            model_name = model_used
+        return results, model_name
+
+    async def _request_packed(self, processed_texts, lang_code, style, temperature, model_name, previous_chunk):
+        """发送一次打包请求并按编号拆分结果
+        :param processed_texts: 已做格式保留预处理的各段文本
+        :return: 与processed_texts一一对应的译文列表（已清理，未还原格式）
+        :raises ValueError: 返回的段数或编号与请求不一致时抛出
+        """
+        numbered = "\n".join(f"【#{i}】\n{text}" for i, text in enumerate(processed_texts, 1))
+        context = self._build_context(previous_chunk, lang_code)
+        messages = self._build_prompt(lang_code, style, context, PROMPT_CONFIG["PACK_PROMPT"] + numbered)
+        pair = self.output_budget.pair(numbered, lang_code, style)
+        input_tokens = estimate_tokens(numbered)
+        max_tokens = self.output_budget.max_tokens(pair, input_tokens, self.model_map[model_name])
+        try:
+            response, start_time, model_used = await self._hedged_completion(
+                model_name, messages, temperature, max_tokens=max_tokens
+            )
+            if response.choices[0].finish_reason == "length":
+                response = await self._continue_truncated(model_used, messages, temperature, response, max_tokens)
+            await self._record_output_usage(pair, input_tokens, response, model_used)
+            content = self._process_api_response(response, start_time, model_used)
+        except Exception as e:
+            self.concurrency.record_failure(e)
+            raise
+
+        parts = re.split(r'【#(\d+)】', content)
+        numbers = [int(n) for n in parts[1::2]]
+        segments = [self._clean_result(part) for part in parts[2::2]]
+        if numbers != list(range(1, len(processed_texts) + 1)) or not all(segments):
+            raise ValueError(f"分段校验失败：期望{len(processed_texts)}段，返回编号{numbers}")
+        logger.info("[TranslationEngine] 打包请求成功 | 段数: %d | 模型: %s", len(processed_texts), model_used)
+        return segments
 
     def _handle_model_downgrade(self, current_model, retry_count):
         """处理模型降级逻辑
@@ -256,7 +910,7 @@ class TranslationEngine:
         """
         if retry_count >= 1 and current_model == "DeepSeek-R1":
             logger.warning("[TranslationEngine] 模型自动降级...")
-            if hasattr(self, 'worker'):
+            if self.worker is not None:
                 self.worker.log.emit(
                     "检测到响应延迟，自动切换至V3模型保障稳定性",
                     "warning"
@@ -264,30 +918,39 @@ class TranslationEngine:
             return "DeepSeek-V3"
         return current_model
 
-    def _handle_fallback(self, text, target_lang, style, temp, model_name, file_hash):
+    async def _handle_fallback(self, text, target_lang, style, temp, model_name, file_hash, previous_chunk="",
+                               restore=True):
         """分块降级处理
+        先对整个分块做格式保留预处理再切分子块，子块以原文前文作为上下文并发翻译（各自缓存），
+        拼接未还原格式的子块译文作为整体写入原分块的缓存，返回前按整块的占位符映射统一还原一次
         :param text: 待翻译文本
         :param target_lang: 目标语言代码
         :param style: 翻译风格代码
         :param temp: 温度值
         :param model_name: 使用的模型名称
         :param file_hash: 文件哈希，用于缓存键生成
+        :param previous_chunk: 原分块的前文，作为第一个子块的上下文
+        :param restore: 是否还原格式（同 translate_with_context）
         :return: 分块翻译后的结果
         """
-        sub_chunks = dynamic_split(text, self.language_map[target_lang], 3000)
-        translated_parts = []
-        current_model = model_name
-        for idx, sub in enumerate(sub_chunks):
-            if hasattr(self, 'worker'):
-                self.worker.wait_if_paused()
-            previous_context = "\n".join(translated_parts[-3:])
+        lang_code = self.language_map[target_lang]
+        processed_text, replacements = self.preserve_formatting(text, lang_code)
+        sub_chunks = dynamic_split(processed_text, lang_code,
+                                   FILE_HANDLER_CONFIG["CHUNKING"]["FALLBACK_MAX_TOKENS"])
+        # 上下文取子块的原文前文，子块之间互不依赖，可以同时发出
+        contexts = [previous_chunk] + sub_chunks[:-1]
+        results = await asyncio.gather(*(
             # 此处不需要传递日志回调，可传入空回调函数
-            translated, current_model = self.safe_translate(
-                sub, target_lang, style, temp, current_model,
-                file_hash, previous_context, log_callback=lambda msg: None
-            )
-            translated_parts.append(translated)
-        return '\n'.join(translated_parts), current_model
+            self.safe_translate(sub, target_lang, style, temp, model_name, file_hash, context,
+                                log_callback=lambda msg: None, allow_fallback=False, restore=False)
+            for sub, context in zip(sub_chunks, contexts)
+        ))
+        translated = '\n'.join(part for part, _ in results)
+        cache.set(text, lang_code, style, translated, file_hash)
+        logger.info("[TranslationEngine] 分块降级完成 | 子块数: %d | 原始长度: %d", len(sub_chunks), len(text))
+        if restore:
+            translated = self.restore_formatting(translated, replacements, lang_code)
+        return translated, results[-1][1] if results else model_name
 
     # ---------- 格式保留方法 ---------- #
     def preserve_formatting(self, text, target_lang):
@@ -346,4 +1009,173 @@ class TranslationEngine:
         result = result.strip('"\'\n ')
         result = re.sub(r'^翻译结果[：:]\s*', '', result)
         result = re.sub(r'\n{3,}', '\n\n', result)
-        return result
\ No newline at end of file
+        return result
+
+
+class TranslationEngine:
+    """同步翻译引擎（AsyncTranslationEngine的薄封装）
+
+    属性：
+    - async_engine: 实际执行翻译的异步引擎
+    - language_map / style_map / model_map: 透传异步引擎的映射表
+
+    功能：
+    - 在后台线程中运行唯一的事件循环，所有请求共享该循环与同一个AsyncOpenAI客户端
+    - 提供与原同步接口一致的translate_with_context/safe_translate，供GUI工作线程调用
+    - submit_translate返回concurrent.futures.Future，便于批量并发提交分块
+    """
+
+    def __init__(self, api_key, max_concurrency=API_CONFIG["MAX_CONCURRENCY"], transport=None):
+        """初始化同步封装并启动后台事件循环
+        :param api_key: DeepSeek API密钥
+        :param max_concurrency: 同时在途的API请求上限
+        :param transport: 外部注入的httpx异步transport（可选）
+        """
+        self.async_engine = AsyncTranslationEngine(api_key, max_concurrency, transport)
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="TranslationEngineLoop", daemon=True
+        )
+        self._loop_thread.start()
+        logger.debug("[TranslationEngine] 后台事件循环已启动")
+
+    @property
+    def language_map(self):
+        return self.async_engine.language_map
+
+    @property
+    def style_map(self):
+        return self.async_engine.style_map
+
+    @property
+    def model_map(self):
+        return self.async_engine.model_map
+
+    @property
+    def concurrency(self):
+        return self.async_engine.concurrency
+
+    @property
+    def hedge_policy(self):
+        return self.async_engine.hedge_policy
+
+    @property
+    def stall_monitor(self):
+        return self.async_engine.stall_monitor
+
+    @property
+    def connection_stats(self):
+        return self.async_engine.connection_stats
+
+    @property
+    def key_pool(self):
+        return self.async_engine.key_pool
+
+    @property
+    def router(self):
+        return self.async_engine.router
+
+    @property
+    def pack_stats(self):
+        return self.async_engine.pack_stats
+
+    @property
+    def hit_stats(self):
+        return self.async_engine.hit_stats
+
+    @property
+    def prompt_cache_stats(self):
+        return self.async_engine.prompt_cache_stats
+
+    @property
+    def ledger(self):
+        return self.async_engine.ledger
+
+    @property
+    def output_budget(self):
+        return self.async_engine.output_budget
+
+    @property
+    def gui(self):
+        return self.async_engine.gui
+
+    @gui.setter
+    def gui(self, value):
+        self.async_engine.gui = value
+
+    @property
+    def worker(self):
+        return self.async_engine.worker
+
+    @worker.setter
+    def worker(self, value):
+        self.async_engine.worker = value
+
+    def begin_job(self, job_name="", budget=None):
+        """开始新的翻译任务，重置任务级状态，参数同AsyncTranslationEngine.begin_job"""
+        self.async_engine.begin_job(job_name, budget)
+
+    def warm_up(self):
+        """在后台预热连接，不阻塞调用方
+        :return: concurrent.futures.Future
+        """
+        return self.submit(self.async_engine.warm_up())
+
+    def submit(self, coro):
+        """将协程提交到后台事件循环
+        :param coro: 待执行的协程对象
+        :return: concurrent.futures.Future
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit_translate(self, text, target_lang, style, temp, model_name, file_hash, previous_chunk="",
+                         log_callback=None, stream_callback=None):
+        """非阻塞提交一次safe_translate，参数同safe_translate
+        :return: concurrent.futures.Future，结果为(翻译结果, 实际使用的模型名称)
+        """
+        return self.submit(self.async_engine.safe_translate(
+            text, target_lang, style, temp, model_name, file_hash, previous_chunk,
+            log_callback=log_callback, stream_callback=stream_callback
+        ))
+
+    def submit_translate_packed(self, texts, target_lang, style, temp, model_name, file_hash, previous_chunk="",
+                                log_callback=None):
+        """非阻塞提交一次多段打包翻译，参数同translate_packed
+        :return: concurrent.futures.Future，结果为(翻译结果列表, 实际使用的模型名称)
+        """
+        return self.submit(self.async_engine.translate_packed(
+            texts, target_lang, style, temp, model_name, file_hash, previous_chunk, log_callback=log_callback
+        ))
+
+    def translate_with_context(self, text, target_lang, style, temperature, model_name, file_hash,
+                               previous_chunk="", log_callback=None, stream_callback=None):
+        """同步版带上下文翻译，参数同AsyncTranslationEngine.translate_with_context"""
+        return self.submit(self.async_engine.translate_with_context(
+            text, target_lang, style, temperature, model_name, file_hash, previous_chunk,
+            log_callback=log_callback, stream_callback=stream_callback
+        )).result()
+
+    def safe_translate(self, text, target_lang, style, temp, model_name, file_hash, previous_chunk="",
+                       log_callback=None, stream_callback=None):
+        """同步版安全翻译，参数同AsyncTranslationEngine.safe_translate
+        :return: 翻译结果以及实际使用的模型名称
+        """
+        return self.submit_translate(
+            text, target_lang, style, temp, model_name, file_hash, previous_chunk,
+            log_callback=log_callback, stream_callback=stream_callback
+        ).result()
+
+    def prepare_prompt(self, text, target_lang, style, previous_chunk=""):
+        return self.async_engine.prepare_prompt(text, target_lang, style, previous_chunk)
+
+    def clean_result(self, content):
+        return self.async_engine.clean_result(content)
+
+    def record_usage(self, model, usage, chunk_key=None):
+        return self.async_engine.record_usage(model, usage, chunk_key)
+
+    def preserve_formatting(self, text, target_lang):
+        return self.async_engine.preserve_formatting(text, target_lang)
+
+    def restore_formatting(self, translated_text, replacements, target_lang):
+        return self.async_engine.restore_formatting(translated_text, replacements, target_lang)